@@ -1,5 +1,6 @@
 import pytest
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from rest_framework.test import APIClient
 from savannah_app.models import Category, Product, Customer, Order, OrderItem
 
@@ -75,4 +76,5 @@ def cleanup_database():
     Product.objects.all().delete()
     Category.objects.all().delete()
     Customer.objects.all().delete()
-    User.objects.all().delete()
\ No newline at end of file
+    User.objects.all().delete()
+    cache.clear()
\ No newline at end of file
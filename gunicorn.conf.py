@@ -0,0 +1,31 @@
+# gunicorn.conf.py
+"""Gunicorn worker profiles, picked by ``SERVING_MODE``.
+
+``wsgi`` (the default): sync workers, each serving one request at a time,
+so a slow query or notification call holds a whole worker.
+
+``asgi``: uvicorn workers running ``savannah_project.asgi``. Each worker
+keeps many requests in flight on its event loop, and the product list,
+category list and order history are served by async views. Connections
+are then closed after each request (``DATABASE_CONN_MAX_AGE`` defaults to
+0), so run it behind PgBouncer with ``DATABASE_POOLER=pgbouncer``.
+
+    SERVING_MODE=asgi gunicorn -c gunicorn.conf.py
+"""
+import os
+
+serving_mode = os.environ.get('SERVING_MODE', 'wsgi')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 3))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+accesslog = '-'
+errorlog = '-'
+
+if serving_mode == 'asgi':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    wsgi_app = 'savannah_project.asgi:application'
+    # Let in-flight requests finish on shutdown before the pod is killed.
+    graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+else:
+    wsgi_app = 'savannah_project.wsgi:application'
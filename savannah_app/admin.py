@@ -1,6 +1,13 @@
 # savannah_app/admin.py
-from django.contrib import admin
+from collections import Counter
+
+from django.contrib import admin, messages
+from django.db import transaction
+from django.http import HttpResponseRedirect
 from mptt.admin import MPTTModelAdmin
+
+from . import analytics
+from .inventory import InsufficientStock, held_quantities, rebalance, release
 from .models import Category, Product, Customer, Order, OrderItem
 
 @admin.register(Category)
@@ -32,4 +39,43 @@ class OrderAdmin(admin.ModelAdmin):
     list_display = ['order_number', 'customer', 'status', 'total_amount', 'created_at']
     list_filter = ['status', 'created_at']
     search_fields = ['order_number', 'customer__user__username']
-    inlines = [OrderItemInline]
\ No newline at end of file
+    inlines = [OrderItemInline]
+
+    # Admin edits keep stock and the sales summaries in step like the API
+    # does: what the order held and contributed is read in save_model,
+    # before anything is written, and settled in save_related once the
+    # inline lines are saved too.
+
+    def changeform_view(self, request, *args, **kwargs):
+        try:
+            return super().changeform_view(request, *args, **kwargs)
+        except InsufficientStock as exc:
+            shortages = ', '.join(f'product {pk}: {units} left' for pk, units in sorted(exc.shortages.items()))
+            self.message_user(request, f'Insufficient stock ({shortages}); nothing was saved.', messages.ERROR)
+            return HttpResponseRedirect(request.get_full_path())
+
+    def save_model(self, request, obj, form, change):
+        obj._held_before, obj._summary_before = Counter(), {}
+        if change:
+            stored = Order.objects.select_for_update().get(pk=obj.pk)
+            obj._held_before = held_quantities(stored)
+            obj._summary_before = analytics.order_snapshot([obj.pk])
+        super().save_model(request, obj, form, change)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        order = form.instance
+        analytics.record_change(order._summary_before, analytics.order_snapshot([order.pk]))
+        rebalance(order, order._held_before)
+
+    @transaction.atomic
+    def delete_model(self, request, obj):
+        obj.status = Order.objects.select_for_update().values_list('status', flat=True).get(pk=obj.pk)
+        release(held_quantities(obj))
+        super().delete_model(request, obj)
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        for order in queryset.select_for_update():
+            release(held_quantities(order))
+        super().delete_queryset(request, queryset)
\ No newline at end of file
@@ -0,0 +1,177 @@
+# savannah_app/analytics.py
+"""Daily sales summaries.
+
+``DailySalesSummary`` holds one row per (day, category, status) plus one
+whole-order row per (day, status). Order writes keep it current by
+snapshotting what the touched orders contribute before and after the write,
+then adding the difference to the affected rows once the write commits; the
+cost depends on the orders written, not on how many exist. The API, bulk
+transitions and the admin all do this; other code writing orders must wrap
+the write in ``tracking`` too. Lines are
+counted under the category they had when ordered (``OrderItem.category``). ``sales_report`` answers any date
+range by summing those rows, so dashboards read at most a few rows per day
+whatever the order volume. ``rebuild_summaries`` recomputes them from
+scratch for the backfill command and for repairs after raw SQL edits.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+
+from .models import DailySalesSummary, Order, OrderItem
+
+REVENUE_FIELD = DecimalField(max_digits=14, decimal_places=2)
+BUCKETS = {'day': None, 'week': TruncWeek, 'month': TruncMonth}
+
+
+def order_snapshot(order_ids, orders=None):
+    """What ``order_ids`` add to the summaries, in two queries.
+
+    Returns ``{(day, category_id, status): [orders, items, revenue]}``; a
+    ``category_id`` of ``None`` is the whole-order row. ``orders`` may be a
+    queryset to aggregate instead, for rebuilds.
+    """
+    if orders is None:
+        order_ids = list(order_ids)
+        if not order_ids:
+            return {}
+        orders = Order.objects.filter(pk__in=order_ids)
+    snapshot = {}
+    units = defaultdict(int)
+    lines = OrderItem.objects.filter(order__in=orders).values(
+        'category_id', day=TruncDate('order__created_at'), status=F('order__status'),
+    ).annotate(
+        orders=Count('order_id', distinct=True),
+        items=Sum('quantity'),
+        revenue=Sum(F('price') * F('quantity'), output_field=REVENUE_FIELD),
+    ).order_by()
+    for row in lines:
+        # Lines whose category was since deleted count towards the order only.
+        if row['category_id'] is not None:
+            snapshot[row['day'], row['category_id'], row['status']] = [row['orders'], row['items'], row['revenue']]
+        units[row['day'], row['status']] += row['items']
+    totals = orders.values('status', day=TruncDate('created_at')).annotate(
+        orders=Count('id'), revenue=Sum('total_amount', output_field=REVENUE_FIELD),
+    ).order_by()
+    for row in totals:
+        snapshot[row['day'], None, row['status']] = [
+            row['orders'], units[row['day'], row['status']], row['revenue'],
+        ]
+    return snapshot
+
+
+def with_status(snapshot, status):
+    """``snapshot`` as it would read after its orders moved to ``status``."""
+    moved = defaultdict(lambda: [0, 0, Decimal('0')])
+    for (day, category_id, _), values in snapshot.items():
+        moved[day, category_id, status] = [a + b for a, b in zip(moved[day, category_id, status], values)]
+    return dict(moved)
+
+
+def record_change(before, after):
+    """Add the difference between two snapshots to the summary rows.
+
+    The rows are shared by every order of the day, so they are only
+    updated once the surrounding transaction commits, in a short one of
+    their own; a checkout never holds their locks. A crash in between
+    loses the delta until ``rebuild_summaries`` runs.
+    """
+    empty = [0, 0, Decimal('0')]
+    # A fixed key order keeps concurrent writers from deadlocking.
+    deltas = []
+    for key in sorted(before.keys() | after.keys(), key=lambda k: (k[0], k[1] or 0, k[2])):
+        delta = [a - b for a, b in zip(after.get(key, empty), before.get(key, empty))]
+        if any(delta):
+            deltas.append((key, delta))
+    if deltas:
+        transaction.on_commit(lambda: _apply_all(deltas))
+
+
+@transaction.atomic
+def _apply_all(deltas):
+    for key, delta in deltas:
+        _apply(key, *delta)
+
+
+@contextmanager
+def tracking(order_ids):
+    """Record what the block changes about ``order_ids``."""
+    before = order_snapshot(order_ids)
+    yield
+    record_change(before, order_snapshot(order_ids))
+
+
+def _apply(key, orders, items, revenue):
+    day, category_id, status = key
+    rows = DailySalesSummary.objects.filter(day=day, category_id=category_id, status=status)
+    changes = {
+        'order_count': F('order_count') + orders,
+        'item_count': F('item_count') + items,
+        'revenue': F('revenue') + revenue,
+    }
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            DailySalesSummary.objects.create(
+                day=day, category_id=category_id, status=status,
+                order_count=orders, item_count=items, revenue=revenue,
+            )
+    except IntegrityError:
+        # Another writer created the row first.
+        rows.update(**changes)
+
+
+@transaction.atomic
+def rebuild_summaries(start=None, end=None):
+    """Recompute the summaries for ``start``..``end`` (inclusive, open if ``None``)."""
+    orders = Order.objects.all()
+    summaries = DailySalesSummary.objects.all()
+    if start is not None:
+        orders = orders.filter(created_at__date__gte=start)
+        summaries = summaries.filter(day__gte=start)
+    if end is not None:
+        orders = orders.filter(created_at__date__lte=end)
+        summaries = summaries.filter(day__lte=end)
+    summaries.delete()
+    rows = [
+        DailySalesSummary(
+            day=day, category_id=category_id, status=status,
+            order_count=orders_count, item_count=items, revenue=revenue,
+        )
+        for (day, category_id, status), (orders_count, items, revenue) in order_snapshot(None, orders).items()
+    ]
+    DailySalesSummary.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def sales_report(start, end, bucket='day', group_by=(), statuses=None, category=None):
+    """Sum the summaries for ``start``..``end`` into ``bucket`` periods.
+
+    ``group_by`` may hold ``'category'`` and/or ``'status'``. Without a
+    category grouping or filter the whole-order rows are used, so orders
+    spanning several categories are counted once.
+    """
+    rows = DailySalesSummary.objects.filter(day__gte=start, day__lte=end)
+    if statuses:
+        rows = rows.filter(status__in=statuses)
+    if category is not None:
+        rows = rows.filter(
+            category__tree_id=category.tree_id,
+            category__lft__gte=category.lft,
+            category__rght__lte=category.rght,
+        )
+    elif 'category' not in group_by:
+        rows = rows.filter(category__isnull=True)
+    else:
+        rows = rows.filter(category__isnull=False)
+
+    truncate = BUCKETS[bucket]
+    period = truncate('day') if truncate else F('day')
+    dimensions = [{'category': 'category_id', 'status': 'status'}[name] for name in group_by]
+    return rows.values(*dimensions, period=period).annotate(
+        orders=Sum('order_count'), items=Sum('item_count'), revenue=Sum('revenue', output_field=REVENUE_FIELD),
+    ).order_by('period', *dimensions)
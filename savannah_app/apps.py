@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SavannahAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'savannah_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,11 @@
+from django.urls import include, path
+
+from .async_views import AsyncCategoryListView, AsyncOrderHistoryView, AsyncProductListView
+
+# Listed ahead of savannah_app.urls so these paths resolve here first.
+urlpatterns = [
+    path('products/', AsyncProductListView.as_view(), name='async-product-list'),
+    path('categories/', AsyncCategoryListView.as_view(), name='async-category-list'),
+    path('orders/history/', AsyncOrderHistoryView.as_view(), name='async-order-history'),
+    path('', include('savannah_app.urls')),
+]
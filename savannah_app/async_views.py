@@ -0,0 +1,134 @@
+# savannah_app/async_views.py
+"""Async read endpoints for the ASGI stack.
+
+With ``SERVING_MODE=asgi`` the product list, category list and order
+history are served by these views rather than their viewset actions, at
+the same URLs and with the same payloads, validators and cache entries.
+The request set-up stays with the viewset, and as DRF is synchronous it
+runs in one worker thread: authentication, permissions, throttles,
+conditional validators, filters and ``?fields=``. The queries that grow
+with the page (the count, the rows, an order page's items) are then
+awaited through the async ORM, so a slow query ties up a coroutine
+instead of a whole worker. Other methods on the same URLs are handed to
+the viewset.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.response import Response
+
+from . import caching
+from .pagination import apaginate_queryset
+from .projections import (
+    aorder_data, category_data, product_data, project_categories, project_orders, project_products,
+)
+from .views import CategoryViewSet, OrderViewSet, ProductViewSet, category_scopes, product_list_scopes
+
+
+class AsyncListView:
+    """Serve ``viewset``'s ``action`` for GET and HEAD on the event loop.
+
+    ``project``/``represent`` turn the filtered queryset into rows and a
+    page of rows into payloads, as the viewset's list does. ``scopes``
+    caches responses the way ``cache_response(scopes)`` does.
+    """
+    viewset = None
+    action = 'list'
+    # The viewset actions answering this URL for other methods.
+    actions = {'get': 'list', 'post': 'create'}
+    scopes = None
+    project = None
+    represent = None
+
+    @classmethod
+    def as_view(cls):
+        fallback = cls.viewset.as_view(cls.actions)
+
+        async def view(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await sync_to_async(fallback)(request, *args, **kwargs)
+            return await cls().dispatch(request, *args, **kwargs)
+        # csrf_exempt() cannot wrap a coroutine function on Django 4.2. As
+        # with any DRF view, SessionAuthentication enforces CSRF itself.
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        view = self.viewset(action_map={'get': self.action, 'head': self.action})
+        view.args, view.kwargs = args, kwargs
+        request = view.initialize_request(request, *args, **kwargs)
+        view.request = request
+        view.headers = view.default_response_headers
+        try:
+            response = await self.respond(view, request)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        response = view.finalize_response(request, response, *args, **kwargs)
+        if not isinstance(response, Response):
+            return response
+        if response.accepted_renderer.format == 'json':
+            return response.render()
+        # The browsable API builds forms from the database.
+        return await sync_to_async(response.render)()
+
+    async def respond(self, view, request):
+        queryset, serializer, key = await sync_to_async(self.prepare)(view, request)
+        if key is None:
+            return Response(await self.page(view, queryset, serializer))
+
+        async def compute():
+            return await self.page(view, queryset, serializer), True
+
+        data, state = await caching.aget_or_compute(key, compute)
+        response = Response(data)
+        response['X-Cache'] = state
+        return response
+
+    def prepare(self, view, request):
+        """The synchronous part: ``(queryset, trimmed serializer, cache key)``."""
+        view.initial(request)
+        queryset = self.get_queryset(view)
+        names = self.scopes and settings.CATALOGUE_CACHE_ENABLED and self.scopes(view, request)
+        key = caching.response_key(request, names) if names else None
+        return queryset, view.get_sparse_serializer(), key
+
+    def get_queryset(self, view):
+        return view.filter_queryset(view.get_queryset())
+
+    async def page(self, view, queryset, serializer):
+        rows = self.project(queryset, serializer)
+        page = await apaginate_queryset(view.paginator, rows, view.request)
+        if page is None:
+            return self.represent([row async for row in rows], serializer)
+        return view.get_paginated_response(self.represent(page, serializer)).data
+
+
+class AsyncProductListView(AsyncListView):
+    viewset = ProductViewSet
+    scopes = staticmethod(product_list_scopes)
+    project = staticmethod(project_products)
+    represent = staticmethod(product_data)
+
+
+class AsyncCategoryListView(AsyncListView):
+    viewset = CategoryViewSet
+    scopes = staticmethod(category_scopes)
+    project = staticmethod(project_categories)
+    represent = staticmethod(category_data)
+
+
+class AsyncOrderHistoryView(AsyncListView):
+    viewset = OrderViewSet
+    action = 'history'
+    actions = {'get': 'history'}
+
+    def get_queryset(self, view):
+        return view.get_history_queryset()
+
+    async def page(self, view, queryset, serializer):
+        rows = project_orders(queryset, serializer)
+        # DRF's cursor arithmetic reads the page rows itself, so that one
+        # query goes through a thread; the items query does not.
+        page = await sync_to_async(view.paginate_queryset)(rows)
+        if page is None:
+            return await aorder_data([row async for row in rows], serializer)
+        return view.get_paginated_response(await aorder_data(page, serializer)).data
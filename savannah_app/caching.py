@@ -0,0 +1,236 @@
+# savannah_app/caching.py
+"""Response cache for the catalogue endpoints.
+
+Cached responses are keyed on the request URL and on the current token of
+every *scope* the response depends on (``categories``, ``products``,
+``product:<id>``, and ``category:<id>`` for a category's whole subtree).
+Writes never delete entries; they replace the tokens of the scopes they
+touch, so every key built from an old token simply stops being looked up
+and ages out of the cache.
+
+Entries carry a soft expiry shorter than their cache timeout. The first
+request past the soft expiry takes a short lock and recomputes while the
+others keep serving the stale copy; on a cold miss the others wait briefly
+for the lock holder instead of all hitting the database at once.
+
+Fills read from a replica like any other safe request, except shortly
+after a catalogue write: until ``DATABASE_REPLICA_MAX_LAG`` (plus one lag
+check interval) has passed since the last write committed, a replica the
+router may still pick can predate it, and what it returned would be
+stored under the post-write tokens. Those fills read the primary.
+"""
+import asyncio
+import hashlib
+import time
+import uuid
+from contextlib import nullcontext
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q
+from rest_framework.response import Response
+
+from .models import Category
+from .replicas import replica_reads
+
+VERSION_PREFIX = 'catalogue:version:'
+RESPONSE_PREFIX = 'catalogue:response:'
+# When the last catalogue write was recorded (time.time()).
+WRITTEN_KEY = 'catalogue:written'
+
+
+def get_cache():
+    return caches[settings.CATALOGUE_CACHE_ALIAS]
+
+
+def _new_token():
+    return uuid.uuid4().hex[:16]
+
+
+def scope_versions(scopes):
+    """Return ``{scope: token}``, minting tokens for scopes never seen before."""
+    cache = get_cache()
+    keys = {VERSION_PREFIX + scope: scope for scope in scopes}
+    found = cache.get_many(list(keys))
+    missing = {key: _new_token() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return {keys[key]: token for key, token in found.items()}
+
+
+def _bump(scopes):
+    tokens = {VERSION_PREFIX + scope: _new_token() for scope in scopes}
+    tokens[WRITTEN_KEY] = time.time()
+    get_cache().set_many(tokens, timeout=None)
+
+
+def _fill_reads(written):
+    """Replica reads for a fill if every replica the router may pick has the last write."""
+    window = settings.DATABASE_REPLICA_MAX_LAG + settings.DATABASE_REPLICA_CHECK_INTERVAL
+    # Unknown (the cache was flushed): the primary until a window has passed.
+    if written is None or time.time() - written <= window:
+        return replica_reads(False)
+    return nullcontext()
+
+
+def fill_reads():
+    if not settings.DATABASE_REPLICAS:
+        return nullcontext()
+    cache = get_cache()
+    cache.add(WRITTEN_KEY, time.time(), timeout=None)
+    return _fill_reads(cache.get(WRITTEN_KEY))
+
+
+async def afill_reads():
+    if not settings.DATABASE_REPLICAS:
+        return nullcontext()
+    cache = get_cache()
+    await cache.aadd(WRITTEN_KEY, time.time(), timeout=None)
+    return _fill_reads(await cache.aget(WRITTEN_KEY))
+
+
+def invalidate(*scopes):
+    """Retire the cached responses of ``scopes``.
+
+    Tokens are replaced immediately and again once the surrounding
+    transaction commits, so a response recomputed from pre-commit data in
+    between cannot outlive the write.
+    """
+    scopes = {scope for scope in scopes if scope}
+    if not scopes or not settings.CATALOGUE_CACHE_ENABLED:
+        return
+    _bump(scopes)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(scopes))
+
+
+def invalidate_products(product_ids=(), category_ids=()):
+    """Retire product responses, including the subtree listings of every ancestor category."""
+    category_ids = {pk for pk in category_ids if pk is not None}
+    if category_ids and settings.CATALOGUE_CACHE_ENABLED:
+        category_ids = _with_ancestors(category_ids)
+    invalidate(
+        'products',
+        *(f'product:{pk}' for pk in product_ids if pk is not None),
+        *(f'category:{pk}' for pk in category_ids),
+    )
+
+
+def _with_ancestors(category_ids):
+    ancestors = Q(pk__in=())
+    for tree_id, lft, rght in Category.objects.filter(pk__in=category_ids).values_list('tree_id', 'lft', 'rght'):
+        ancestors |= Q(tree_id=tree_id, lft__lte=lft, rght__gte=rght)
+    return category_ids | set(Category.objects.filter(ancestors).values_list('pk', flat=True))
+
+
+def invalidate_categories():
+    # Product payloads embed the category name, so they go too.
+    invalidate('categories', 'products')
+
+
+def response_key(request, scopes):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    versions = scope_versions(scopes)
+    raw = '|'.join([
+        request.build_absolute_uri(request.path),
+        query,
+        *(f'{scope}={versions[scope]}' for scope in sorted(versions)),
+    ])
+    return RESPONSE_PREFIX + hashlib.md5(raw.encode()).hexdigest()
+
+
+def get_or_compute(key, compute):
+    """Return ``(value, state)`` for ``key``; ``state`` is HIT, STALE or MISS.
+
+    ``compute`` returns ``(value, cacheable)``. At most one caller per key
+    recomputes at a time.
+    """
+    cache = get_cache()
+    entry = cache.get(key)
+    if entry is not None and entry[0] > time.time():
+        return entry[1], 'HIT'
+
+    lock = key + ':lock'
+    if cache.add(lock, 1, timeout=settings.CATALOGUE_CACHE_LOCK_TIMEOUT):
+        try:
+            with fill_reads():
+                value, cacheable = compute()
+            if cacheable:
+                timeout = settings.CATALOGUE_CACHE_TIMEOUT
+                cache.set(key, (time.time() + timeout, value), timeout + settings.CATALOGUE_CACHE_GRACE)
+            return value, 'MISS'
+        finally:
+            cache.delete(lock)
+
+    if entry is not None:
+        return entry[1], 'STALE'
+    deadline = time.time() + settings.CATALOGUE_CACHE_LOCK_WAIT
+    while time.time() < deadline:
+        time.sleep(0.02)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[1], 'HIT'
+    return compute()[0], 'MISS'
+
+
+async def aget_or_compute(key, compute):
+    """``get_or_compute`` for a coroutine ``compute``, waiting without blocking the loop."""
+    cache = get_cache()
+    entry = await cache.aget(key)
+    if entry is not None and entry[0] > time.time():
+        return entry[1], 'HIT'
+
+    lock = key + ':lock'
+    if await cache.aadd(lock, 1, timeout=settings.CATALOGUE_CACHE_LOCK_TIMEOUT):
+        try:
+            with await afill_reads():
+                value, cacheable = await compute()
+            if cacheable:
+                timeout = settings.CATALOGUE_CACHE_TIMEOUT
+                await cache.aset(key, (time.time() + timeout, value), timeout + settings.CATALOGUE_CACHE_GRACE)
+            return value, 'MISS'
+        finally:
+            await cache.adelete(lock)
+
+    if entry is not None:
+        return entry[1], 'STALE'
+    deadline = time.time() + settings.CATALOGUE_CACHE_LOCK_WAIT
+    while time.time() < deadline:
+        await asyncio.sleep(0.02)
+        entry = await cache.aget(key)
+        if entry is not None:
+            return entry[1], 'HIT'
+    return (await compute())[0], 'MISS'
+
+
+def cache_response(scopes):
+    """Cache a viewset handler's successful responses.
+
+    ``scopes(view, request, *args, **kwargs)`` names the scopes the
+    response depends on, or returns ``None`` to bypass the cache. Handlers run after authentication and permission
+    checks, so only authorised requests reach the cache.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            names = settings.CATALOGUE_CACHE_ENABLED and scopes(view, request, *args, **kwargs)
+            if not names:
+                return handler(view, request, *args, **kwargs)
+            computed = {}
+
+            def compute():
+                response = handler(view, request, *args, **kwargs)
+                computed['response'] = response
+                return response.data, response.status_code == 200
+
+            key = response_key(request, names)
+            data, state = get_or_compute(key, compute)
+            response = computed.get('response') or Response(data)
+            response['X-Cache'] = state
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,72 @@
+# savannah_app/category_tree.py
+"""Nested category hierarchy for navigation menus.
+
+The forest (or one subtree) is read in a single ordered MPTT query and
+assembled in one pass. The rendered JSON is cached under the catalogue
+cache scopes, and its ETag is derived from the scope tokens alone, so a
+conditional request is answered without touching the database or the
+cached body.
+"""
+import hashlib
+
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+from . import caching
+from .models import Category
+
+NODE_FIELDS = ('id', 'name', 'slug', 'is_active', 'parent_id')
+
+
+def build_tree(rows):
+    """Nest ``rows`` (ordered parents-first) and return the top-level nodes."""
+    nodes = {}
+    roots = []
+    for row in rows:
+        parent_id = row.pop('parent_id')
+        if 'rollup__product_count' in row:
+            row['product_count'] = row.pop('rollup__product_count') or 0
+        row['children'] = []
+        nodes[row['id']] = row
+        parent = nodes.get(parent_id)
+        (parent['children'] if parent is not None else roots).append(row)
+    return roots
+
+
+def tree_scopes(with_counts):
+    # Subtree product counts move with every product write.
+    return ['categories', 'products'] if with_counts else ['categories']
+
+
+def content_etag(content):
+    return '"%s"' % hashlib.md5(content).hexdigest()
+
+
+def tree_etag(root_id, with_counts):
+    """ETag from the scope tokens, or ``None`` when the cache is disabled
+    (tokens are not maintained then)."""
+    if not settings.CATALOGUE_CACHE_ENABLED:
+        return None
+    versions = caching.scope_versions(tree_scopes(with_counts))
+    raw = '|'.join([str(root_id), str(with_counts), *(versions[scope] for scope in sorted(versions))])
+    return '"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+
+def render_tree(root_id=None, with_counts=False):
+    """Return the rendered JSON of the tree, or ``None`` if ``root_id`` is unknown."""
+    fields = NODE_FIELDS + (('rollup__product_count',) if with_counts else ())
+    roots = build_tree(Category.objects.tree_rows(*fields, root_id=root_id))
+    if root_id is not None and not roots:
+        return None
+    return JSONRenderer().render(roots)
+
+
+def cached_tree(etag, root_id=None, with_counts=False):
+    """Rendered tree for ``etag``; at most one request per ETag renders it."""
+    key = f'{caching.RESPONSE_PREFIX}tree:{etag}'
+    content, _ = caching.get_or_compute(key, lambda: _cacheable(render_tree(root_id, with_counts)))
+    return content
+
+
+def _cacheable(content):
+    return content, content is not None
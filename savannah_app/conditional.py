@@ -0,0 +1,154 @@
+# savannah_app/conditional.py
+"""Conditional requests for the model viewsets.
+
+Validators are computed before anything is serialized. Detail views read
+the row's ``updated_at`` and those of the rows its payload embeds, in one
+aggregate. List views never aggregate over the whole filtered queryset:
+those backed by the catalogue cache take their ETag from the cache scope
+tokens (as the category tree does), and a view can name a small, indexed
+queryset to aggregate instead, such as one customer's orders. Only lists
+with neither hash the page actually served. Matching
+``If-None-Match``/``If-Modified-Since`` requests get a 304, and writes
+whose ``If-Match``/``If-Unmodified-Since`` no longer hold get a 412, so
+clients can update optimistically without overwriting each other's
+changes.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import caching
+from .renderers import FastJSONRenderer
+
+
+class Precondition(Exception):
+    """Short-circuits a request with the 304/412 response in ``response``."""
+
+    def __init__(self, response):
+        super().__init__(response.status_code)
+        self.response = response
+
+
+class ConditionalMixin:
+    """Add ETag/Last-Modified validators to a ``ModelViewSet``.
+
+    ``conditional_timestamp_fields`` lists the timestamps a representation
+    depends on; include related ones (``category__updated_at``) when the
+    payload embeds data from another row. ``conditional_list_scopes`` is the
+    ``cache_response`` scopes function of the list action, if it has one.
+    ``get_conditional_list_queryset`` may return rows whose count and
+    ``conditional_list_timestamp_fields`` validate a list; while the scope
+    tokens are unavailable, ``conditional_timestamp_fields`` are read too.
+    Lists with neither hash the page they serve, as a last resort.
+    """
+    conditional_timestamp_fields = ('updated_at',)
+    conditional_list_actions = ('list',)
+    conditional_list_scopes = None
+    conditional_list_timestamp_fields = ('updated_at',)
+    conditional_detail_actions = ('retrieve', 'update', 'partial_update', 'destroy')
+    _validators = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._validators = self.get_validators(request)
+        if self._validators is not None:
+            etag, last_modified = self._validators
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                raise Precondition(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, Precondition):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = self._validators
+        if response.status_code == 200 and request.method in ('PUT', 'PATCH'):
+            # Hand back the validators of the new version for the next If-Match.
+            validators = self.get_validators(request)
+        if validators is None and response.status_code == 200 and self._lists(request):
+            validators = self._page_validators(request, response)
+            not_modified = get_conditional_response(request, etag=validators[0])
+            if not_modified is not None:
+                response = not_modified
+        if validators is not None and response.status_code in (200, 304) and not response.has_header('ETag'):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def get_validators(self, request):
+        """Return ``(etag, last_modified)`` for this request, or ``None``."""
+        if self.action in self.conditional_detail_actions:
+            return self._detail_validators(request)
+        if self._lists(request):
+            return self._list_validators(request)
+        return None
+
+    def _lists(self, request):
+        return self.action in self.conditional_list_actions and request.method in ('GET', 'HEAD')
+
+    def get_conditional_list_queryset(self, request):
+        """Rows that validate this list, or ``None``."""
+        return None
+
+    def _list_validators(self, request):
+        # Tokens are only maintained while the cache is on.
+        scopes = self.conditional_list_scopes
+        names = scopes and settings.CATALOGUE_CACHE_ENABLED and scopes(self, request)
+        queryset = self.get_conditional_list_queryset(request)
+        if not names and queryset is None:
+            return None
+
+        identity, last_modified = ['list'], None
+        if names:
+            versions = caching.scope_versions(names)
+            identity += [f'{name}={versions[name]}' for name in sorted(versions)]
+        if queryset is not None:
+            fields, count = self.conditional_list_timestamp_fields, Count('*')
+            if scopes and not names:
+                # No token follows the embedded rows; read their timestamps.
+                fields, count = self.conditional_timestamp_fields, Count('pk', distinct=True)
+            stats = queryset.order_by().aggregate(
+                count=count, **{f'last_{i}': Max(field) for i, field in enumerate(fields)},
+            )
+            identity.append(stats.pop('count'))
+            last_modified = max((value for value in stats.values() if value is not None), default=None)
+        return self._validators_for(request, identity, last_modified)
+
+    def _page_validators(self, request, response):
+        content = FastJSONRenderer().render(response.data)
+        return self._validators_for(request, ('page', hashlib.md5(content).hexdigest()), None)
+
+    def _detail_validators(self, request):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            # An aggregate, as embedded to-many rows (an order's items) join in several rows.
+            stats = self.get_queryset().filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            ).order_by().aggregate(
+                **{f'last_{i}': Max(field) for i, field in enumerate(self.conditional_timestamp_fields)}
+            )
+        except (KeyError, TypeError, ValueError, ValidationError):
+            return None
+        if stats['last_0'] is None:
+            # updated_at is never null, so the row does not exist.
+            return None
+        last_modified = max(value for value in stats.values() if value is not None)
+        return self._validators_for(request, ('detail', self.kwargs[lookup_url_kwarg]), last_modified)
+
+    def _validators_for(self, request, identity, last_modified):
+        query = sorted(request.query_params.lists())
+        raw = '|'.join(map(str, [
+            self.get_queryset().model._meta.label, request.user.pk, query, *identity,
+            last_modified and last_modified.isoformat(),
+        ]))
+        etag = '"%s"' % hashlib.md5(raw.encode()).hexdigest()
+        return etag, last_modified and int(last_modified.timestamp())
@@ -0,0 +1,197 @@
+# savannah_app/exports.py
+"""Streaming CSV/NDJSON export of orders and products.
+
+Rows are read in keyset slices of ``EXPORT_CHUNK_SIZE``: each query picks
+up after the last row of the one before, along an index (``created_at, id``
+for orders, the primary key for products), so no server-side cursor is
+needed and exports behave the same behind a transaction-pooling PgBouncer.
+They are rendered into a ``StreamingHttpResponse`` a buffer at a time,
+optionally through an incremental gzip compressor. Nothing holds more than
+one slice of rows, so memory stays flat however many rows are exported. The product
+format matches what ``ingestion`` imports, so an export can be loaded back
+with ``bulk_upload``.
+"""
+import csv
+import io
+import json
+import zlib
+
+from django.conf import settings
+from django.db.models import Prefetch, Q
+from django.http import StreamingHttpResponse
+
+from .models import OrderItem
+
+CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson'}
+# Rendered output is flushed to the client in pieces of about this size.
+BUFFER_SIZE = 64 * 1024
+
+PRODUCT_FIELDS = [
+    'id', 'name', 'slug', 'description', 'price', 'category', 'stock', 'is_available',
+    'created_at', 'updated_at',
+]
+ORDER_FIELDS = [
+    'id', 'order_number', 'customer', 'status', 'total_amount', 'shipping_address', 'shipping_city',
+    'shipping_country', 'shipping_postal_code', 'notes', 'created_at', 'updated_at',
+]
+ITEM_FIELDS = ['product', 'product_slug', 'quantity', 'price']
+
+
+def filter_orders(queryset, start=None, end=None, statuses=None):
+    """Orders created between ``start`` and ``end`` (inclusive dates) in ``statuses``."""
+    if start is not None:
+        queryset = queryset.filter(created_at__date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(created_at__date__lte=end)
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    return queryset
+
+
+def filter_products(queryset, start=None, end=None, available=None, category=None):
+    """Products updated between ``start`` and ``end``, for incremental syncs."""
+    if start is not None:
+        queryset = queryset.filter(updated_at__date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(updated_at__date__lte=end)
+    if available is not None:
+        queryset = queryset.filter(is_available=available)
+    if category is not None:
+        queryset = queryset.in_subtree(category)
+    return queryset
+
+
+def keyset_slices(queryset, fields):
+    """``queryset`` ordered by ``fields``, as lists of ``EXPORT_CHUNK_SIZE`` rows.
+
+    ``fields`` must end in ``id`` so the order is total. Rows may be model
+    instances or ``values()`` dicts.
+    """
+    size = settings.EXPORT_CHUNK_SIZE
+    queryset = queryset.order_by(*fields)
+    page = queryset
+    while True:
+        rows = list(page[:size])
+        if rows:
+            yield rows
+        if len(rows) < size:
+            return
+        last = rows[-1]
+        page = queryset.filter(_after(fields, [
+            last[field] if isinstance(last, dict) else getattr(last, field) for field in fields
+        ]))
+
+
+def _after(fields, values):
+    """Rows sorting after ``values`` on ``fields``: ``(a, b) > (x, y)`` spelled out."""
+    condition = Q(**{f'{fields[-1]}__gt': values[-1]})
+    for field, value in zip(reversed(fields[:-1]), reversed(values[:-1])):
+        condition = Q(**{f'{field}__gt': value}) | Q(**{field: value}) & condition
+    return condition
+
+
+def product_rows(queryset):
+    rows = queryset.values(
+        'id', 'name', 'slug', 'description', 'price', 'category__slug', 'stock', 'is_available',
+        'created_at', 'updated_at',
+    )
+    for chunk in keyset_slices(rows, ['id']):
+        for row in chunk:
+            row['category'] = row.pop('category__slug')
+            yield row
+
+
+def order_rows(queryset):
+    """Orders with their ``items`` nested, oldest first; a prefetch runs once per slice."""
+    orders = queryset.select_related('customer__user').prefetch_related(
+        Prefetch('items', queryset=OrderItem.objects.select_related('product').order_by('id'))
+    )
+    for chunk in keyset_slices(orders, ['created_at', 'id']):
+        for order in chunk:
+            row = {field: getattr(order, field) for field in ORDER_FIELDS if field != 'customer'}
+            row['customer'] = order.customer.user.username
+            row['items'] = [
+                {'product': item.product_id, 'product_slug': item.product.slug,
+                 'quantity': item.quantity, 'price': item.price}
+                for item in order.items.all()
+            ]
+            yield row
+
+
+def render_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, default=str, separators=(',', ':')) + '\n'
+
+
+def render_csv(rows, fields, nested=None, nested_fields=()):
+    """One CSV line per row; with ``nested``, one line per nested item instead."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def drain():
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    writer.writerow(list(fields) + [f'item_{field}' for field in nested_fields])
+    yield drain()
+    for row in rows:
+        base = [row[field] for field in fields]
+        children = row[nested] if nested else None
+        if not children:
+            writer.writerow(base + [''] * len(nested_fields))
+        else:
+            for child in children:
+                writer.writerow(base + [child[field] for field in nested_fields])
+        yield drain()
+
+
+def buffered(pieces, size=BUFFER_SIZE):
+    """Join small string pieces into encoded chunks of roughly ``size`` bytes."""
+    parts, length = [], 0
+    for piece in pieces:
+        parts.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield ''.join(parts).encode()
+            parts, length = [], 0
+    if parts:
+        yield ''.join(parts).encode()
+
+
+def gzipped(chunks):
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_orders(queryset, file_format='csv', compress=False):
+    rows = order_rows(queryset)
+    if file_format == 'ndjson':
+        pieces = render_ndjson(rows)
+    else:
+        pieces = render_csv(rows, ORDER_FIELDS, nested='items', nested_fields=ITEM_FIELDS)
+    return streaming_response(pieces, 'orders', file_format, compress)
+
+
+def export_products(queryset, file_format='csv', compress=False):
+    rows = product_rows(queryset)
+    pieces = render_ndjson(rows) if file_format == 'ndjson' else render_csv(rows, PRODUCT_FIELDS)
+    return streaming_response(pieces, 'products', file_format, compress)
+
+
+def streaming_response(pieces, name, file_format, compress):
+    chunks = buffered(pieces)
+    filename = f'{name}.{file_format}'
+    if compress:
+        chunks = gzipped(chunks)
+        filename += '.gz'
+    response = StreamingHttpResponse(
+        chunks, content_type='application/gzip' if compress else CONTENT_TYPES[file_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
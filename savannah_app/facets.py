@@ -0,0 +1,89 @@
+# savannah_app/facets.py
+"""Facet counts for product listings.
+
+Each facet is one grouped or conditional aggregate, so a facet response
+costs the same handful of queries whatever the catalogue size. Facets are
+disjunctive: the counts for a dimension ignore that dimension's own
+filter, so picking a price bucket still shows how many products the
+other buckets hold.
+"""
+from django.db.models import Count, Q
+
+from .filters import IN_STOCK
+from .models import Category
+
+PRICE_BUCKETS = (0, 25, 50, 100, 250, 500, 1000)
+
+# Filter parameters each facet ignores.
+FACET_PARAMS = {
+    'category': ('category',),
+    'price': ('min_price', 'max_price'),
+    'availability': ('in_stock', 'available'),
+}
+
+
+def category_facet(queryset):
+    """Matching products per category, rolled up through every ancestor.
+
+    Returns categories with at least one match, in tree order.
+    """
+    direct = dict(queryset.order_by().values_list('category_id').annotate(count=Count('id')))
+    if not direct:
+        return []
+    nodes = {
+        row['id']: row
+        for row in Category.objects.tree_rows('id', 'name', 'slug', 'parent_id', 'level')
+    }
+    counts = {}
+    for category_id, count in direct.items():
+        node = nodes.get(category_id)
+        while node is not None:
+            counts[node['id']] = counts.get(node['id'], 0) + count
+            node = nodes.get(node['parent_id'])
+    return [
+        {'id': pk, 'name': row['name'], 'slug': row['slug'], 'parent': row['parent_id'],
+         'level': row['level'], 'count': counts[pk]}
+        for pk, row in nodes.items() if pk in counts
+    ]
+
+
+def price_buckets():
+    bounds = list(PRICE_BUCKETS) + [None]
+    return list(zip(bounds, bounds[1:]))
+
+
+def price_facet(queryset):
+    buckets = price_buckets()
+    counts = queryset.order_by().aggregate(**{
+        f'bucket_{i}': Count('id', filter=Q(price__gte=low) & (Q(price__lt=high) if high is not None else Q()))
+        for i, (low, high) in enumerate(buckets)
+    })
+    return [
+        {'min': low, 'max': high, 'count': counts[f'bucket_{i}']}
+        for i, (low, high) in enumerate(buckets)
+    ]
+
+
+def availability_facet(queryset):
+    return queryset.order_by().aggregate(
+        in_stock=Count('id', filter=IN_STOCK),
+        out_of_stock=Count('id', filter=~IN_STOCK),
+    )
+
+
+FACETS = {
+    'category': category_facet,
+    'price': price_facet,
+    'availability': availability_facet,
+}
+
+
+def product_facets(filterset_class, params, queryset, request=None):
+    """Facet counts for ``queryset`` under the filters in ``params``."""
+    facets = {}
+    for name, compute in FACETS.items():
+        data = params.copy()
+        for param in FACET_PARAMS[name]:
+            data.pop(param, None)
+        facets[name] = compute(filterset_class(data, queryset=queryset, request=request).qs)
+    return facets
@@ -0,0 +1,26 @@
+# savannah_app/filters.py
+from django.db.models import Q
+from django_filters import rest_framework as filters
+
+from .models import Category, Product
+
+IN_STOCK = Q(is_available=True, stock__gt=0)
+
+
+class ProductFilter(filters.FilterSet):
+    """Product list filters; ``category`` matches the whole subtree."""
+    category = filters.ModelChoiceFilter(queryset=Category.objects.all(), method='filter_category')
+    min_price = filters.NumberFilter(field_name='price', lookup_expr='gte')
+    max_price = filters.NumberFilter(field_name='price', lookup_expr='lte')
+    available = filters.BooleanFilter(field_name='is_available')
+    in_stock = filters.BooleanFilter(method='filter_in_stock')
+
+    class Meta:
+        model = Product
+        fields = []
+
+    def filter_category(self, queryset, name, value):
+        return queryset.in_subtree(value)
+
+    def filter_in_stock(self, queryset, name, value):
+        return queryset.filter(IN_STOCK) if value else queryset.exclude(IN_STOCK)
@@ -1,22 +1,77 @@
+import copy
+import math
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.http import JsonResponse
-from django.db import connections
-from django.db.utils import OperationalError
+from django.db import DatabaseError, connections
+from django.db.utils import load_backend
+
+from . import replicas
+
+# Seconds a probe waits for the database before reporting it unhealthy.
+HEALTH_CHECK_TIMEOUT = 3
+
 
-def health_check(request):
-    # Check database connection
+def check_connection(alias='default'):
+    """A fresh connection to ``alias`` that gives up connecting after ``HEALTH_CHECK_TIMEOUT``.
+
+    Probes never borrow the request threads' connections, so a check that
+    hangs cannot leave one of those stuck mid-query either.
+    """
+    settings_dict = copy.deepcopy(connections[alias].settings_dict)
+    options = settings_dict['OPTIONS']
+    if settings_dict['ENGINE'] == 'django.db.backends.sqlite3':
+        options['timeout'] = HEALTH_CHECK_TIMEOUT
+    elif settings_dict['ENGINE'] == 'django.db.backends.postgresql':
+        options['connect_timeout'] = math.ceil(HEALTH_CHECK_TIMEOUT)
+    return load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, alias)
+
+
+def check_database(alias='default'):
+    connection = check_connection(alias)
     try:
-        db_conn = connections['default']
-        db_conn.cursor()
-        db_status = "healthy"
-    except OperationalError:
-        db_status = "unhealthy"
-    
+        connection.set_autocommit(False)
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # LOCAL, so it ends with the transaction, also behind PgBouncer.
+                cursor.execute('SET LOCAL statement_timeout = %s', [int(HEALTH_CHECK_TIMEOUT * 1000)])
+            cursor.execute('SELECT 1')
+        return "healthy"
+    except DatabaseError:
+        return "unhealthy"
+    finally:
+        connection.close()
+
+
+def check_replicas():
+    """``{alias: status}``; replicas only degrade reads, which fall back to the primary."""
+    statuses = {}
+    for alias in settings.DATABASE_REPLICAS:
+        lag = replicas.replica_lag(alias)
+        if lag is None:
+            statuses[alias] = "unreachable"
+        else:
+            statuses[alias] = "healthy" if lag <= settings.DATABASE_REPLICA_MAX_LAG else "lagging"
+    return statuses
+
+
+def run_checks():
+    return check_database(), check_replicas()
+
+
+async def health_check(request):
+    # The check connection's own timeouts bound how long its thread waits.
+    db_status, replica_statuses = await sync_to_async(run_checks)()
+
     # Overall status is healthy only if all checks pass
     status_code = 200 if db_status == "healthy" else 503
-    
+
     response_data = {
         "status": "healthy" if status_code == 200 else "unhealthy",
         "database": db_status,
     }
-    
-    return JsonResponse(response_data, status=status_code)
\ No newline at end of file
+    if replica_statuses:
+        response_data["replicas"] = replica_statuses
+
+    return JsonResponse(response_data, status=status_code)
@@ -0,0 +1,165 @@
+# savannah_app/ingestion.py
+"""Streaming CSV/NDJSON product import.
+
+Rows are read lazily from the upload, validated one chunk at a time and
+upserted by ``slug`` with a single ``INSERT ... ON CONFLICT`` per chunk, so
+memory stays flat no matter how large the file is. Invalid rows are
+reported back without aborting the rest of the import.
+"""
+import codecs
+import csv
+import json
+import time
+from itertools import islice
+
+from django.db import transaction
+from rest_framework import serializers
+
+from . import caching, rollups
+from .models import Category, Product
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+# Past this many touched categories a full rebuild is cheaper than
+# refreshing each ancestor path.
+ROLLUP_REBUILD_THRESHOLD = 200
+
+UPSERT_FIELDS = ['name', 'description', 'price', 'category', 'stock', 'is_available', 'updated_at']
+
+
+class ProductImportSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=200)
+    slug = serializers.SlugField(max_length=50)
+    description = serializers.CharField(allow_blank=True, default='')
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    category = serializers.SlugField(max_length=50)
+    stock = serializers.IntegerField(min_value=0, default=0)
+    is_available = serializers.BooleanField(default=True)
+
+
+class CategoryCache:
+    """Slug -> id lookup that fetches unknown slugs in one query per batch."""
+
+    def __init__(self):
+        self._ids = {}
+
+    def load(self, slugs):
+        missing = {slug for slug in slugs if slug not in self._ids}
+        if missing:
+            found = dict(Category.objects.filter(slug__in=missing).values_list('slug', 'id'))
+            for slug in missing:
+                self._ids[slug] = found.get(slug)
+
+    def get(self, slug):
+        return self._ids.get(slug)
+
+
+def detect_format(upload, declared=None):
+    name = (declared or getattr(upload, 'name', '') or '').lower()
+    if name.endswith(('ndjson', 'jsonl')):
+        return 'ndjson'
+    if name.endswith('csv'):
+        return 'csv'
+    return None
+
+
+def iter_rows(upload, file_format):
+    """Yield ``(row_number, row_or_None, error_or_None)`` from an upload."""
+    lines = codecs.iterdecode(upload, 'utf-8-sig')
+    if file_format == 'csv':
+        for number, row in enumerate(csv.DictReader(lines), start=1):
+            yield number, {k: v for k, v in row.items() if k and v not in ('', None)}, None
+        return
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, None, {'non_field_errors': [f'Invalid JSON: {exc}']}
+            continue
+        if not isinstance(row, dict):
+            yield number, None, {'non_field_errors': ['Expected a JSON object']}
+            continue
+        yield number, row, None
+
+
+def import_products(upload, file_format, chunk_size=CHUNK_SIZE):
+    """Upsert every valid row of ``upload``; return a summary report."""
+    started = time.perf_counter()
+    categories = CategoryCache()
+    validator = ProductImportSerializer()
+    report = {'processed': 0, 'created': 0, 'updated': 0, 'failed': 0, 'errors': []}
+    touched_categories = set()
+
+    rows = iter_rows(upload, file_format)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        categories.load(str(row['category']) for _, row, _ in chunk if row and row.get('category') is not None)
+
+        products = {}
+        for number, row, error in chunk:
+            report['processed'] += 1
+            if error is None:
+                try:
+                    data = validator.run_validation(row)
+                except serializers.ValidationError as exc:
+                    error = exc.detail
+                else:
+                    category_id = categories.get(data['category'])
+                    if category_id is None:
+                        error = {'category': [f"Unknown category slug '{data['category']}'"]}
+            if error is not None:
+                _record_error(report, number, error)
+                continue
+            data['category_id'] = category_id
+            del data['category']
+            # A slug repeated within a chunk can only be upserted once; last row wins.
+            products[data['slug']] = Product(**data)
+
+        if products:
+            categories_written, products_updated = _upsert(products, report)
+            touched_categories |= categories_written
+            # Retire this chunk's responses now rather than remembering every
+            # id in the file until the end.
+            caching.invalidate_products(products_updated, categories_written)
+
+    if touched_categories:
+        if len(touched_categories) > ROLLUP_REBUILD_THRESHOLD:
+            rollups.rebuild_rollups()
+        else:
+            rollups.refresh_category_paths(touched_categories)
+
+    elapsed = time.perf_counter() - started
+    report['seconds'] = round(elapsed, 3)
+    report['rows_per_second'] = round(report['processed'] / elapsed) if elapsed else report['processed']
+    return report
+
+
+@transaction.atomic
+def _upsert(products, report):
+    existing = {
+        slug: (pk, category_id)
+        for slug, pk, category_id in Product.objects.filter(slug__in=list(products)).values_list(
+            'slug', 'pk', 'category_id'
+        )
+    }
+    Product.objects.bulk_create(
+        list(products.values()),
+        update_conflicts=True,
+        unique_fields=['slug'],
+        update_fields=UPSERT_FIELDS,
+    )
+    report['updated'] += len(existing)
+    report['created'] += len(products) - len(existing)
+    categories = {category_id for _, category_id in existing.values()}
+    categories |= {product.category_id for product in products.values()}
+    return categories, {pk for pk, _ in existing.values()}
+
+
+def _record_error(report, row_number, detail):
+    report['failed'] += 1
+    if len(report['errors']) < MAX_REPORTED_ERRORS:
+        report['errors'].append({'row': row_number, 'errors': detail})
@@ -0,0 +1,102 @@
+# savannah_app/inventory.py
+"""Stock reservation for orders.
+
+Reserving decrements every product of an order in one conditional
+``UPDATE``: a row only changes if it still has enough stock, so concurrent
+buyers can never take the count below zero and nobody reads stock before
+writing it. The rows to update are selected ``ORDER BY id FOR UPDATE``
+first, so two orders that share products always lock them in the same
+order and cannot deadlock. Releasing (cancellation, shrinking an order)
+is the same statement with the sign flipped.
+"""
+from collections import Counter
+
+from django.db.models import Case, F, Subquery, Value, When
+from django.db.models.functions import Now
+
+from . import caching, rollups
+from .models import OrderItem, Product
+
+
+# Orders in these states hold no stock.
+RELEASED_STATUSES = ('cancelled',)
+
+
+class InsufficientStock(Exception):
+    """Raised when a reservation can't be met in full."""
+
+    def __init__(self, shortages):
+        super().__init__(shortages)
+        # {product_id: units still in stock}
+        self.shortages = shortages
+
+
+def order_quantities(order):
+    """``{product_id: quantity}`` over every line of ``order``."""
+    quantities = Counter()
+    for product_id, quantity in OrderItem.objects.filter(order=order).values_list('product_id', 'quantity'):
+        quantities[product_id] += quantity
+    return quantities
+
+
+def held_quantities(order):
+    """What ``order`` should currently have reserved."""
+    if order.status in RELEASED_STATUSES:
+        return Counter()
+    return order_quantities(order)
+
+
+def rebalance(order, before):
+    """Reserve or release the difference between ``before`` and what ``order`` holds now."""
+    after = held_quantities(order)
+    release(before - after)
+    reserve(after - before)
+
+
+def reserve(quantities):
+    """Take ``{product_id: quantity}`` out of stock, all or nothing.
+
+    Must run inside a transaction: on a shortage the statement has already
+    decremented the rows that could be met, and the caller's rollback undoes
+    them when ``InsufficientStock`` propagates.
+    """
+    quantities = {pk: n for pk, n in quantities.items() if n > 0}
+    if not quantities:
+        return
+    updated = _shift(quantities, -1, Product.objects.filter(is_available=True))
+    if updated != len(quantities):
+        available = dict(
+            Product.objects.filter(pk__in=quantities, is_available=True).values_list('pk', 'stock')
+        )
+        raise InsufficientStock({
+            pk: available.get(pk, 0) for pk, n in quantities.items() if available.get(pk, 0) < n
+        })
+    _after_change(quantities, -1)
+
+
+def release(quantities):
+    """Return ``{product_id: quantity}`` to stock."""
+    quantities = {pk: n for pk, n in quantities.items() if n > 0}
+    if quantities:
+        _shift(quantities, 1, Product.objects.all())
+        _after_change(quantities, 1)
+
+
+def _shift(quantities, sign, queryset):
+    ids = sorted(quantities)
+    amount = Case(*(When(pk=pk, then=Value(quantities[pk])) for pk in ids))
+    locked = Product.objects.filter(pk__in=ids).order_by('pk').select_for_update().values('pk')
+    rows = queryset.filter(pk__in=Subquery(locked))
+    if sign < 0:
+        rows = rows.filter(stock__gte=amount)
+    return rows.update(stock=F('stock') + sign * amount, updated_at=Now())
+
+
+def _after_change(quantities, sign):
+    # UPDATE bypasses Product.save(), so keep rollups and the response cache in step.
+    categories = dict(Product.objects.filter(pk__in=quantities).values_list('pk', 'category_id'))
+    deltas = Counter()
+    for pk, n in quantities.items():
+        deltas[categories[pk]] += sign * n
+    rollups.adjust_stock(deltas)
+    caching.invalidate_products(quantities, deltas)
@@ -0,0 +1,122 @@
+# savannah_app/management/commands/_benchmark.py
+"""Shared helpers for the ``bench_*`` management commands."""
+import random
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from savannah_app.models import Category, Product
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rollback():
+    """Run benchmark fixtures inside a transaction that is always discarded."""
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def measure(fn, repeat=20):
+    """Return (median seconds, queries per call) for ``fn``."""
+    with CaptureQueriesContext(connection) as ctx:
+        fn()
+    queries = len(ctx.captured_queries)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2], queries
+
+
+def build_category_tree(depth, fanout, products_per_node=1, prefix='bench'):
+    """Bulk-create a complete ``fanout``-ary tree of ``depth`` levels.
+
+    MPTT columns are computed up front so no per-node tree updates run.
+    Returns the root category.
+    """
+    tree_id = (Category.objects.order_by('-tree_id').values_list('tree_id', flat=True).first() or 0) + 1
+    nodes = []
+    counter = [0, 0]
+
+    def visit(level, parent_index):
+        index = len(nodes)
+        counter[0] += 1
+        lft = counter[0]
+        node = Category(
+            name=f'{prefix}-{index}', slug=f'{prefix}-{tree_id}-{index}',
+            tree_id=tree_id, level=level, lft=lft, rght=0,
+        )
+        nodes.append((node, parent_index))
+        if level + 1 < depth:
+            for _ in range(fanout):
+                visit(level + 1, index)
+        counter[0] += 1
+        node.rght = counter[0]
+
+    visit(0, None)
+    # Parents need primary keys before their children can reference them,
+    # so insert one level at a time.
+    with Category.objects.disable_mptt_updates():
+        for level in range(depth):
+            batch = []
+            for node, parent_index in nodes:
+                if node.level == level:
+                    if parent_index is not None:
+                        node.parent_id = nodes[parent_index][0].pk
+                    batch.append(node)
+            Category.objects.bulk_create(batch, batch_size=1000)
+
+    products = []
+    for node, _ in nodes:
+        for i in range(products_per_node):
+            counter[1] += 1
+            products.append(Product(
+                name=f'{node.name}-p{i}', slug=f'{node.slug}-p{i}',
+                description='', price=Decimal(counter[1] % 500) + Decimal('0.99'),
+                category=node, stock=counter[1] % 50,
+            ))
+    Product.objects.bulk_create(products, batch_size=1000)
+    return nodes[0][0]
+
+
+ADJECTIVES = (
+    'organic fresh classic premium rugged compact wireless portable leather cotton woollen waterproof '
+    'lightweight stainless ceramic bamboo vintage smart solar electric handmade insulated folding'
+).split()
+NOUNS = (
+    'kettle shoe jacket lantern backpack blender speaker charger blanket mug sandal tent stove '
+    'headphones bottle table chair lamp knife pan basket scarf watch radio torch umbrella'
+).split()
+FILLER = (
+    'durable everyday design quality comfortable easy clean travel home office outdoor gift family '
+    'battery warranty size colour material made local market kenya nairobi'
+).split()
+
+
+def generate_products(categories, count, seed=7, batch_size=10000):
+    """Bulk-create ``count`` products with word-salad names spread over ``categories``."""
+    rng = random.Random(seed)
+    for start in range(0, count, batch_size):
+        products = []
+        for i in range(start, min(start + batch_size, count)):
+            name = f'{rng.choice(ADJECTIVES).title()} {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}'
+            products.append(Product(
+                name=name, slug=f'generated-{i}',
+                description=' '.join(rng.choices(FILLER + NOUNS, k=12)),
+                price=Decimal(rng.randint(100, 160000)) / 100,
+                category=rng.choice(categories), stock=rng.randint(0, 50),
+                is_available=rng.random() > 0.1,
+            ))
+        Product.objects.bulk_create(products)
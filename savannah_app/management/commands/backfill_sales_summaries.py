@@ -0,0 +1,18 @@
+# savannah_app/management/commands/backfill_sales_summaries.py
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from savannah_app.analytics import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the daily sales summaries from the order tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='First day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day to rebuild (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        count = rebuild_summaries(options['start'], options['end'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} sales summary rows'))
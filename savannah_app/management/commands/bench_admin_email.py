@@ -0,0 +1,67 @@
+# savannah_app/management/commands/bench_admin_email.py
+import time
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from savannah_app.notifications import flush_admin_email_digest, queue_admin_email
+from savannah_app.utils import send_admin_email
+from ._benchmark import rollback
+
+
+class HandshakeEmailBackend(EmailBackend):
+    """locmem backend that pays a simulated TLS handshake per connection."""
+    handshake = 0.0
+    connections = 0
+
+    def send_messages(self, messages):
+        HandshakeEmailBackend.connections += 1
+        time.sleep(self.handshake)
+        return super().send_messages(messages)
+
+
+class Command(BaseCommand):
+    help = 'Compares per-event admin emails with digest delivery'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=2000)
+        parser.add_argument('--handshake', type=float, default=0.05, help='Simulated SMTP/TLS setup (s)')
+        parser.add_argument('--digest-size', type=int, default=50)
+
+    def handle(self, *args, **options):
+        HandshakeEmailBackend.handshake = options['handshake']
+        backend = f'{__name__}.HandshakeEmailBackend'
+        events = [(f'Order #{i} - Shipped', f'Order {i} has been shipped') for i in range(options['events'])]
+
+        with override_settings(EMAIL_BACKEND=backend):
+            mail.outbox = []
+            HandshakeEmailBackend.connections = 0
+            start = time.perf_counter()
+            for subject, body in events:
+                send_admin_email(subject, body)
+            per_event = time.perf_counter() - start
+            per_event_connections = HandshakeEmailBackend.connections
+
+        with override_settings(EMAIL_BACKEND=backend, ADMIN_EMAIL_DIGEST=True,
+                               ADMIN_EMAIL_DIGEST_SIZE=options['digest_size']), rollback():
+            mail.outbox = []
+            HandshakeEmailBackend.connections = 0
+            start = time.perf_counter()
+            for subject, body in events:
+                queue_admin_email(subject, body, status='shipped')
+            flush_admin_email_digest(force=True)
+            digest = time.perf_counter() - start
+            digest_connections = HandshakeEmailBackend.connections
+            digest_emails = len(mail.outbox)
+
+        self.stdout.write(f"{options['events']} order events")
+        self.stdout.write(
+            f'  per-event: {per_event:7.2f}s, {per_event_connections} connections, '
+            f"{options['events'] / per_event:.0f} events/s"
+        )
+        self.stdout.write(
+            f'  digest:    {digest:7.2f}s, {digest_connections} connections, {digest_emails} emails, '
+            f"{options['events'] / digest:.0f} events/s"
+        )
@@ -0,0 +1,94 @@
+# savannah_app/management/commands/bench_catalogue_cache.py
+import random
+import time
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from savannah_app.models import Category, Product
+from savannah_app.views import ProductViewSet
+from ._benchmark import build_category_tree, rollback
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class Command(BaseCommand):
+    help = 'Measures catalogue hit ratio and latency with and without the response cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--write-ratio', type=float, default=0.01, help='Share of requests that update a product')
+        parser.add_argument('--depth', type=int, default=3)
+        parser.add_argument('--fanout', type=int, default=5)
+        parser.add_argument('--products-per-node', type=int, default=20)
+        parser.add_argument('--redis', action='store_true', help='Use the configured cache instead of locmem')
+
+    def handle(self, *args, **options):
+        caches_setting = {} if options['redis'] else {'CACHES': LOCMEM}
+        factory = APIRequestFactory()
+        views = {
+            'list': ProductViewSet.as_view({'get': 'list'}),
+            'retrieve': ProductViewSet.as_view({'get': 'retrieve'}),
+            'by_category': ProductViewSet.as_view({'get': 'by_category'}),
+        }
+
+        with rollback():
+            user = User.objects.create(username='bench-cache', is_staff=True)
+            build_category_tree(options['depth'], options['fanout'], options['products_per_node'])
+            product_ids = list(Product.objects.values_list('pk', flat=True))
+            category_ids = list(Category.objects.values_list('pk', flat=True))
+            pages = max(1, len(product_ids) // 10)
+
+            rng = random.Random(42)
+            # Skewed popularity: a few products, categories and pages get most traffic.
+            workload = []
+            for _ in range(options['requests']):
+                if rng.random() < options['write_ratio']:
+                    workload.append(('write', rng.choice(product_ids)))
+                    continue
+                kind = rng.choice(['list', 'retrieve', 'retrieve', 'by_category'])
+                if kind == 'list':
+                    workload.append((kind, {'page': min(pages, int(rng.paretovariate(1.2)))}))
+                elif kind == 'retrieve':
+                    workload.append((kind, product_ids[min(len(product_ids) - 1, int(rng.paretovariate(1.2)) - 1)]))
+                else:
+                    workload.append((kind, {'category_id': category_ids[
+                        min(len(category_ids) - 1, int(rng.paretovariate(1.2)) - 1)]}))
+
+            def replay():
+                timings, states = [], Counter()
+                for kind, arg in workload:
+                    if kind == 'write':
+                        Product.objects.filter(pk=arg).first().save()
+                        continue
+                    if kind == 'retrieve':
+                        request, kwargs = factory.get(f'/products/{arg}/'), {'pk': arg}
+                    else:
+                        request, kwargs = factory.get('/products/', arg), {}
+                    force_authenticate(request, user=user)
+                    start = time.perf_counter()
+                    response = views[kind](request, **kwargs)
+                    timings.append(time.perf_counter() - start)
+                    states[response.get('X-Cache', 'OFF')] += 1
+                return sorted(timings), states
+
+            with override_settings(CATALOGUE_CACHE_ENABLED=False):
+                uncached = replay()
+            with override_settings(CATALOGUE_CACHE_ENABLED=True, **caches_setting):
+                caches['default'].clear()
+                cached = replay()
+
+        reads = len(uncached[0])
+        self.stdout.write(f"{reads} reads, {options['requests'] - reads} writes over {len(product_ids)} products")
+        for label, (timings, states) in (('no cache', uncached), ('cache', cached)):
+            p50 = timings[len(timings) // 2] * 1000
+            p95 = timings[int(len(timings) * 0.95)] * 1000
+            hits = states['HIT'] + states['STALE']
+            self.stdout.write(
+                f'  {label:<9} p50 {p50:7.2f} ms  p95 {p95:7.2f} ms  '
+                f'mean {sum(timings) / len(timings) * 1000:7.2f} ms  hit ratio {hits / len(timings):.0%}'
+            )
@@ -0,0 +1,39 @@
+# savannah_app/management/commands/bench_category_stats.py
+from django.core.management.base import BaseCommand
+from django.db.models import Avg
+
+from savannah_app.models import Category
+from ._benchmark import build_category_tree, measure, rollback
+
+
+def legacy_average(category):
+    """The old per-descendant running mean, kept for comparison."""
+    average = category.products.aggregate(avg_price=Avg('price'))['avg_price']
+    for child in category.get_descendants():
+        child_avg = child.products.aggregate(avg_price=Avg('price'))['avg_price']
+        if child_avg is not None:
+            average = child_avg if average is None else (average + child_avg) / 2
+    return average
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks subtree price aggregation as category trees grow'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fanout', type=int, default=3)
+        parser.add_argument('--max-depth', type=int, default=6)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'depth':>5} {'nodes':>7} {'subtree ms':>11} {'queries':>8} {'legacy ms':>10} {'queries':>8}")
+        for depth in range(1, options['max_depth'] + 1):
+            with rollback():
+                root = build_category_tree(depth, options['fanout'])
+                nodes = Category.objects.filter(tree_id=root.tree_id).count()
+                fast, fast_queries = measure(
+                    lambda: Category.objects.subtree_price_stats(root), options['repeat'])
+                slow, slow_queries = measure(lambda: legacy_average(root), max(1, options['repeat'] // 4))
+            self.stdout.write(
+                f'{depth:>5} {nodes:>7} {fast * 1000:>11.2f} {fast_queries:>8} '
+                f'{slow * 1000:>10.2f} {slow_queries:>8}'
+            )
@@ -0,0 +1,44 @@
+# savannah_app/management/commands/bench_exports.py
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from savannah_app.exports import export_products
+from savannah_app.models import Category, Product
+from ._benchmark import build_category_tree, generate_products, rollback
+
+
+class Command(BaseCommand):
+    help = 'Streams a large product export and reports throughput and peak Python memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, nargs='+', default=[100000, 1000000])
+        parser.add_argument(
+            '--no-trace', action='store_true', help='Skip memory tracing, which slows the export down'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'on {connection.vendor}')
+        self.stdout.write(f"{'rows':>9} {'format':>12} {'seconds':>8} {'rows/s':>9} {'MB out':>8} {'peak MB':>8}")
+        for count in options['products']:
+            with rollback():
+                root = build_category_tree(2, 8, products_per_node=0)
+                generate_products(list(Category.objects.filter(tree_id=root.tree_id, level=1)), count)
+                for file_format, compress in (('csv', False), ('ndjson', False), ('ndjson', True)):
+                    response = export_products(Product.objects.all(), file_format, compress)
+                    size = 0
+                    if not options['no_trace']:
+                        tracemalloc.start()
+                    start = time.perf_counter()
+                    for chunk in response.streaming_content:
+                        size += len(chunk)
+                    elapsed = time.perf_counter() - start
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    label = file_format + (' + gzip' if compress else '')
+                    self.stdout.write(
+                        f'{count:>9} {label:>12} {elapsed:>8.1f} {count / elapsed:>9.0f} '
+                        f'{size / 2 ** 20:>8.1f} {peak / 2 ** 20:>8.1f}'
+                    )
@@ -0,0 +1,94 @@
+# savannah_app/management/commands/bench_order_history.py
+from datetime import timedelta
+from decimal import Decimal
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.pagination import Cursor, PageNumberPagination
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from savannah_app.models import Customer, Order, OrderItem
+from savannah_app.pagination import OrderCursorPagination
+from savannah_app.views import OrderViewSet
+from ._benchmark import build_category_tree, measure, rollback
+
+
+class Command(BaseCommand):
+    help = 'Measures order history latency and queries per page at shallow and deep pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=100000)
+        parser.add_argument('--items', type=int, default=3)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        history = OrderViewSet.as_view({'get': 'history'})
+        page_size = 10
+
+        with rollback():
+            user = User.objects.create(username='bench-history', is_staff=True)
+            customer = Customer.objects.create(
+                user=user, phone='0700000000', address='a', city='b', country='c', postal_code='d')
+            products = list(build_category_tree(1, 1, products_per_node=options['items']).products.all())
+            self.populate(customer, products, options['orders'], options['items'])
+
+            deep_page = options['orders'] // page_size
+            deep_cursor = self.cursor_for_page(deep_page, page_size)
+
+            def fetch(params):
+                request = factory.get('/orders/history/', params)
+                force_authenticate(request, user=user)
+                return history(request).render()
+
+            rows = [
+                ('cursor, page 1', lambda: fetch({})),
+                (f'cursor, page {deep_page}', lambda: fetch({'cursor': deep_cursor})),
+            ]
+            results = [(label, *measure(fn, options['repeat'])) for label, fn in rows]
+
+            OrderViewSet.pagination_class = PageNumberPagination
+            try:
+                for page in (1, deep_page):
+                    label = f'page number, page {page}'
+                    results.append((label, *measure(lambda: fetch({'page': page}), options['repeat'])))
+            finally:
+                OrderViewSet.pagination_class = OrderCursorPagination
+
+        self.stdout.write(f"{options['orders']} orders x {options['items']} items")
+        for label, seconds, queries in results:
+            self.stdout.write(f'  {label:<28} {seconds * 1000:8.2f} ms {queries:>3} queries')
+
+    def cursor_for_page(self, page, page_size):
+        """Build the cursor a client would hold after paging to ``page``."""
+        paginator = OrderCursorPagination()
+        paginator.base_url = '/orders/history/'
+        position = Order.objects.order_by(*paginator.ordering).values_list(
+            'created_at', flat=True)[(page - 1) * page_size - 1]
+        url = paginator.encode_cursor(Cursor(offset=0, reverse=False, position=str(position)))
+        return parse_qs(urlparse(url).query)['cursor'][0]
+
+    def populate(self, customer, products, count, items):
+        now = timezone.now()
+        batch = 5000
+        for start in range(0, count, batch):
+            orders = Order.objects.bulk_create([
+                Order(
+                    customer=customer, order_number=f'BENCH-{i:08d}', total_amount=Decimal('10.00'),
+                    shipping_address='a', shipping_city='b', shipping_country='c',
+                    shipping_postal_code='d', status='delivered',
+                )
+                for i in range(start, min(start + batch, count))
+            ])
+            # auto_now_add ignores explicit values, so spread timestamps afterwards.
+            for offset, order in enumerate(orders, start=start):
+                order.created_at = now - timedelta(seconds=offset)
+            Order.objects.bulk_update(orders, ['created_at'], batch_size=1000)
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order, product=product, category_id=product.category_id, quantity=1, price=product.price,
+                )
+                for order in orders for product in products
+            ], batch_size=1000)
@@ -0,0 +1,51 @@
+# savannah_app/management/commands/bench_order_pricing.py
+import random
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from savannah_app.models import Customer
+from savannah_app.pricing import PercentageTax, QuantityDiscount, price_items
+from savannah_app.serializers import OrderSerializer
+from ._benchmark import build_category_tree, measure, rollback
+
+
+class Command(BaseCommand):
+    help = 'Measures order pricing throughput for large carts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, nargs='+', default=[10, 100, 1000, 10000])
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        rng = random.Random(7)
+        rules = [QuantityDiscount(min_quantity=5, percent=10), PercentageTax(rate='0.16')]
+        self.stdout.write(
+            f"{'lines':>6} {'pricing ms':>11} {'lines/s':>10} {'validate ms':>12} {'queries':>8}"
+        )
+        for lines in options['lines']:
+            with rollback():
+                user = User.objects.create(username='bench-order-pricing')
+                customer = Customer.objects.create(user=user, phone='0700000000')
+                root = build_category_tree(1, 1, products_per_node=lines)
+                products = list(root.products.all())
+                items = [{'product': p, 'quantity': rng.randint(1, 9)} for p in products]
+                payload = {
+                    'customer': customer.pk,
+                    'shipping_address': 'Bench St',
+                    'shipping_city': 'Nairobi',
+                    'shipping_country': 'Kenya',
+                    'shipping_postal_code': '00100',
+                    'items': [{'product': item['product'].pk, 'quantity': item['quantity']} for item in items],
+                }
+
+                # Pricing alone, over products that are already loaded.
+                pricing, _ = measure(lambda: price_items(items, rules), options['repeat'])
+                # Full validation: one product query, then the same pricing pass.
+                validate, queries = measure(
+                    lambda: OrderSerializer(data=payload).is_valid(raise_exception=True), options['repeat']
+                )
+            self.stdout.write(
+                f'{lines:>6} {pricing * 1000:>11.2f} {lines / pricing:>10.0f} '
+                f'{validate * 1000:>12.2f} {queries:>8}'
+            )
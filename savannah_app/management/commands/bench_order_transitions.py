@@ -0,0 +1,78 @@
+# savannah_app/management/commands/bench_order_transitions.py
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from savannah_app.inventory import held_quantities, rebalance
+from savannah_app.models import Customer, Order, OrderItem, Product
+from savannah_app.order_status import transition_orders
+from savannah_app.tasks import queue_order_notification
+from ._benchmark import build_category_tree, rollback
+
+
+class Command(BaseCommand):
+    help = 'Compares per-order and bulk status transitions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=10000)
+        parser.add_argument('--items', type=int, default=3, help='Lines per order')
+
+    def handle(self, *args, **options):
+        count = options['orders']
+        workloads = {
+            'per order -> processing': lambda ids: self.one_by_one(ids, 'processing'),
+            'bulk -> processing': lambda ids: transition_orders({pk: 'processing' for pk in ids}),
+            'per order -> cancelled': lambda ids: self.one_by_one(ids, 'cancelled'),
+            'bulk -> cancelled': lambda ids: transition_orders({pk: 'cancelled' for pk in ids}),
+        }
+        self.stdout.write(f"{count} orders x {options['items']} items on {connection.vendor}")
+        for label, run in workloads.items():
+            with rollback():
+                ids = self.populate(count, options['items'])
+                queries = []
+                # The query log caps at 9000 entries, so count statements directly.
+                with connection.execute_wrapper(lambda execute, *args: queries.append(1) or execute(*args)):
+                    start = time.perf_counter()
+                    run(ids)
+                    elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'  {label:<24} {elapsed * 1000:9.1f} ms {count / elapsed:9.0f} orders/s {len(queries):>6} queries'
+            )
+
+    def one_by_one(self, ids, new_status):
+        """What update_status costs per order, minus the HTTP round trip."""
+        for pk in ids:
+            with transaction.atomic():
+                order = Order.objects.select_for_update().get(pk=pk)
+                held = held_quantities(order)
+                order.status = new_status
+                order.save()
+                rebalance(order, held)
+            queue_order_notification(order)
+
+    def populate(self, count, items):
+        user = User.objects.create(username='bench-order-transitions')
+        customer = Customer.objects.create(user=user, phone='0700000000')
+        root = build_category_tree(1, 1, products_per_node=0)
+        products = Product.objects.bulk_create([
+            Product(
+                name=f'Transition {i}', slug=f'bench-transition-{i}', description='',
+                price=Decimal('10.00'), category=root, stock=count * items,
+            )
+            for i in range(items)
+        ])
+        orders = Order.objects.bulk_create([
+            Order(
+                customer=customer, order_number=f'BENCH-{i:08d}', total_amount=Decimal('10.00') * items,
+                shipping_address='a', shipping_city='b', shipping_country='c', shipping_postal_code='d',
+            )
+            for i in range(count)
+        ], batch_size=5000)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, category_id=product.category_id, quantity=1, price=product.price)
+            for order in orders for product in products
+        ], batch_size=5000)
+        return [order.pk for order in orders]
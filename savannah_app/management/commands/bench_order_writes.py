@@ -0,0 +1,52 @@
+# savannah_app/management/commands/bench_order_writes.py
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from savannah_app.models import Customer
+from savannah_app.serializers import OrderSerializer
+from ._benchmark import build_category_tree, rollback
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks OrderSerializer create/update at growing line counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, nargs='+', default=[1, 10, 100, 1000])
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'lines':>6} {'create ms':>10} {'queries':>8} {'update ms':>10} {'queries':>8}")
+        for lines in options['lines']:
+            with rollback():
+                user = User.objects.create(username='bench-order-writes')
+                customer = Customer.objects.create(user=user, phone='0700000000')
+                root = build_category_tree(1, 1, products_per_node=lines)
+                products = list(root.products.values_list('pk', 'price'))
+                payload = {
+                    'customer': customer.pk,
+                    'shipping_address': 'Bench St',
+                    'shipping_city': 'Nairobi',
+                    'shipping_country': 'Kenya',
+                    'shipping_postal_code': '00100',
+                    'items': [{'product': pk, 'quantity': 1, 'price': str(price)} for pk, price in products],
+                }
+
+                create_ms, create_queries, order = self.timed(OrderSerializer(data=payload))
+                # Change every other line so the update has real work to diff.
+                for item in payload['items'][::2]:
+                    item['quantity'] = 2
+                update_ms, update_queries, _ = self.timed(OrderSerializer(order, data=payload))
+            self.stdout.write(
+                f'{lines:>6} {create_ms:>10.2f} {create_queries:>8} {update_ms:>10.2f} {update_queries:>8}'
+            )
+
+    def timed(self, serializer):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            serializer.is_valid(raise_exception=True)
+            instance = serializer.save()
+            elapsed = time.perf_counter() - start
+        return elapsed * 1000, len(ctx.captured_queries), instance
@@ -0,0 +1,75 @@
+# savannah_app/management/commands/bench_product_facets.py
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from savannah_app.models import Category
+from savannah_app.views import ProductViewSet
+from ._benchmark import build_category_tree, generate_products, rollback
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class Command(BaseCommand):
+    help = 'Measures facet response latency and query count at catalogue scale'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=200000)
+        parser.add_argument('--requests', type=int, default=100)
+        parser.add_argument('--combinations', type=int, default=20, help='Distinct filter combinations')
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        view = ProductViewSet.as_view({'get': 'facets'})
+        rng = random.Random(3)
+
+        with rollback():
+            user = User.objects.create(username='bench-facets', is_staff=True)
+            root = build_category_tree(3, 8, products_per_node=0)
+            generate_products(list(Category.objects.filter(tree_id=root.tree_id, level=2)), options['products'])
+            branches = list(Category.objects.filter(tree_id=root.tree_id, level__gt=0).values_list('pk', flat=True))
+
+            combinations = []
+            for _ in range(options['combinations']):
+                params = {}
+                if rng.random() < 0.7:
+                    params['category'] = rng.choice(branches)
+                if rng.random() < 0.5:
+                    params['min_price'] = rng.choice((0, 25, 50, 100))
+                    params['max_price'] = rng.choice((250, 500, 1000))
+                if rng.random() < 0.5:
+                    params['in_stock'] = 'true'
+                combinations.append(params)
+            workload = [rng.choice(combinations) for _ in range(options['requests'])]
+
+            def replay():
+                timings, queries = [], 0
+                for params in workload:
+                    request = factory.get('/products/facets/', params)
+                    force_authenticate(request, user=user)
+                    start = time.perf_counter()
+                    with CaptureQueriesContext(connection) as ctx:
+                        view(request).render()
+                    timings.append(time.perf_counter() - start)
+                    queries = max(queries, len(ctx.captured_queries))
+                return sorted(timings), queries
+
+            with override_settings(CATALOGUE_CACHE_ENABLED=False):
+                uncached = replay()
+            with override_settings(CATALOGUE_CACHE_ENABLED=True, CACHES=LOCMEM):
+                cached = replay()
+
+        self.stdout.write(
+            f"{options['products']} products, {options['requests']} requests over "
+            f"{options['combinations']} filter combinations"
+        )
+        for label, (timings, queries) in (('no cache', uncached), ('cache', cached)):
+            self.stdout.write(
+                f'  {label:<9} p50 {timings[len(timings) // 2] * 1000:8.2f} ms  '
+                f'p95 {timings[int(len(timings) * 0.95)] * 1000:8.2f} ms  max {queries} queries'
+            )
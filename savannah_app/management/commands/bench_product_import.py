@@ -0,0 +1,49 @@
+# savannah_app/management/commands/bench_product_import.py
+import json
+import tempfile
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from savannah_app.ingestion import import_products
+from savannah_app.models import Category
+from ._benchmark import build_category_tree, rollback
+
+
+def write_catalogue(handle, rows, file_format, slugs):
+    if file_format == 'csv':
+        handle.write(b'name,slug,description,price,category,stock\n')
+    for i in range(rows):
+        row = {
+            'name': f'Imported {i}', 'slug': f'imported-{i}', 'description': 'Bulk imported product',
+            'price': f'{i % 1000}.99', 'category': slugs[i % len(slugs)], 'stock': i % 100,
+        }
+        if file_format == 'csv':
+            line = ','.join(str(v) for v in row.values()) + '\n'
+        else:
+            line = json.dumps(row) + '\n'
+        handle.write(line.encode())
+    handle.seek(0)
+
+
+class Command(BaseCommand):
+    help = 'Measures streaming product import throughput (rows/sec) and peak memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+        parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'rows':>8} {'seconds':>8} {'rows/sec':>9} {'peak MiB':>9}")
+        for rows in options['rows']:
+            with rollback(), tempfile.TemporaryFile() as handle:
+                root = build_category_tree(3, 5, products_per_node=0)
+                slugs = list(Category.objects.filter(tree_id=root.tree_id).values_list('slug', flat=True))
+                write_catalogue(handle, rows, options['format'], slugs)
+                tracemalloc.start()
+                report = import_products(handle, options['format'])
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            self.stdout.write(
+                f"{rows:>8} {report['seconds']:>8.2f} {report['rows_per_second']:>9} {peak / 2**20:>9.1f}"
+            )
@@ -0,0 +1,61 @@
+# savannah_app/management/commands/bench_product_search.py
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from savannah_app.models import Category
+from savannah_app.search import search_products, suggest_products
+from ._benchmark import ADJECTIVES, NOUNS, build_category_tree, generate_products, rollback
+
+
+class Command(BaseCommand):
+    help = 'Generates a large catalogue and measures search and typeahead latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--page-size', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rng = random.Random(7)
+        with rollback():
+            root = build_category_tree(3, 8, products_per_node=0)
+            categories = list(Category.objects.filter(tree_id=root.tree_id, level=2))
+            started = time.perf_counter()
+            generate_products(categories, options['products'])
+            self.stdout.write(
+                f"{options['products']} products generated in {time.perf_counter() - started:.1f}s "
+                f'on {connection.vendor}'
+            )
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE savannah_app_product')
+
+            branches = list(Category.objects.filter(tree_id=root.tree_id, level=1))
+            workloads = {
+                'search': lambda: list(search_products(
+                    ' '.join(rng.sample(ADJECTIVES + NOUNS, rng.choice((1, 2)))),
+                )[:options['page_size']]),
+                'search + filters': lambda: list(search_products(
+                    rng.choice(NOUNS), category=rng.choice(branches),
+                    min_price=Decimal(rng.randint(1, 50)), max_price=Decimal(rng.randint(100, 500)),
+                    available=True,
+                )[:options['page_size']]),
+                'typeahead': lambda: suggest_products(
+                    rng.choice(ADJECTIVES)[:rng.randint(2, 4)]
+                ),
+            }
+            for label, run in workloads.items():
+                timings = []
+                for _ in range(options['queries']):
+                    start = time.perf_counter()
+                    run()
+                    timings.append(time.perf_counter() - start)
+                timings.sort()
+                self.stdout.write(
+                    f'  {label:<18} p50 {timings[len(timings) // 2] * 1000:7.2f} ms  '
+                    f'p95 {timings[int(len(timings) * 0.95)] * 1000:7.2f} ms'
+                )
@@ -0,0 +1,54 @@
+# savannah_app/management/commands/bench_products_by_category.py
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from savannah_app.models import Category, Product
+from ._benchmark import build_category_tree, measure, rollback
+
+ORDERING = ('-created_at', '-id')
+
+
+def interval_page(category, size):
+    """One join on the MPTT interval, as by_category does."""
+    return list(Product.objects.in_subtree(category).order_by(*ORDERING)[:size])
+
+
+def in_list_page(category, size):
+    """Descendant ids first, then an ``IN (...)`` over all of them."""
+    ids = list(category.get_descendants(include_self=True).values_list('pk', flat=True))
+    return list(Product.objects.filter(category_id__in=ids).order_by(*ORDERING)[:size])
+
+
+class Command(BaseCommand):
+    help = 'Compares subtree product listing by MPTT interval and by IN-list on a large tree'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--depth', type=int, default=5)
+        parser.add_argument('--fanout', type=int, default=10, help='5 levels x fanout 10 = 11,111 nodes')
+        parser.add_argument('--products-per-node', type=int, default=3)
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        size = options['page_size']
+        with rollback():
+            root = build_category_tree(
+                options['depth'], options['fanout'], products_per_node=options['products_per_node']
+            )
+            nodes = Category.objects.filter(tree_id=root.tree_id)
+            self.stdout.write(
+                f'{nodes.count()} categories, {Product.objects.in_subtree(root).count()} products '
+                f'on {connection.vendor}'
+            )
+            self.stdout.write(
+                f"{'level':>5} {'subtree':>8} {'interval ms':>12} {'queries':>8} {'IN-list ms':>11} {'queries':>8}"
+            )
+            for level in range(options['depth'] - 1):
+                node = nodes.filter(level=level).order_by('lft').first()
+                subtree = (node.rght - node.lft + 1) // 2
+                fast, fast_queries = measure(lambda: interval_page(node, size), options['repeat'])
+                slow, slow_queries = measure(lambda: in_list_page(node, size), options['repeat'])
+                self.stdout.write(
+                    f'{level:>5} {subtree:>8} {fast * 1000:>12.2f} {fast_queries:>8} '
+                    f'{slow * 1000:>11.2f} {slow_queries:>8}'
+                )
@@ -0,0 +1,72 @@
+# savannah_app/management/commands/bench_read_path.py
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from savannah_app.models import Customer, Order, OrderItem, Product
+from savannah_app.projections import order_data, product_data, project_orders, project_products
+from savannah_app.renderers import FastJSONRenderer
+from savannah_app.serializers import OrderSerializer, ProductSerializer
+from ._benchmark import build_category_tree, generate_products, measure, rollback
+
+
+class Command(BaseCommand):
+    help = 'Compares rows/sec of the serializer read path with .values() projection and orjson'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per serialized batch')
+        parser.add_argument('--items', type=int, default=3, help='Items per order')
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        count, repeat = options['rows'], options['repeat']
+        with rollback():
+            root = build_category_tree(2, 4, products_per_node=0)
+            generate_products(list(root.get_children()), count)
+            self.populate_orders(count, options['items'])
+
+            products = Product.objects.select_related('category')[:count]
+            orders = Order.objects.select_related('customer__user').prefetch_related(
+                Prefetch('items', queryset=OrderItem.objects.select_related('product').order_by('id'))
+            )[:count]
+            slow, fast = JSONRenderer(), FastJSONRenderer()
+            cases = [
+                ('products', 'ModelSerializer + JSONRenderer',
+                 lambda: slow.render(ProductSerializer(products.all(), many=True).data)),
+                ('products', '.values() + JSONRenderer',
+                 lambda: slow.render(product_data(project_products(products.all())))),
+                ('products', '.values() + FastJSONRenderer',
+                 lambda: fast.render(product_data(project_products(products.all())))),
+                ('orders', 'ModelSerializer + JSONRenderer',
+                 lambda: slow.render(OrderSerializer(orders.all(), many=True).data)),
+                ('orders', '.values() + JSONRenderer',
+                 lambda: slow.render(order_data(project_orders(orders.all())))),
+                ('orders', '.values() + FastJSONRenderer',
+                 lambda: fast.render(order_data(project_orders(orders.all())))),
+            ]
+            self.stdout.write(f"{count} rows per batch, {options['items']} items per order")
+            self.stdout.write(f"{'endpoint':>9} {'path':>31} {'ms':>8} {'queries':>8} {'rows/s':>9}")
+            for endpoint, label, fn in cases:
+                seconds, queries = measure(fn, repeat)
+                self.stdout.write(
+                    f'{endpoint:>9} {label:>31} {seconds * 1000:>8.1f} {queries:>8} {count / seconds:>9.0f}'
+                )
+
+    def populate_orders(self, count, items):
+        user = User.objects.create(username='bench-read-path')
+        customer = Customer.objects.create(user=user, phone='0700000000')
+        products = list(Product.objects.all()[:items])
+        orders = Order.objects.bulk_create([
+            Order(
+                customer=customer, order_number=f'BENCH-{i:08d}', total_amount=Decimal('30.00'),
+                shipping_address='a', shipping_city='b', shipping_country='c', shipping_postal_code='d',
+            )
+            for i in range(count)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, category_id=product.category_id, quantity=1, price=Decimal('10.00'))
+            for order in orders for product in products
+        ], batch_size=5000)
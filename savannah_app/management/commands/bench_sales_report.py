@@ -0,0 +1,83 @@
+# savannah_app/management/commands/bench_sales_report.py
+import random
+import time
+from datetime import date, datetime, time as day_time, timedelta, timezone
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+from savannah_app.analytics import REVENUE_FIELD, rebuild_summaries, sales_report
+from savannah_app.models import Customer, Order, OrderItem, Product
+from ._benchmark import build_category_tree, measure, rollback
+
+STATUSES = [choice for choice, _ in Order.STATUS_CHOICES]
+
+
+class Command(BaseCommand):
+    help = 'Compares ad-hoc sales aggregation with the daily summaries as order volume grows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, nargs='+', default=[10000, 100000])
+        parser.add_argument('--days', type=int, default=365, help='Days of history to spread orders over')
+        parser.add_argument('--range', type=int, default=30, help='Days covered by the report')
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        end = date(2026, 1, 1) + timedelta(days=options['days'] - 1)
+        start = end - timedelta(days=options['range'] - 1)
+        self.stdout.write(f"{'orders':>8} {'backfill s':>11} {'ad-hoc ms':>10} {'summary ms':>11} {'rows':>6}")
+        for count in options['orders']:
+            with rollback():
+                self.populate(count, options['days'])
+                started = time.perf_counter()
+                rows = rebuild_summaries()
+                backfill = time.perf_counter() - started
+
+                adhoc, _ = measure(lambda: list(self.adhoc(start, end)), options['repeat'])
+                summary, _ = measure(
+                    lambda: list(sales_report(start, end, group_by=['category', 'status'])), options['repeat']
+                )
+            self.stdout.write(
+                f'{count:>8} {backfill:>11.2f} {adhoc * 1000:>10.2f} {summary * 1000:>11.2f} {rows:>6}'
+            )
+
+    def adhoc(self, start, end):
+        """The GROUP BY over order lines that dashboards used to run."""
+        return OrderItem.objects.filter(
+            order__created_at__date__gte=start, order__created_at__date__lte=end,
+        ).values(
+            'category_id', day=TruncDate('order__created_at'), status=F('order__status'),
+        ).annotate(
+            orders=Count('order_id', distinct=True), items=Sum('quantity'),
+            revenue=Sum(F('price') * F('quantity'), output_field=REVENUE_FIELD),
+        ).order_by()
+
+    def populate(self, count, days):
+        rng = random.Random(7)
+        user = User.objects.create(username='bench-sales-report')
+        customer = Customer.objects.create(user=user, phone='0700000000')
+        root = build_category_tree(2, 8, products_per_node=4)
+        products = list(Product.objects.filter(category__tree_id=root.tree_id).values_list('pk', 'category_id'))
+        first_day = datetime.combine(date(2026, 1, 1), day_time(12), tzinfo=timezone.utc)
+        batch = 5000
+        for offset in range(0, count, batch):
+            orders = Order.objects.bulk_create([
+                Order(
+                    customer=customer, order_number=f'BENCH-{i:08d}', total_amount=Decimal('30.00'),
+                    status=rng.choice(STATUSES), shipping_address='a', shipping_city='b',
+                    shipping_country='c', shipping_postal_code='d',
+                )
+                for i in range(offset, min(offset + batch, count))
+            ])
+            # auto_now_add ignores explicit values, so spread the days afterwards.
+            for order in orders:
+                order.created_at = first_day + timedelta(days=rng.randrange(days))
+            Order.objects.bulk_update(orders, ['created_at'], batch_size=1000)
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product_id=product_id, category_id=category_id,
+                          quantity=rng.randint(1, 3), price=Decimal('10.00'))
+                for order in orders for product_id, category_id in (rng.choice(products), rng.choice(products))
+            ], batch_size=5000)
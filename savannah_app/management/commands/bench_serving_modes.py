@@ -0,0 +1,184 @@
+# savannah_app/management/commands/bench_serving_modes.py
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+STACKS = ('wsgi', 'asgi')
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-tests the WSGI and ASGI stacks with concurrent keep-alive clients and compares '
+        'throughput and latency per pod'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi-url', default='http://127.0.0.1:8001')
+        parser.add_argument('--asgi-url', default='http://127.0.0.1:8002')
+        parser.add_argument(
+            '--start', action='store_true',
+            help='Start both stacks with gunicorn.conf.py on the URLs\' ports, one pod each',
+        )
+        parser.add_argument('--workers', type=int, default=3, help='Workers per pod with --start')
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Path to request, repeatable (default: product list, category list, order history)',
+        )
+        parser.add_argument('--concurrency', default='3,30,150', help='Comma-separated client counts')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per run')
+        parser.add_argument('--timeout', type=float, default=30, help='Seconds before a request counts as failed')
+        parser.add_argument('--username', help='Authenticate with a JWT for this user')
+        parser.add_argument('--password')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or ['/products/', '/categories/', '/orders/history/']
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        urls = {'wsgi': options['wsgi_url'], 'asgi': options['asgi_url']}
+        servers = [self.start(stack, urls[stack], options['workers']) for stack in STACKS] if options['start'] else []
+        try:
+            for stack in STACKS:
+                wait_until_up(urls[stack])
+            headers = {}
+            self.stdout.write(f"paths: {', '.join(paths)}; {options['duration']:g}s per run")
+            self.stdout.write(
+                f"{'stack':>5} {'clients':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}"
+            )
+            for stack in STACKS:
+                if options['username']:
+                    token = obtain_token(urls[stack], options['username'], options['password'])
+                    headers = {'Authorization': f'Bearer {token}'}
+                for level in levels:
+                    result = asyncio.run(
+                        load(urls[stack], paths, headers, level, options['duration'], options['timeout'])
+                    )
+                    self.stdout.write(
+                        f"{stack:>5} {level:>8} {result['rate']:>9.1f} {result['p50']:>8.1f} "
+                        f"{result['p95']:>8.1f} {result['p99']:>8.1f} {result['errors']:>7}"
+                    )
+        finally:
+            for server in servers:
+                server.terminate()
+                server.wait()
+
+    def start(self, stack, url, workers):
+        address = urlsplit(url)
+        env = dict(
+            os.environ, SERVING_MODE=stack, GUNICORN_WORKERS=str(workers),
+            GUNICORN_BIND=f'{address.hostname}:{address.port}',
+        )
+        self.stdout.write(f'starting {stack} on {address.netloc} with {workers} workers')
+        return subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+
+def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            urllib.request.urlopen(url.rstrip('/') + '/health/', timeout=2)
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise CommandError(f'{url} is not answering /health/')
+            time.sleep(0.5)
+
+
+def obtain_token(url, username, password):
+    request = urllib.request.Request(
+        url.rstrip('/') + '/api/token/', data=json.dumps({'username': username, 'password': password}).encode(),
+        headers={'Content-Type': 'application/json'},
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.load(response)['access']
+
+
+async def load(url, paths, headers, clients, duration, timeout):
+    """Run ``clients`` keep-alive connections for ``duration`` seconds."""
+    address = urlsplit(url)
+    requests = [
+        ''.join([
+            f'GET {path} HTTP/1.1\r\nHost: {address.netloc}\r\n',
+            *(f'{name}: {value}\r\n' for name, value in headers.items()),
+            '\r\n',
+        ]).encode()
+        for path in paths
+    ]
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    started = time.monotonic()
+    await asyncio.gather(*(
+        client(address.hostname, address.port, requests[i:] + requests[:i], deadline, timeout, latencies, errors)
+        for i in range(clients)
+    ))
+    elapsed = time.monotonic() - started
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100)
+        p50, p95, p99 = cuts[49] * 1000, cuts[94] * 1000, cuts[98] * 1000
+    else:
+        p50 = p95 = p99 = float('nan')
+    return {'rate': len(latencies) / elapsed, 'p50': p50, 'p95': p95, 'p99': p99, 'errors': len(errors)}
+
+
+async def client(host, port, requests, deadline, timeout, latencies, errors):
+    connection = None
+    sent = 0
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            if connection is None:
+                connection = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+            status, keep_alive = await asyncio.wait_for(
+                exchange(*connection, requests[sent % len(requests)]), timeout,
+            )
+        except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.TimeoutError) as exc:
+            errors.append(exc)
+            status, keep_alive = None, False
+        else:
+            if status == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors.append(status)
+        sent += 1
+        if not keep_alive and connection is not None:
+            connection[1].close()
+            connection = None
+    if connection is not None:
+        connection[1].close()
+
+
+async def exchange(reader, writer, request):
+    """Send ``request`` and read the whole response; ``(status, keep_alive)``."""
+    writer.write(request)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length, chunked, keep_alive = None, False, True
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding':
+            chunked = 'chunked' in value
+        elif name == 'connection':
+            keep_alive = value != 'close'
+    if chunked:
+        while size := int((await reader.readline()).split(b';')[0], 16):
+            await reader.readexactly(size + 2)
+        await reader.readline()
+    elif length is not None:
+        await reader.readexactly(length)
+    elif status not in (204, 304):
+        await reader.read()
+        keep_alive = False
+    return status, keep_alive
@@ -0,0 +1,75 @@
+# savannah_app/management/commands/bench_sms.py
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from savannah_app.sms import LocMemSMSBackend, RateLimiter, SMSClient
+from savannah_app.utils import STATUS_MESSAGES, render_bulk_sms, render_order_messages
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares SMS delivery for a bulk status change: per-order texts one request each, per-order '
+        'texts through the batched client, and the batched template'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=10000)
+        parser.add_argument('--customers', type=int, default=8000, help='Distinct phone numbers among the orders')
+        parser.add_argument('--status', default='shipped', choices=sorted(STATUS_MESSAGES))
+        parser.add_argument('--latency', type=float, default=0.05, help='Simulated gateway round trip (s)')
+        parser.add_argument('--rate', type=float, default=20, help='Gateway requests per second')
+        parser.add_argument('--max-recipients', type=int, default=100)
+        parser.add_argument('--sample', type=int, default=50, help='Requests to time before extrapolating')
+
+    def handle(self, *args, **options):
+        status = options['status']
+        contexts = [
+            {
+                'order_number': f'ORD-20240101-{i:05d}', 'status': status, 'status_title': status.title(),
+                'status_message': STATUS_MESSAGES[status], 'phone': f"+2547{i % options['customers']:08d}",
+            }
+            for i in range(options['orders'])
+        ]
+        per_order = [(context['phone'], render_order_messages('status', context)[0]) for context in contexts]
+        by_phone = Counter(context['phone'] for context in contexts)
+        batched = [
+            (phone, render_bulk_sms('status', contexts[0], order_count=count)) for phone, count in by_phone.items()
+        ]
+        self.stdout.write(
+            f"{len(contexts)} orders to {options['customers']} customers, status {status}; "
+            f"{len({text for _, text in per_order})} distinct per-order texts, "
+            f"{len({text for _, text in batched})} batched to {len(batched)} customers"
+        )
+
+        sample = per_order[:options['sample']]
+        backend = LocMemSMSBackend(latency=options['latency'])
+        start = time.perf_counter()
+        for phone, text in sample:
+            backend.send(text, [phone])
+        seconds = (time.perf_counter() - start) / len(sample) * len(per_order)
+        self.report('one request per order (extrapolated)', seconds, len(per_order), len(per_order))
+
+        client = self.client(options)
+        start = time.perf_counter()
+        client.send_bulk(sample)
+        seconds = (time.perf_counter() - start) / len(sample) * len(per_order)
+        self.report('per-order texts, batched client (extrapolated)', seconds, len(per_order), len(per_order))
+
+        client = self.client(options)
+        start = time.perf_counter()
+        client.send_bulk(batched)
+        self.report('batched template', time.perf_counter() - start, len(batched), len(client.backend.outbox))
+
+    def client(self, options):
+        return SMSClient(
+            LocMemSMSBackend(latency=options['latency']),
+            rate_limiter=RateLimiter(options['rate']),
+            max_recipients=options['max_recipients'],
+        )
+
+    def report(self, label, seconds, messages, requests):
+        self.stdout.write(
+            f'  {label:>47}: {seconds:8.1f}s in {requests:>6} requests ({messages / seconds:.0f} msg/s)'
+        )
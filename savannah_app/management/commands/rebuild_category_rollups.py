@@ -0,0 +1,12 @@
+# savannah_app/management/commands/rebuild_category_rollups.py
+from django.core.management.base import BaseCommand
+
+from savannah_app.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the per-category price/stock rollups from the product table'
+
+    def handle(self, *args, **kwargs):
+        count = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rollups for {count} categories'))
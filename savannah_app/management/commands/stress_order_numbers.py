@@ -0,0 +1,74 @@
+# savannah_app/management/commands/stress_order_numbers.py
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils.module_loading import import_string
+
+from savannah_app.models import Customer, Order
+
+STRESS_USERNAME = 'order-number-stress'
+
+
+def create_orders(customer_id, allocator_path, threads, per_thread):
+    allocator = import_string(allocator_path)()
+
+    def worker(_):
+        numbers = []
+        try:
+            for _ in range(per_thread):
+                order = Order.objects.create(
+                    customer_id=customer_id,
+                    order_number=allocator.allocate(),
+                    total_amount='1.00',
+                    shipping_address='Stress St',
+                    shipping_city='Nairobi',
+                    shipping_country='Kenya',
+                    shipping_postal_code='00100',
+                )
+                numbers.append(order.order_number)
+        finally:
+            connections.close_all()
+        return numbers
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return [n for numbers in pool.map(worker, range(threads)) for n in numbers]
+
+
+class Command(BaseCommand):
+    help = 'Creates orders from many processes and threads and checks order numbers never collide'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--orders', type=int, default=4000, help='Total orders to create')
+        parser.add_argument('--allocator', default='savannah_app.order_numbers.DailyCounterAllocator')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated orders')
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username=STRESS_USERNAME)
+        customer, _ = Customer.objects.get_or_create(user=user, defaults={'phone': '0000000000'})
+        per_thread = max(1, options['orders'] // (options['processes'] * options['threads']))
+        # Children must not share the parent's database connection.
+        connections.close_all()
+
+        start = time.perf_counter()
+        with multiprocessing.get_context('fork').Pool(options['processes']) as pool:
+            results = pool.starmap(create_orders, [
+                (customer.pk, options['allocator'], options['threads'], per_thread)
+            ] * options['processes'])
+        elapsed = time.perf_counter() - start
+
+        numbers = [n for chunk in results for n in chunk]
+        duplicates = len(numbers) - len(set(numbers))
+        self.stdout.write(
+            f"{len(numbers)} orders in {elapsed:.2f}s ({len(numbers) / elapsed:.0f}/s), "
+            f"{duplicates} duplicate order numbers"
+        )
+        if not options['keep']:
+            Order.objects.filter(customer=customer).delete()
+        if duplicates:
+            raise CommandError('Order number collisions detected')
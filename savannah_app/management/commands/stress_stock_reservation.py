@@ -0,0 +1,88 @@
+# savannah_app/management/commands/stress_stock_reservation.py
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from rest_framework import serializers
+
+from savannah_app.models import Category, Customer, Order, Product
+from savannah_app.serializers import OrderSerializer
+
+STRESS_USERNAME = 'stock-reservation-stress'
+
+
+class Command(BaseCommand):
+    help = 'Runs parallel buyers against limited stock and checks nothing is oversold'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--orders', type=int, default=2000, help='Total order attempts')
+        parser.add_argument('--products', type=int, default=5)
+        parser.add_argument('--stock', type=int, default=300, help='Initial stock per product')
+        parser.add_argument('--lines', type=int, default=3, help='Lines per order')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated data')
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username=STRESS_USERNAME)
+        customer, _ = Customer.objects.get_or_create(user=user, defaults={'phone': '0000000000'})
+        category, _ = Category.objects.get_or_create(slug=STRESS_USERNAME, defaults={'name': 'Stock stress'})
+        products = [
+            Product.objects.create(
+                name=f'Flash sale {i}', slug=f'{STRESS_USERNAME}-{i}-{time.time_ns()}', description='',
+                price=Decimal('5.00'), category=category, stock=options['stock'],
+            )
+            for i in range(options['products'])
+        ]
+        lines = min(options['lines'], len(products))
+        per_thread = max(1, options['orders'] // options['threads'])
+
+        def buyer(seed):
+            rng = random.Random(seed)
+            placed = rejected = units = 0
+            try:
+                for _ in range(per_thread):
+                    chosen = rng.sample(products, lines)
+                    quantities = [rng.randint(1, 3) for _ in chosen]
+                    serializer = OrderSerializer(data={
+                        'customer': customer.pk,
+                        'shipping_address': 'Stress St', 'shipping_city': 'Nairobi',
+                        'shipping_country': 'Kenya', 'shipping_postal_code': '00100',
+                        'items': [
+                            {'product': p.pk, 'quantity': q, 'price': '5.00'} for p, q in zip(chosen, quantities)
+                        ],
+                    })
+                    serializer.is_valid(raise_exception=True)
+                    try:
+                        serializer.save()
+                    except serializers.ValidationError:
+                        rejected += 1
+                    else:
+                        placed += 1
+                        units += sum(quantities)
+            finally:
+                connections.close_all()
+            return placed, rejected, units
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            results = list(pool.map(buyer, range(options['threads'])))
+        elapsed = time.perf_counter() - start
+
+        placed, rejected, units = (sum(column) for column in zip(*results))
+        remaining = sum(Product.objects.filter(pk__in=[p.pk for p in products]).values_list('stock', flat=True))
+        initial = options['stock'] * len(products)
+        self.stdout.write(
+            f'{placed + rejected} attempts in {elapsed:.2f}s ({(placed + rejected) / elapsed:.0f}/s): '
+            f'{placed} placed, {rejected} rejected for stock'
+        )
+        self.stdout.write(f'  {units} units sold, {remaining} left of {initial}')
+
+        if not options['keep']:
+            Order.objects.filter(customer=customer).delete()
+            Product.objects.filter(pk__in=[p.pk for p in products]).delete()
+        if units + remaining != initial:
+            raise CommandError('Stock accounting mismatch: units were oversold or lost')
@@ -0,0 +1,52 @@
+# savannah_app/managers.py
+from django.db import models
+from django.db.models import Avg, Count, Max, Min, Sum
+from mptt.managers import TreeManager
+
+
+class ProductQuerySet(models.QuerySet):
+    def in_subtree(self, category):
+        """Products in ``category`` or any of its descendants.
+
+        Uses the MPTT interval of the node so the whole subtree is matched
+        by a single join instead of an ``IN (...)`` list of descendant ids.
+        """
+        return self.filter(
+            category__tree_id=category.tree_id,
+            category__lft__gte=category.lft,
+            category__rght__lte=category.rght,
+        )
+
+    def price_stats(self):
+        """Count, sum, average, min and max price in one aggregate query."""
+        return self.aggregate(
+            count=Count('id'),
+            total=Sum('price'),
+            average=Avg('price'),
+            minimum=Min('price'),
+            maximum=Max('price'),
+        )
+
+
+class CategoryManager(TreeManager):
+    def subtree_price_stats(self, category):
+        """Price statistics for every product under ``category`` (inclusive)."""
+        product_model = self.model._meta.get_field('products').related_model
+        return product_model.objects.in_subtree(category).price_stats()
+
+    def tree_rows(self, *fields, root_id=None):
+        """``values()`` rows of the forest, or of the subtree at ``root_id``.
+
+        Rows come back in ``(tree_id, lft)`` order, so every parent precedes
+        its children. The subtree bounds are read with subqueries, keeping
+        the whole lookup to one statement.
+        """
+        queryset = self.get_queryset()
+        if root_id is not None:
+            root = self.filter(pk=root_id)
+            queryset = queryset.filter(
+                tree_id=models.Subquery(root.values('tree_id')),
+                lft__gte=models.Subquery(root.values('lft')),
+                rght__lte=models.Subquery(root.values('rght')),
+            )
+        return queryset.order_by('tree_id', 'lft').values(*fields)
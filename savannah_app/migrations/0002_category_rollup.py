@@ -0,0 +1,26 @@
+# Generated by Django 4.2 on 2026-10-18 17:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savannah_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryRollup',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='savannah_app.category')),
+                ('product_count', models.PositiveIntegerField(default=0)),
+                ('price_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('price_min', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('price_max', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('stock_total', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
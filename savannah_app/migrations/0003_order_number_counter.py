@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-18 17:43
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def seed_todays_counter(apps, schema_editor):
+    # The old scheme numbered orders by the total order count, which drops
+    # when orders are deleted, so today's numbers may already run past it.
+    # Start today's counter above the highest sequence actually handed out.
+    Order = apps.get_model('savannah_app', 'Order')
+    OrderNumberCounter = apps.get_model('savannah_app', 'OrderNumberCounter')
+    today = timezone.now().date()
+    prefix = f"ORD-{today:%Y%m%d}-"
+    numbers = Order.objects.filter(order_number__startswith=prefix).values_list('order_number', flat=True)
+    sequences = [int(number[len(prefix):]) for number in numbers if number[len(prefix):].isdigit()]
+    OrderNumberCounter.objects.create(day=today, last_value=max(sequences, default=0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savannah_app', '0002_category_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNumberCounter',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_todays_counter, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 18:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savannah_app', '0006_order_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'updated_at'], name='order_customer_updated_idx'),
+        ),
+    ]
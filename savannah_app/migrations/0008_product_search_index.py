@@ -0,0 +1,83 @@
+# Generated by Django 4.2 on 2026-10-18 21:05
+
+from django.db import migrations
+
+# Postgres keeps the vector in a generated column, so every write path
+# (ORM saves, bulk upserts, raw SQL) maintains it. Name lexemes are stored
+# twice: unstemmed at weight A for prefix/typeahead matching and stemmed
+# at weight B for full-text queries; the description is weight C.
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE savannah_app_product ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(name, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    'CREATE INDEX product_search_vector_idx ON savannah_app_product USING gin (search_vector)',
+]
+POSTGRES_REVERSE = [
+    'DROP INDEX IF EXISTS product_search_vector_idx',
+    'ALTER TABLE savannah_app_product DROP COLUMN IF EXISTS search_vector',
+]
+
+# SQLite (tests, local development) gets an FTS5 index over the product
+# table, kept in sync by triggers.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE savannah_app_product_fts USING fts5(
+        name, description, content='savannah_app_product', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER savannah_app_product_fts_insert AFTER INSERT ON savannah_app_product BEGIN
+        INSERT INTO savannah_app_product_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER savannah_app_product_fts_delete AFTER DELETE ON savannah_app_product BEGIN
+        INSERT INTO savannah_app_product_fts(savannah_app_product_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER savannah_app_product_fts_update AFTER UPDATE OF name, description ON savannah_app_product BEGIN
+        INSERT INTO savannah_app_product_fts(savannah_app_product_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO savannah_app_product_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    "INSERT INTO savannah_app_product_fts(savannah_app_product_fts) VALUES ('rebuild')",
+]
+SQLITE_REVERSE = [
+    'DROP TRIGGER IF EXISTS savannah_app_product_fts_insert',
+    'DROP TRIGGER IF EXISTS savannah_app_product_fts_delete',
+    'DROP TRIGGER IF EXISTS savannah_app_product_fts_update',
+    'DROP TABLE IF EXISTS savannah_app_product_fts',
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savannah_app', '0007_order_updated_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRES_REVERSE, 'sqlite': SQLITE_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-18 18:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savannah_app', '0008_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('order_count', models.IntegerField(default=0)),
+                ('item_count', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sales_summaries', to='savannah_app.category')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailysalessummary',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('day', 'category', 'status'), name='sales_summary_category_day_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailysalessummary',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('day', 'status'), name='sales_summary_day_uniq'),
+        ),
+    ]
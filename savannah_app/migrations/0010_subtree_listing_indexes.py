@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-18 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savannah_app', '0009_daily_sales_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['tree_id', 'lft', 'rght', 'id'], name='category_subtree_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='product_category_created_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-18 19:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_categories(apps, schema_editor):
+    # Existing lines can only take their product's current category.
+    OrderItem = apps.get_model('savannah_app', 'OrderItem')
+    Product = apps.get_model('savannah_app', 'Product')
+    OrderItem.objects.update(category_id=models.Subquery(
+        Product.objects.filter(pk=models.OuterRef('product_id')).values('category_id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savannah_app', '0010_subtree_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='savannah_app.category'),
+        ),
+        migrations.RunPython(backfill_categories, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 21:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savannah_app', '0011_order_item_category'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_customer_updated_idx',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savannah_app', '0012_remove_order_updated_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'updated_at'], name='order_customer_updated_idx'),
+        ),
+    ]
@@ -1,8 +1,10 @@
 # savannah_app/models.py
+from decimal import Decimal
 from django.db import models
 from django.contrib.auth.models import User
 from mptt.models import MPTTModel, TreeForeignKey
-from django.utils import timezone
+from .managers import CategoryManager, ProductQuerySet
+from .order_numbers import next_order_number
 
 class Category(MPTTModel):
     name = models.CharField(max_length=200, help_text="Category name")
@@ -20,9 +22,16 @@ class Category(MPTTModel):
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    objects = CategoryManager()
+
     class Meta:
         verbose_name_plural = 'categories'
         ordering = ['name']
+        indexes = [
+            # Covers subtree joins: the interval lookup yields category ids
+            # without touching the table.
+            models.Index(fields=['tree_id', 'lft', 'rght', 'id'], name='category_subtree_idx'),
+        ]
 
     class MPTTMeta:
         order_insertion_by = ['name']
@@ -30,6 +39,22 @@ class Category(MPTTModel):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Remember where a re-parented node used to hang so the rollups of
+        # its former ancestors can be refreshed once the move is saved.
+        if self.pk and self._mptt_cached_fields.get('parent') != self.parent_id:
+            self._previous_ancestor_ids = self._current_ancestor_ids()
+        super().save(*args, **kwargs)
+
+    def move_to(self, target, position='first-child'):
+        self._previous_ancestor_ids = self._current_ancestor_ids()
+        super().move_to(target, position)
+
+    def _current_ancestor_ids(self):
+        return list(Category.objects.filter(
+            tree_id=self.tree_id, lft__lt=self.lft, rght__gt=self.rght
+        ).values_list('pk', flat=True))
+
 class Product(models.Model):
     name = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
@@ -45,12 +70,42 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Newest-first listing of each category in a subtree.
+            models.Index(fields=['category', '-created_at', '-id'], name='product_category_created_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+class CategoryRollup(models.Model):
+    """Denormalized product statistics for a category and all its descendants."""
+    category = models.OneToOneField(
+        Category,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rollup'
+    )
+    product_count = models.PositiveIntegerField(default=0)
+    price_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    price_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    price_max = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    stock_total = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Rollup for {self.category_id}"
+
+    @property
+    def price_average(self):
+        if not self.product_count:
+            return None
+        return (Decimal(self.price_sum) / self.product_count).quantize(Decimal('0.01'))
+
 class Customer(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     phone = models.CharField(max_length=15)
@@ -96,15 +151,30 @@ class Order(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['customer', 'status', 'created_at'], name='order_customer_status_idx'),
+            models.Index(fields=['customer', 'created_at', 'id'], name='order_customer_created_idx'),
+            models.Index(fields=['created_at', 'id'], name='order_created_idx'),
+            # Conditional GETs on a customer's orders read count and max(updated_at) from here.
+            models.Index(fields=['customer', 'updated_at'], name='order_customer_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Order #{self.order_number} - {self.customer.user.username}"
 
     def save(self, *args, **kwargs):
         if not self.order_number:
-            self.order_number = f"ORD-{timezone.now().strftime('%Y%m%d')}-{Order.objects.count() + 1:04d}"
+            self.order_number = next_order_number()
         super().save(*args, **kwargs)
 
+class OrderNumberCounter(models.Model):
+    """Last order sequence handed out for a given day."""
+    day = models.DateField(primary_key=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day}: {self.last_value}"
+
 class OrderItem(models.Model):
     order = models.ForeignKey(
         Order,
@@ -115,9 +185,88 @@ class OrderItem(models.Model):
         Product,
         on_delete=models.CASCADE
     )
+    # The product's category when the line was ordered. Sales summaries are
+    # keyed on it, so recategorising a product doesn't move past sales.
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
     quantity = models.PositiveIntegerField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.quantity}x {self.product.name} in Order #{self.order.order_number}"
\ No newline at end of file
+        return f"{self.quantity}x {self.product.name} in Order #{self.order.order_number}"
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.category_id is None:
+            self.category_id = self.product.category_id
+        super().save(*args, **kwargs)
+
+class NotificationDelivery(models.Model):
+    """Record of a notification that was delivered, keyed for idempotency."""
+    CHANNEL_CHOICES = (
+        ('sms', 'SMS'),
+        ('email', 'Email'),
+    )
+
+    key = models.CharField(max_length=100, unique=True)
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='notification_deliveries'
+    )
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.key
+
+class PendingAdminEmail(models.Model):
+    """Order event waiting to go out in the next admin email digest."""
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return self.subject
+
+class DailySalesSummary(models.Model):
+    """Orders, units and revenue for one day, category and order status.
+
+    Rows with a category cover the order lines in that category; the row
+    without one covers whole orders, so its revenue is ``total_amount``.
+    """
+    day = models.DateField()
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='sales_summaries'
+    )
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    order_count = models.IntegerField(default=0)
+    item_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'category', 'status'], condition=models.Q(category__isnull=False),
+                name='sales_summary_category_day_uniq'
+            ),
+            models.UniqueConstraint(
+                fields=['day', 'status'], condition=models.Q(category__isnull=True),
+                name='sales_summary_day_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.category_id or 'all'} {self.status}"
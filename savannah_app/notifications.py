@@ -0,0 +1,96 @@
+# savannah_app/notifications.py
+"""Admin email digests.
+
+Routine order events are stored as ``PendingAdminEmail`` rows and sent in
+digests once ``ADMIN_EMAIL_DIGEST_SIZE`` events have piled up or the oldest
+has waited ``ADMIN_EMAIL_DIGEST_WINDOW`` seconds. Queueing keeps a cached
+count of the buffer to spot a full one without counting rows; the beat
+schedule flushes whatever that misses. A flush sends the digests one at a
+time over one SMTP connection and drops each digest's events once it has
+gone out, so a failure partway only leaves the unsent ones buffered.
+Statuses in ``ADMIN_EMAIL_URGENT_STATUSES`` skip the buffer and go out
+immediately.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import PendingAdminEmail
+from .utils import send_admin_email
+
+logger = logging.getLogger(__name__)
+
+PENDING_COUNT_KEY = 'admin-email-digest:pending'
+
+
+def queue_admin_email(subject, message_content, status=None):
+    """Buffer an admin email for the next digest, or send it now if urgent."""
+    urgent = status in settings.ADMIN_EMAIL_URGENT_STATUSES
+    if not settings.ADMIN_EMAIL_DIGEST or urgent:
+        return send_admin_email(subject, message_content)
+    PendingAdminEmail.objects.create(subject=subject, body=message_content)
+    if _count_pending() >= settings.ADMIN_EMAIL_DIGEST_SIZE:
+        flush_admin_email_digest()
+    return True
+
+
+def _count_pending():
+    """Bump the cached buffer count and return it; 0 if the cache won't count."""
+    cache.add(PENDING_COUNT_KEY, 0, timeout=None)
+    try:
+        return cache.incr(PENDING_COUNT_KEY)
+    except ValueError:
+        # Evicted in between; the scheduled flush still picks the events up.
+        return 0
+
+
+def build_digest(events):
+    subject = f'Order activity digest: {len(events)} events'
+    sections = [f"{event.subject}\n{'=' * len(event.subject)}\n{event.body.strip()}" for event in events]
+    return EmailMessage(
+        subject=subject,
+        body='\n\n'.join(sections) + '\n',
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[settings.ADMIN_EMAIL],
+    )
+
+
+def flush_admin_email_digest(force=False):
+    """Send buffered events as digests; return the number of events sent.
+
+    Unless ``force`` is set, nothing is sent until the buffer is full or
+    its oldest event is older than the digest window.
+    """
+    size = settings.ADMIN_EMAIL_DIGEST_SIZE
+    with transaction.atomic():
+        events = list(
+            PendingAdminEmail.objects.select_for_update(skip_locked=True)
+            .order_by('id')[:size * settings.ADMIN_EMAIL_DIGEST_MAX_BATCHES]
+        )
+        if not events:
+            return 0
+        window_closed = events[0].created_at <= timezone.now() - timedelta(
+            seconds=settings.ADMIN_EMAIL_DIGEST_WINDOW
+        )
+        if not (force or window_closed or len(events) >= size):
+            return 0
+
+        sent = 0
+        try:
+            with get_connection() as connection:
+                for start in range(0, len(events), size):
+                    batch = events[start:start + size]
+                    if not connection.send_messages([build_digest(batch)]):
+                        break
+                    PendingAdminEmail.objects.filter(pk__in=[event.pk for event in batch]).delete()
+                    sent += len(batch)
+        except Exception:
+            logger.exception('Admin email digest failed after %d of %d events', sent, len(events))
+    # Queueing only ever adds to the cached count, so set it right here.
+    cache.set(PENDING_COUNT_KEY, PendingAdminEmail.objects.count(), timeout=None)
+    return sent
@@ -0,0 +1,119 @@
+# savannah_app/order_status.py
+"""Order status state machine and bulk transitions.
+
+``TRANSITIONS`` lists where each status in ``Order.STATUS_CHOICES`` may go
+next. ``transition_orders`` applies a whole batch of changes: the orders are
+locked and read in one query, every change is checked against the state
+machine, and each target status is written with one set-based ``UPDATE``
+that moves its orders' sales summaries in one step. Stock for orders
+entering or leaving a released status moves in one reservation per target
+status, and the notifications go to the queue as a single batch after
+commit.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import analytics
+from .inventory import RELEASED_STATUSES, InsufficientStock, release, reserve
+from .models import Order, OrderItem
+from .tasks import queue_order_notifications
+
+TRANSITIONS = {
+    'pending': ('processing', 'cancelled'),
+    'processing': ('shipped', 'cancelled'),
+    'shipped': ('delivered',),
+    'delivered': (),
+    'cancelled': ('pending',),
+}
+
+
+def can_transition(old_status, new_status):
+    """Staying put is always allowed; anything else must be in ``TRANSITIONS``."""
+    return old_status == new_status or new_status in TRANSITIONS.get(old_status, ())
+
+
+def transition_orders(changes):
+    """Apply ``{order_id: new_status}`` and return ``{order_id: result}``.
+
+    Each result has a ``result`` of ``updated``, ``unchanged``, ``not_found``,
+    ``invalid_transition`` or ``insufficient_stock``. Orders that fail are
+    skipped; the rest of the batch still applies.
+    """
+    results = {}
+    targets = defaultdict(list)
+    with transaction.atomic():
+        current = dict(
+            Order.objects.filter(pk__in=changes).order_by('pk').select_for_update().values_list('pk', 'status')
+        )
+        for pk, new_status in changes.items():
+            old_status = current.get(pk)
+            if old_status is None:
+                results[pk] = {'result': 'not_found'}
+            elif old_status == new_status:
+                results[pk] = {'result': 'unchanged', 'status': old_status}
+            elif not can_transition(old_status, new_status):
+                results[pk] = {'result': 'invalid_transition', 'old_status': old_status, 'new_status': new_status}
+            else:
+                targets[new_status].append(pk)
+
+        for new_status, pks in targets.items():
+            pks = _move_stock(pks, current, new_status, results)
+            if not pks:
+                continue
+            before = analytics.order_snapshot(pks)
+            changed_at = timezone.now()
+            Order.objects.filter(pk__in=pks).update(status=new_status, updated_at=changed_at)
+            analytics.record_change(before, analytics.with_status(before, new_status))
+            for pk in pks:
+                results[pk] = {'result': 'updated', 'old_status': current[pk], 'new_status': new_status}
+            queue_order_notifications(pks, new_status, changed_at)
+    return results
+
+
+def _move_stock(pks, current, new_status, results):
+    """Release or reserve stock for orders crossing ``RELEASED_STATUSES``.
+
+    Returns the orders that may go ahead. If stock runs short, every order
+    wanting a short product is refused and the rest are reserved again.
+    """
+    released = new_status in RELEASED_STATUSES
+    crossing = [pk for pk in pks if (current[pk] in RELEASED_STATUSES) != released]
+    if not crossing:
+        return pks
+
+    lines = defaultdict(Counter)
+    for order_id, product_id, quantity in OrderItem.objects.filter(order_id__in=crossing).values_list(
+        'order_id', 'product_id', 'quantity'
+    ):
+        lines[order_id][product_id] += quantity
+
+    if released:
+        release(_combined(lines, crossing))
+        return pks
+
+    refused = set()
+    while crossing:
+        try:
+            # A savepoint, so a failed attempt gives back what it took.
+            with transaction.atomic():
+                reserve(_combined(lines, crossing))
+            break
+        except InsufficientStock as exc:
+            blocked = [pk for pk in crossing if lines[pk].keys() & exc.shortages.keys()] or crossing
+            for pk in blocked:
+                results[pk] = {
+                    'result': 'insufficient_stock', 'old_status': current[pk], 'new_status': new_status,
+                    'shortages': {p: exc.shortages[p] for p in lines[pk].keys() & exc.shortages.keys()},
+                }
+            refused.update(blocked)
+            crossing = [pk for pk in crossing if pk not in refused]
+    return [pk for pk in pks if pk not in refused]
+
+
+def _combined(lines, pks):
+    total = Counter()
+    for pk in pks:
+        total.update(lines[pk])
+    return total
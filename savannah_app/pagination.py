@@ -0,0 +1,91 @@
+# savannah_app/pagination.py
+from collections import OrderedDict
+
+from django.core.paginator import InvalidPage
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class OrderCursorPagination(CursorPagination):
+    """Keyset pagination over ``(created_at, id)``.
+
+    Each page is an index range scan from the previous position, so page
+    10,000 costs the same as page 1 and no ``COUNT(*)`` is ever issued.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class ProductCursorPagination(CursorPagination):
+    """Keyset pagination over ``(created_at, id)``, newest products first."""
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class UncountedPageNumberPagination(PageNumberPagination):
+    """Page numbers without ``COUNT(*)``.
+
+    Fetches one row past the page to tell whether a next page exists, for
+    result sets (ranked search) where counting every match costs more than
+    producing the page.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            self.page_number = 0
+        if self.page_number < 1:
+            raise NotFound(self.invalid_page_message.format(page_number=request.query_params.get(
+                self.page_query_param), message='Invalid page.'))
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+async def apaginate_queryset(paginator, queryset, request):
+    """``PageNumberPagination.paginate_queryset`` with the count and page read by the async ORM."""
+    page_size = paginator.get_page_size(request)
+    if not page_size:
+        return None
+    django_paginator = paginator.django_paginator_class(queryset, page_size)
+    django_paginator.count = await queryset.acount()
+    page_number = paginator.get_page_number(request, django_paginator)
+    try:
+        paginator.page = django_paginator.page(page_number)
+    except InvalidPage as exc:
+        raise NotFound(paginator.invalid_page_message.format(page_number=page_number, message=str(exc)))
+    if django_paginator.num_pages > 1 and paginator.template is not None:
+        paginator.display_page_controls = True
+    paginator.request = request
+    paginator.page.object_list = [row async for row in paginator.page.object_list]
+    return paginator.page.object_list
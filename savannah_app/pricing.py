@@ -0,0 +1,110 @@
+# savannah_app/pricing.py
+"""Server-side order pricing.
+
+Prices come from the ``Product`` rows the order serializer has already
+loaded in one query, never from the client payload. ``price_items`` walks
+the lines once, totalling them as ``Decimal`` cents, and then hands the
+whole cart to each rule in ``settings.ORDER_PRICING_RULES``. Rules see every
+line at once, so promotions and taxes cost one pass over the cart rather
+than a lookup per item.
+
+Each rule is configured as ``(dotted_path, options)`` and built once per
+process; the result is any callable taking a ``Cart`` that records its
+effect with ``cart.adjust()``.
+"""
+import threading
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+
+def money(amount):
+    return Decimal(amount).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class Line:
+    __slots__ = ('product', 'quantity', 'unit_price', 'total')
+
+    def __init__(self, product, quantity):
+        self.product = product
+        self.quantity = quantity
+        self.unit_price = product.price
+        self.total = money(product.price * quantity)
+
+
+class Cart:
+    def __init__(self, lines):
+        self.lines = lines
+        self.subtotal = sum((line.total for line in lines), ZERO)
+        # [(label, signed amount)] in the order rules applied them.
+        self.adjustments = []
+
+    def adjust(self, label, amount):
+        amount = money(amount)
+        if amount:
+            self.adjustments.append((label, amount))
+
+    @property
+    def total(self):
+        return max(self.subtotal + sum((amount for _, amount in self.adjustments), ZERO), ZERO)
+
+
+class QuantityDiscount:
+    """``percent`` off every line ordering at least ``min_quantity`` units."""
+
+    def __init__(self, min_quantity, percent, label='Quantity discount'):
+        self.min_quantity = min_quantity
+        self.rate = Decimal(percent) / 100
+        self.label = label
+
+    def __call__(self, cart):
+        eligible = sum((line.total for line in cart.lines if line.quantity >= self.min_quantity), ZERO)
+        cart.adjust(self.label, -eligible * self.rate)
+
+
+class PercentageTax:
+    """Tax at ``rate`` on the cart after earlier adjustments."""
+
+    def __init__(self, rate, label='Tax'):
+        self.rate = Decimal(rate)
+        self.label = label
+
+    def __call__(self, cart):
+        cart.adjust(self.label, cart.total * self.rate)
+
+
+_rules = None
+_rules_lock = threading.Lock()
+
+
+def get_pricing_rules():
+    global _rules
+    with _rules_lock:
+        if _rules is None:
+            _rules = [
+                import_string(path)(**options)
+                for path, options in getattr(settings, 'ORDER_PRICING_RULES', ())
+            ]
+        return _rules
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting, **kwargs):
+    global _rules
+    if setting == 'ORDER_PRICING_RULES':
+        with _rules_lock:
+            _rules = None
+
+
+def price_items(items, rules=None):
+    """Price ``[{'product': Product, 'quantity': int}, ...]`` into a ``Cart``."""
+    cart = Cart([Line(item['product'], item['quantity']) for item in items])
+    for rule in get_pricing_rules() if rules is None else rules:
+        rule(cart)
+    return cart
@@ -0,0 +1,211 @@
+# savannah_app/projections.py
+"""Serializer-free read path for the hot list endpoints.
+
+Rendering a page through ``ProductSerializer``/``OrderSerializer`` builds
+model instances and walks every serializer field of every row. Here a list
+queryset is instead projected with ``.values()`` to exactly the columns the
+serializer reads (``category_name`` and ``customer_name`` included) and
+paginated as plain dicts. Each page is then turned into the serializer's
+payload with one converter per column, built once per page: only
+``Decimal`` and datetime columns need one, and they reproduce the field's
+``to_representation`` (quantized decimal strings, ISO 8601 in the active
+timezone), so the payload is the same key for key and, once rendered,
+byte for byte. Given a serializer trimmed by ``?fields=``/``?expand=``,
+only its columns are selected and expanded relations are joined.
+"""
+import decimal
+from collections import defaultdict
+from functools import lru_cache
+
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .models import OrderItem
+from .serializers import CategorySerializer, OrderItemSerializer, OrderSerializer, ProductSerializer
+
+# Fields whose representation differs from the database value.
+CONVERTED_FIELDS = (serializers.DecimalField, serializers.DateTimeField, serializers.DateField)
+
+
+def columns(serializer, prefix=''):
+    """``(name, lookup, field, children)`` for each field ``serializer`` outputs.
+
+    ``field`` is only set where the value needs converting, and
+    ``children`` only for an embedded object, whose columns are read
+    through the join. Nested lists get no lookup; the caller fills them in.
+    """
+    result = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        lookup = prefix + field.source.replace('.', '__')
+        if isinstance(field, serializers.ListSerializer):
+            result.append((name, None, None, None))
+        elif isinstance(field, serializers.BaseSerializer):
+            result.append((name, None, None, columns(field, lookup + '__')))
+        else:
+            result.append((name, lookup, field if isinstance(field, CONVERTED_FIELDS) else None, None))
+    return tuple(result)
+
+
+@lru_cache(maxsize=None)
+def default_columns(serializer_class):
+    return columns(serializer_class())
+
+
+def lookups(fields):
+    for _, lookup, _, children in fields:
+        if children is not None:
+            yield from lookups(children)
+        elif lookup is not None:
+            yield lookup
+
+
+def converter(field):
+    """A function equivalent to ``field.to_representation`` for non-null values.
+
+    The field's settings and the active timezone are resolved once here
+    rather than on every value.
+    """
+    if field is None:
+        return None
+    if (
+        isinstance(field, serializers.DecimalField) and field.decimal_places is not None
+        and getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING) and not field.localize
+    ):
+        exponent = decimal.Decimal('.1') ** field.decimal_places
+        context = decimal.getcontext().copy()
+        if field.max_digits is not None:
+            context.prec = field.max_digits
+        rounding = field.rounding
+
+        def convert(value):
+            if not isinstance(value, decimal.Decimal):
+                value = decimal.Decimal(str(value).strip())
+            return '{:f}'.format(value.quantize(exponent, rounding=rounding, context=context))
+        return convert
+    if isinstance(field, serializers.DateTimeField):
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if output_format is not None and output_format.lower() == ISO_8601 and tz is not None:
+            def convert(value):
+                text = value.astimezone(tz).isoformat()
+                return text[:-6] + 'Z' if text.endswith('+00:00') else text
+            return convert
+    return field.to_representation
+
+
+def project(queryset, fields, *extra):
+    """``queryset`` as ``.values()`` of the ``columns()`` in ``fields``."""
+    # values() ignores select_related but would still try to prefetch onto dicts.
+    return queryset.prefetch_related(None).values(*dict.fromkeys([*lookups(fields), *extra]))
+
+
+def converters(fields):
+    return [
+        (name, lookup, converter(field), None if children is None else converters(children))
+        for name, lookup, field, children in fields
+    ]
+
+
+def represent(rows, fields, nested=None):
+    """The serializer's ``many=True`` data for projected ``rows``.
+
+    ``nested`` maps a nested list field to ``{row id: data}``.
+    """
+    fields = converters(fields)
+    return [_represent(row, fields, nested) for row in rows]
+
+
+def _represent(row, fields, nested):
+    data = {}
+    for name, lookup, convert, children in fields:
+        if lookup is not None:
+            value = row[lookup]
+            data[name] = value if convert is None or value is None else convert(value)
+        elif children is not None:
+            data[name] = _represent(row, children, nested)
+        else:
+            data[name] = nested[name].get(row['id'], [])
+    return data
+
+
+def category_columns(serializer=None):
+    return default_columns(CategorySerializer) if serializer is None else columns(serializer)
+
+
+def project_categories(queryset, serializer=None):
+    return project(queryset, category_columns(serializer))
+
+
+def category_data(rows, serializer=None):
+    """Category payloads; ``serializer`` is a trimmed ``CategorySerializer``."""
+    return represent(rows, category_columns(serializer))
+
+
+def product_columns(serializer=None):
+    return default_columns(ProductSerializer) if serializer is None else columns(serializer)
+
+
+def project_products(queryset, serializer=None):
+    return project(queryset, product_columns(serializer))
+
+
+def product_data(rows, serializer=None):
+    """Product payloads; ``serializer`` is a trimmed ``ProductSerializer``."""
+    return represent(rows, product_columns(serializer))
+
+
+def order_columns(serializer=None):
+    return default_columns(OrderSerializer) if serializer is None else columns(serializer)
+
+
+def project_orders(queryset, serializer=None):
+    # The items lookup and the page cursor need these whatever was asked for.
+    return project(queryset, order_columns(serializer), 'id', 'created_at')
+
+
+def order_items(rows, serializer=None):
+    """``(item columns, items queryset)`` for a page of orders, or ``None``.
+
+    ``serializer`` is a trimmed ``OrderSerializer``; without ``items`` in it
+    no items are read.
+    """
+    if serializer is None:
+        item_fields = default_columns(OrderItemSerializer)
+    elif 'items' in serializer.fields:
+        item_fields = columns(serializer.fields['items'].child)
+    else:
+        return None
+    return item_fields, project(
+        OrderItem.objects.filter(order_id__in=[row['id'] for row in rows]).order_by('id'),
+        item_fields, 'order_id',
+    )
+
+
+def _order_data(rows, serializer, item_fields=None, item_rows=None):
+    fields = order_columns(serializer)
+    if item_fields is None:
+        return represent(rows, fields)
+    items = defaultdict(list)
+    for row, data in zip(item_rows, represent(item_rows, item_fields)):
+        items[row['order_id']].append(data)
+    return represent(rows, fields, nested={'items': items})
+
+
+def order_data(rows, serializer=None):
+    """Order payloads, with their items read in one more query for the page."""
+    plan = order_items(rows, serializer)
+    if plan is None:
+        return _order_data(rows, serializer)
+    item_fields, item_rows = plan
+    return _order_data(rows, serializer, item_fields, list(item_rows))
+
+
+async def aorder_data(rows, serializer=None):
+    """``order_data`` reading the items with the async ORM."""
+    plan = order_items(rows, serializer)
+    if plan is None:
+        return _order_data(rows, serializer)
+    item_fields, item_rows = plan
+    return _order_data(rows, serializer, item_fields, [row async for row in item_rows])
@@ -0,0 +1,42 @@
+# savannah_app/renderers.py
+"""JSON rendering through orjson.
+
+``FastJSONRenderer`` produces the same bytes as DRF's ``JSONRenderer`` for
+the compact UTF-8 output the API serves, but encodes in C. Dates, datetimes
+and anything else orjson does not handle itself go through DRF's own
+encoder, so ``Decimal`` and datetime values format exactly as before.
+Indented output (``Accept: application/json; indent=4``), ASCII-only
+settings and installs without orjson fall back to ``JSONRenderer``.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speed-up
+    orjson = None
+
+if orjson is not None:
+    OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+# JSONRenderer escapes these so the output is also valid JavaScript.
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Drop-in ``JSONRenderer`` that encodes with orjson when it can."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=OPTIONS)
+        except orjson.JSONEncodeError:
+            # Integers past 64 bits and the like; the stdlib encoder copes.
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80' in ret:
+            ret = ret.replace(LINE_SEPARATOR, b'\\u2028').replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
@@ -0,0 +1,190 @@
+# savannah_app/replicas.py
+"""Read-replica routing.
+
+``ReplicaRouter`` sends reads of the catalogue, order history and sales
+analytics models (``settings.DATABASE_REPLICA_MODELS``) to one of the
+``settings.DATABASE_REPLICAS`` aliases, but only while a safe (GET/HEAD)
+request is being served; everything else, including Celery tasks and
+management commands, stays on the primary. Within such a request, reads
+go back to the primary once anything has been written or a transaction
+is open on it.
+
+Replicas are lag-aware. Each worker measures replication lag of every
+replica at most every ``DATABASE_REPLICA_CHECK_INTERVAL`` seconds and
+skips replicas further behind than ``DATABASE_REPLICA_MAX_LAG`` or not
+answering. ``ReplicaPinningMiddleware`` pins a client that wrote to the
+primary for that same window with a cookie, so whichever pod serves its
+next request, it reads its own writes.
+"""
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+PIN_COOKIE = 'db_primary'
+
+# Whether reads may go to a replica, and what the current block has
+# written. Writes are recorded on the ``_Writes`` object rather than by
+# setting the variable: a task or thread spawned by an async view (a
+# gathered ``sync_to_async`` call, say) runs in a copy of the context, so a
+# value set there never reaches the request, but the copy still holds the
+# same object.
+_replica_reads = ContextVar('replica_reads', default=False)
+_writes = ContextVar('writes', default=None)
+
+
+class _Writes:
+    __slots__ = ('seen',)
+
+    def __init__(self):
+        self.seen = False
+
+# Postgres: seconds of WAL not yet replayed, 0 when fully caught up (an
+# idle primary must not read as a lagging replica).
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_lags = {}
+_lags_lock = threading.Lock()
+
+
+def measure_lag(alias):
+    """Replication lag of ``alias`` in seconds, or ``None`` if it is unreachable."""
+    connection = connections[alias]
+    try:
+        if connection.vendor != 'postgresql':
+            connection.ensure_connection()
+            return 0.0
+        with connection.cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            return float(cursor.fetchone()[0])
+    except DatabaseError:
+        connection.close()
+        return None
+
+
+def replica_lag(alias):
+    """Cached ``measure_lag``; at most one check per interval per worker."""
+    now = time.monotonic()
+    checked, lag = _lags.get(alias, (None, None))
+    if checked is not None and now - checked < settings.DATABASE_REPLICA_CHECK_INTERVAL:
+        return lag
+    with _lags_lock:
+        checked, lag = _lags.get(alias, (None, None))
+        if checked is None or now - checked >= settings.DATABASE_REPLICA_CHECK_INTERVAL:
+            lag = measure_lag(alias)
+            _lags[alias] = (time.monotonic(), lag)
+    return lag
+
+
+def healthy_replicas():
+    max_lag = settings.DATABASE_REPLICA_MAX_LAG
+    return [
+        alias for alias in settings.DATABASE_REPLICAS
+        if (lag := replica_lag(alias)) is not None and lag <= max_lag
+    ]
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Let routed reads use a replica inside the block."""
+    block = _Writes()
+    reads, writes = _replica_reads.set(enabled), _writes.set(block)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(reads)
+        _writes.reset(writes)
+        # An enclosing block has written too.
+        outer = _writes.get()
+        if block.seen and outer is not None:
+            outer.seen = True
+
+
+def wrote():
+    """Whether anything was written since the current ``replica_reads`` block began."""
+    block = _writes.get()
+    return block is not None and block.seen
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (
+            not _replica_reads.get() or wrote()
+            or model._meta.label_lower not in settings.DATABASE_REPLICA_MODELS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        replicas = healthy_replicas()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        block = _writes.get()
+        if block is not None:
+            block.seen = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas get their schema through replication.
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    """Serve safe requests from replicas unless the client recently wrote."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with replica_reads(self.reads_replicas(request)):
+            response = self.get_response(request)
+            pin = self.wants_pin(request)
+        return self.finish(response, pin)
+
+    async def __acall__(self, request):
+        with replica_reads(self.reads_replicas(request)):
+            response = await self.get_response(request)
+            pin = self.wants_pin(request)
+        return self.finish(response, pin)
+
+    def reads_replicas(self, request):
+        return (
+            bool(settings.DATABASE_REPLICAS) and request.method in ('GET', 'HEAD')
+            and PIN_COOKIE not in request.COOKIES
+        )
+
+    def wants_pin(self, request):
+        return request.method not in ('GET', 'HEAD', 'OPTIONS') or wrote()
+
+    def finish(self, response, pin):
+        if pin and settings.DATABASE_REPLICAS:
+            # Any replica serving reads is at most this far behind.
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=max(1, math.ceil(settings.DATABASE_REPLICA_MAX_LAG)),
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,185 @@
+# savannah_app/rollups.py
+"""Incremental maintenance of ``CategoryRollup`` rows.
+
+Every product change is applied as a delta to the rollups of the product's
+category and all of its ancestors in a single ``UPDATE`` over the MPTT
+interval. Only min/max can't be maintained from deltas alone, so those are
+re-aggregated for the (few) ancestors whose extreme value was removed.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from .models import Category, CategoryRollup, Product
+
+PRICE_FIELD = DecimalField(max_digits=10, decimal_places=2)
+
+
+def product_snapshot(product):
+    """The rollup-relevant values of a product, or ``None`` if it isn't saved."""
+    if product is None:
+        return None
+    return {
+        'category_id': product.category_id,
+        'price': Decimal(product.price),
+        'stock': product.stock,
+    }
+
+
+def record_product_change(old, new):
+    """Apply the difference between two product snapshots to the rollups."""
+    if old == new:
+        return
+    stale = set()
+    if old and new and old['category_id'] == new['category_id']:
+        price_changed = old['price'] != new['price']
+        stale |= _apply(
+            new['category_id'],
+            count=0,
+            price=new['price'] - old['price'],
+            stock=new['stock'] - old['stock'],
+            added_price=new['price'] if price_changed else None,
+            removed_price=old['price'] if price_changed else None,
+        )
+    else:
+        if old:
+            stale |= _apply(old['category_id'], count=-1, price=-old['price'],
+                            stock=-old['stock'], removed_price=old['price'])
+        if new:
+            stale |= _apply(new['category_id'], count=1, price=new['price'],
+                            stock=new['stock'], added_price=new['price'])
+    if stale:
+        _refresh_extremes(stale)
+
+
+def adjust_stock(deltas):
+    """Apply ``{category_id: stock_delta}`` changes made outside ``Product.save()``."""
+    for category_id, delta in deltas.items():
+        if delta:
+            _apply(category_id, count=0, price=Decimal('0'), stock=delta)
+
+
+def _ancestor_rollups(category_id):
+    node = Category.objects.filter(pk=category_id).values('tree_id', 'lft', 'rght').first()
+    if node is None:
+        return None
+    return CategoryRollup.objects.filter(
+        category__tree_id=node['tree_id'],
+        category__lft__lte=node['lft'],
+        category__rght__gte=node['rght'],
+    )
+
+
+def _apply(category_id, count, price, stock, added_price=None, removed_price=None):
+    """Shift the ancestor rollups of a category; return ids whose min/max went stale."""
+    rollups = _ancestor_rollups(category_id)
+    if rollups is None:
+        return set()
+    # Bulk writes bypass the signals, so a rollup may lag behind the product
+    # table until the next rebuild. Clamp instead of failing the write.
+    updates = {
+        'product_count': Greatest(F('product_count') + count, 0),
+        'price_sum': F('price_sum') + Value(price, output_field=PRICE_FIELD),
+        'stock_total': Greatest(F('stock_total') + stock, 0),
+        'updated_at': timezone.now(),
+    }
+    if added_price is not None:
+        added = Value(added_price, output_field=PRICE_FIELD)
+        updates['price_min'] = Least(Coalesce('price_min', added), added)
+        updates['price_max'] = Greatest(Coalesce('price_max', added), added)
+    rollups.update(**updates)
+
+    if removed_price is None:
+        return set()
+    stale = rollups.filter(Q(price_min=removed_price) | Q(price_max=removed_price))
+    return set(stale.values_list('category_id', flat=True))
+
+
+def _refresh_extremes(category_ids):
+    # Only min/max are re-read from the product table. Counts and sums stay
+    # delta-maintained because during a batch delete the table is already
+    # ahead of the post_delete signals still waiting to be applied.
+    for category in Category.objects.filter(pk__in=list(category_ids)):
+        stats = Product.objects.in_subtree(category).aggregate(
+            minimum=Min('price'), maximum=Max('price'),
+        )
+        CategoryRollup.objects.filter(category=category).update(
+            price_min=stats['minimum'], price_max=stats['maximum'],
+        )
+
+
+def refresh_rollups(category_ids):
+    """Recompute the rollups of the given categories from the product table."""
+    for category in Category.objects.filter(pk__in=list(category_ids)):
+        stats = Product.objects.in_subtree(category).aggregate(
+            count=Count('id'), total=Sum('price'), minimum=Min('price'),
+            maximum=Max('price'), stock=Sum('stock'),
+        )
+        CategoryRollup.objects.update_or_create(
+            category=category,
+            defaults={
+                'product_count': stats['count'],
+                'price_sum': stats['total'] or 0,
+                'price_min': stats['minimum'],
+                'price_max': stats['maximum'],
+                'stock_total': stats['stock'] or 0,
+            },
+        )
+
+
+def refresh_category_paths(category_ids):
+    """Recompute the rollups of the given categories and all their ancestors."""
+    nodes = Category.objects.filter(pk__in=list(category_ids)).values('tree_id', 'lft', 'rght')
+    condition = Q()
+    for node in nodes:
+        condition |= Q(tree_id=node['tree_id'], lft__lte=node['lft'], rght__gte=node['rght'])
+    if condition:
+        refresh_rollups(Category.objects.filter(condition).values_list('pk', flat=True))
+
+
+@transaction.atomic
+def rebuild_rollups():
+    """Rebuild every rollup from scratch in O(categories + products)."""
+    own = {
+        row['category_id']: row
+        for row in Product.objects.order_by().values('category_id').annotate(
+            count=Count('id'), total=Sum('price'), minimum=Min('price'),
+            maximum=Max('price'), stock=Sum('stock'),
+        )
+    }
+    nodes = Category.objects.order_by('-level').values_list('pk', 'parent_id')
+    totals = defaultdict(lambda: {'count': 0, 'total': Decimal('0'), 'minimum': None,
+                                  'maximum': None, 'stock': 0})
+    rollups = []
+    for pk, parent_id in nodes:
+        acc = totals.pop(pk, None) or totals.default_factory()
+        _merge(acc, own.get(pk))
+        if parent_id is not None:
+            _merge(totals[parent_id], acc)
+        rollups.append(CategoryRollup(
+            category_id=pk,
+            product_count=acc['count'],
+            price_sum=acc['total'],
+            price_min=acc['minimum'],
+            price_max=acc['maximum'],
+            stock_total=acc['stock'],
+        ))
+    CategoryRollup.objects.all().delete()
+    CategoryRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+def _merge(acc, stats):
+    if not stats or not stats['count']:
+        return
+    acc['count'] += stats['count']
+    acc['total'] += Decimal(stats['total'] or 0)
+    acc['stock'] += stats['stock'] or 0
+    if acc['minimum'] is None or stats['minimum'] < acc['minimum']:
+        acc['minimum'] = stats['minimum']
+    if acc['maximum'] is None or stats['maximum'] > acc['maximum']:
+        acc['maximum'] = stats['maximum']
@@ -0,0 +1,114 @@
+# savannah_app/search.py
+"""Ranked product search.
+
+Postgres matches against the ``search_vector`` generated column (GIN
+indexed, see migration 0008); SQLite uses the trigger-maintained FTS5 table
+``savannah_app_product_fts``. Both backends expose the same two operations:
+``match`` for full-text queries over name and description, and ``prefix``
+for typeahead over the words of the name. Each annotates ``search_rank``
+(higher is better) so results can be filtered and ordered like any other
+queryset.
+"""
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import Product
+
+MAX_TERMS = 8
+TERM_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Lower-cased word terms of ``text``, capped at ``MAX_TERMS``."""
+    return TERM_RE.findall(text.lower())[:MAX_TERMS]
+
+
+class PostgresProductSearch:
+    def match(self, queryset, text, terms):
+        return self._apply(queryset, "websearch_to_tsquery('english', %s)", text)
+
+    def prefix(self, queryset, terms):
+        # ``:*A`` restricts each prefix to the unstemmed name lexemes.
+        return self._apply(queryset, "to_tsquery('simple', %s)", ' & '.join(f'{term}:*A' for term in terms))
+
+    def _apply(self, queryset, tsquery, param):
+        return queryset.alias(
+            search_match=RawSQL(
+                f'savannah_app_product.search_vector @@ {tsquery}', [param], output_field=BooleanField()
+            ),
+        ).filter(search_match=True).annotate(
+            search_rank=RawSQL(
+                f'ts_rank(savannah_app_product.search_vector, {tsquery})', [param], output_field=FloatField()
+            ),
+        )
+
+
+class SQLiteProductSearch:
+    table = 'savannah_app_product_fts'
+
+    def match(self, queryset, text, terms):
+        return self._apply(queryset, ' '.join(f'"{term}"' for term in terms))
+
+    def prefix(self, queryset, terms):
+        return self._apply(queryset, 'name : (%s)' % ' '.join(f'"{term}"*' for term in terms))
+
+    def _apply(self, queryset, fts_query):
+        # A join against the FTS table scores each match once; a correlated
+        # bm25() subquery would re-run the MATCH for every row.
+        table = self.table
+        return queryset.extra(
+            tables=[table],
+            where=[f'{table}.rowid = savannah_app_product.id', f'{table} MATCH %s'],
+            params=[fts_query],
+            # bm25() is lower-is-better; name hits weigh ten times the description.
+            select={'search_rank': f'-bm25({table}, 10.0, 1.0)'},
+        )
+
+
+BACKENDS = {
+    'postgresql': PostgresProductSearch,
+    'sqlite': SQLiteProductSearch,
+}
+
+
+def get_search_backend():
+    try:
+        return BACKENDS[connection.vendor]()
+    except KeyError:
+        raise ImproperlyConfigured(f'Product search is not available on {connection.vendor}')
+
+
+def filter_products(queryset, category=None, min_price=None, max_price=None, available=None):
+    if category is not None:
+        queryset = queryset.in_subtree(category)
+    if min_price is not None:
+        queryset = queryset.filter(price__gte=min_price)
+    if max_price is not None:
+        queryset = queryset.filter(price__lte=max_price)
+    if available is not None:
+        queryset = queryset.filter(is_available=available)
+    return queryset
+
+
+def search_products(text, queryset=None, **filters):
+    """Products matching ``text``, best match first."""
+    queryset = Product.objects.all() if queryset is None else queryset
+    terms = tokenize(text)
+    if not terms:
+        return queryset.none()
+    queryset = get_search_backend().match(filter_products(queryset, **filters), text, terms)
+    return queryset.order_by('-search_rank', 'id')
+
+
+def suggest_products(text, limit=10, queryset=None, **filters):
+    """``id``/``name``/``slug`` of products whose name has words starting with the terms of ``text``."""
+    queryset = Product.objects.all() if queryset is None else queryset
+    terms = tokenize(text)
+    if not terms:
+        return []
+    queryset = get_search_backend().prefix(filter_products(queryset, **filters), terms)
+    return list(queryset.order_by('-search_rank', 'name').values('id', 'name', 'slug')[:limit])
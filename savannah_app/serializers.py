@@ -1,14 +1,27 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from django.db import transaction
 from rest_framework import serializers
+from . import analytics
+from .inventory import InsufficientStock, held_quantities, rebalance, reserve
 from .models import Category, Product, Customer, Order, OrderItem
+from .order_numbers import next_order_number
+from .order_status import can_transition
+from .pricing import price_items
+from .sparse import SparseSerializerMixin
 
-class CategorySerializer(serializers.ModelSerializer):
+ITEM_BATCH_SIZE = 500
+BULK_STATUS_MAX_ORDERS = 10000
+
+class CategorySerializer(SparseSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'slug', 'description', 'parent', 'is_active', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseSerializerMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
+    expandable_fields = {'category': CategorySerializer}
 
     class Meta:
         model = Product
@@ -16,7 +29,54 @@ class ProductSerializer(serializers.ModelSerializer):
                  'stock', 'is_available', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
-class CustomerSerializer(serializers.ModelSerializer):
+class ProductSearchSerializer(serializers.Serializer):
+    """Query parameters of the product search and suggest endpoints."""
+    q = serializers.CharField(max_length=200)
+    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), required=False)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    available = serializers.BooleanField(required=False, allow_null=True, default=None)
+
+class SalesReportSerializer(serializers.Serializer):
+    """Query parameters of the sales analytics endpoint."""
+    start = serializers.DateField()
+    end = serializers.DateField()
+    bucket = serializers.ChoiceField(choices=['day', 'week', 'month'], default='day')
+    group_by = serializers.ListField(
+        child=serializers.ChoiceField(choices=['category', 'status']), required=False, default=list
+    )
+    status = serializers.ListField(
+        child=serializers.ChoiceField(choices=Order.STATUS_CHOICES), required=False, default=list
+    )
+    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), required=False)
+
+    def validate(self, attrs):
+        if attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({'end': ['Must not be before start.']})
+        return attrs
+
+class ExportSerializer(serializers.Serializer):
+    """Query parameters shared by the streaming export endpoints."""
+    file_format = serializers.ChoiceField(choices=['csv', 'ndjson'], default='csv')
+    compress = serializers.BooleanField(default=False)
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if 'start' in attrs and 'end' in attrs and attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({'end': ['Must not be before start.']})
+        return attrs
+
+class OrderExportSerializer(ExportSerializer):
+    status = serializers.ListField(
+        child=serializers.ChoiceField(choices=Order.STATUS_CHOICES), required=False, default=list
+    )
+
+class ProductExportSerializer(ExportSerializer):
+    available = serializers.BooleanField(required=False, allow_null=True, default=None)
+    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), required=False)
+
+class CustomerSerializer(SparseSerializerMixin, serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     email = serializers.EmailField(source='user.email', read_only=True)
 
@@ -26,16 +86,80 @@ class CustomerSerializer(serializers.ModelSerializer):
                  'postal_code', 'is_active', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class ProductPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """Resolves product ids from a batch preloaded by the parent list serializer."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('queryset', Product.objects.all())
+        super().__init__(**kwargs)
+        self.preloaded = None
+
+    def preload(self, pks):
+        valid = set()
+        for pk in pks:
+            try:
+                valid.add(int(pk))
+            except (TypeError, ValueError):
+                pass
+        self.preloaded = self.get_queryset().in_bulk(valid)
+
+    def to_internal_value(self, data):
+        if self.preloaded is None:
+            return super().to_internal_value(data)
+        try:
+            return self.preloaded[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+class OrderItemListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        # Look every referenced product up in one query instead of one per line.
+        if isinstance(data, list):
+            self.child.fields['product'].preload(
+                item.get('product') for item in data if isinstance(item, dict)
+            )
+        return super().to_internal_value(data)
+
+class OrderItemSerializer(SparseSerializerMixin, serializers.ModelSerializer):
+    product = ProductPrimaryKeyField()
     product_name = serializers.CharField(source='product.name', read_only=True)
+    expandable_fields = {'product': ProductSerializer}
     
     class Meta:
         model = OrderItem
         fields = ['id', 'product', 'product_name', 'quantity', 'price']
+        list_serializer_class = OrderItemListSerializer
+        # Filled in from the catalogue; a client-supplied price must agree.
+        extra_kwargs = {'price': {'required': False}}
+
+class OrderStatusChangeSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+
+class BulkOrderStatusSerializer(serializers.Serializer):
+    """Body of the bulk status endpoint: ``{"orders": [{"id": 1, "status": "shipped"}, ...]}``."""
+    orders = OrderStatusChangeSerializer(many=True, allow_empty=False, max_length=BULK_STATUS_MAX_ORDERS)
 
-class OrderSerializer(serializers.ModelSerializer):
+    def validate_orders(self, value):
+        if len({change['id'] for change in value}) != len(value):
+            raise serializers.ValidationError('Each order may only appear once.')
+        return value
+
+@contextmanager
+def stock_errors():
+    try:
+        yield
+    except InsufficientStock as exc:
+        raise serializers.ValidationError({'items': [
+            f'Product {pk} has only {available} in stock.' for pk, available in exc.shortages.items()
+        ]})
+
+class OrderSerializer(SparseSerializerMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True)
     customer_name = serializers.CharField(source='customer.user.username', read_only=True)
+    expandable_fields = {'customer': CustomerSerializer}
     
     class Meta:
         model = Order
@@ -44,29 +168,111 @@ class OrderSerializer(serializers.ModelSerializer):
                  'shipping_country', 'shipping_postal_code', 'notes', 
                  'items', 'created_at', 'updated_at']
         read_only_fields = ['order_number', 'created_at', 'updated_at']
+        extra_kwargs = {'total_amount': {'required': False}}
+
+    def validate(self, attrs):
+        items = attrs.get('items')
+        if items is None:
+            current = self.instance.total_amount if self.instance is not None else None
+            if attrs.get('total_amount', current) != current:
+                raise serializers.ValidationError({'total_amount': ['The total is computed from the items.']})
+            return attrs
+
+        # Products were preloaded with the items, so pricing needs no queries.
+        cart = price_items(items)
+        errors = {}
+        mismatched = [
+            f'Product {line.product.pk} costs {line.unit_price}, not {item["price"]}.'
+            for line, item in zip(cart.lines, items)
+            if 'price' in item and item['price'] != line.unit_price
+        ]
+        if mismatched:
+            errors['items'] = mismatched
+        if 'total_amount' in attrs and attrs['total_amount'] != cart.total:
+            errors['total_amount'] = [f'Expected {cart.total}.']
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        for line, item in zip(cart.lines, items):
+            item['price'] = line.unit_price
+        attrs['total_amount'] = cart.total
+        return attrs
 
     def create(self, validated_data):
         items_data = validated_data.pop('items')
-        order = Order.objects.create(**validated_data)
-        
+        quantities = Counter()
         for item_data in items_data:
-            OrderItem.objects.create(order=order, **item_data)
-            
+            quantities[item_data['product'].pk] += item_data['quantity']
+        # Take the number before the checkout transaction opens, so the
+        # counter row is locked for one UPDATE rather than the whole checkout.
+        validated_data.setdefault('order_number', next_order_number())
+        with transaction.atomic():
+            with stock_errors():
+                reserve(quantities)
+            order = Order.objects.create(**validated_data)
+            OrderItem.objects.bulk_create(
+                [
+                    OrderItem(order=order, category_id=item_data['product'].category_id, **item_data)
+                    for item_data in items_data
+                ],
+                batch_size=ITEM_BATCH_SIZE
+            )
+            analytics.record_change({}, analytics.order_snapshot([order.pk]))
         return order
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         items_data = validated_data.pop('items', None)
-        
-        # Update order fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
-        if items_data is not None:
-            # Remove existing items
-            instance.items.all().delete()
-            # Create new items
-            for item_data in items_data:
-                OrderItem.objects.create(order=instance, **item_data)
-                
-        return instance
\ No newline at end of file
+        if 'status' in validated_data:
+            # Lock the order so the transition is checked against the status it leaves.
+            instance.status = Order.objects.select_for_update().values_list('status', flat=True).get(pk=instance.pk)
+            new_status = validated_data['status']
+            if not can_transition(instance.status, new_status):
+                raise serializers.ValidationError(
+                    {'status': [f'Cannot move an order from {instance.status} to {new_status}.']}
+                )
+        held = held_quantities(instance)
+
+        with analytics.tracking([instance.pk]):
+            # Update order fields
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+
+            if items_data is not None:
+                self._sync_items(instance, items_data)
+
+        with stock_errors():
+            rebalance(instance, held)
+
+        return instance
+
+    def _sync_items(self, order, items_data):
+        """Diff the submitted lines against the stored ones, matched by product.
+
+        Unchanged lines are left alone; changed lines, new lines and removed
+        lines each cost one batched statement.
+        """
+        existing = defaultdict(list)
+        for item in order.items.order_by('id'):
+            existing[item.product_id].append(item)
+
+        to_create, to_update = [], []
+        for item_data in items_data:
+            matches = existing.get(item_data['product'].pk)
+            if not matches:
+                to_create.append(OrderItem(order=order, category_id=item_data['product'].category_id, **item_data))
+                continue
+            item = matches.pop(0)
+            if item.quantity != item_data['quantity'] or item.price != item_data['price']:
+                item.quantity = item_data['quantity']
+                item.price = item_data['price']
+                to_update.append(item)
+
+        stale = [item.pk for items in existing.values() for item in items]
+        if stale:
+            OrderItem.objects.filter(pk__in=stale).delete()
+        if to_update:
+            OrderItem.objects.bulk_update(to_update, ['quantity', 'price'], batch_size=ITEM_BATCH_SIZE)
+        if to_create:
+            OrderItem.objects.bulk_create(to_create, batch_size=ITEM_BATCH_SIZE)
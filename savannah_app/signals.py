@@ -0,0 +1,58 @@
+# savannah_app/signals.py
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import analytics, caching, rollups
+from .models import Category, CategoryRollup, Order, Product
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_state(sender, instance, raw=False, **kwargs):
+    instance._rollup_previous = None
+    if instance.pk and not raw:
+        previous = Product.objects.filter(pk=instance.pk).values('category_id', 'price', 'stock').first()
+        instance._rollup_previous = previous and rollups.product_snapshot(Product(**previous))
+
+
+@receiver(post_save, sender=Product)
+def update_rollups_on_product_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    rollups.record_product_change(previous, rollups.product_snapshot(instance))
+    caching.invalidate_products(
+        [instance.pk], {instance.category_id, previous and previous['category_id']}
+    )
+
+
+@receiver(post_delete, sender=Product)
+def update_rollups_on_product_delete(sender, instance, **kwargs):
+    rollups.record_product_change(rollups.product_snapshot(instance), None)
+    caching.invalidate_products([instance.pk], [instance.category_id])
+
+
+@receiver(post_save, sender=Category)
+def update_rollups_on_category_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # Moves renumber lft/rght across the tree, so every category payload goes.
+    caching.invalidate_categories()
+    if created:
+        CategoryRollup.objects.get_or_create(category=instance)
+    previous = instance.__dict__.pop('_previous_ancestor_ids', None)
+    if previous is not None:
+        # A moved subtree keeps its own totals; only the old and new
+        # ancestor paths need to be recomputed.
+        new = instance.get_ancestors().values_list('pk', flat=True)
+        rollups.refresh_rollups(set(previous) | set(new))
+
+
+@receiver(post_delete, sender=Category)
+def invalidate_cache_on_category_delete(sender, instance, **kwargs):
+    caching.invalidate_categories()
+
+
+@receiver(pre_delete, sender=Order)
+def remove_order_from_sales_summaries(sender, instance, **kwargs):
+    # Runs before the cascade takes the order's lines with it.
+    analytics.record_change(analytics.order_snapshot([instance.pk]), {})
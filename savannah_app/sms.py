@@ -0,0 +1,235 @@
+# savannah_app/sms.py
+"""Process-wide SMS gateway client.
+
+One ``SMSClient`` lives per worker process. It keeps HTTP connections to
+the gateway alive between messages, merges messages with identical text
+into multi-recipient requests and throttles requests with a token
+bucket. The transport is pluggable through ``settings.SMS_BACKEND`` so tests
+and benchmarks can run against the in-memory gateway.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+AT_PRODUCTION_URL = 'https://api.africastalking.com/version1/messaging'
+AT_SANDBOX_URL = 'https://api.sandbox.africastalking.com/version1/messaging'
+# Recipient statusCodes for accepted messages: processed, sent, queued.
+AT_ACCEPTED_STATUS_CODES = {100, 101, 102}
+
+
+def _number_key(number):
+    # The gateway echoes numbers in international form; match on the
+    # subscriber digits so local-format numbers still line up.
+    return re.sub(r'\D', '', str(number))[-9:]
+
+
+def split_recipients(response, recipients):
+    """``(sent, failed)`` for ``recipients`` from a gateway ``response``.
+
+    ``sent`` lists the numbers the gateway accepted, per
+    ``SMSMessageData.Recipients[].status``; ``failed`` maps every other
+    number to its status (``RequestFailed`` when there is no response,
+    ``Missing`` when the gateway did not mention it).
+    """
+    if response is None:
+        return [], dict.fromkeys(recipients, 'RequestFailed')
+    statuses = {}
+    for entry in (response.get('SMSMessageData') or {}).get('Recipients') or ():
+        accepted = entry.get('statusCode') in AT_ACCEPTED_STATUS_CODES or entry.get('status') == 'Success'
+        statuses[_number_key(entry.get('number', ''))] = 'Success' if accepted else entry.get('status') or 'Failed'
+    sent, failed = [], {}
+    for number in recipients:
+        status = statuses.get(_number_key(number), 'Missing')
+        if status == 'Success':
+            sent.append(number)
+        else:
+            failed[number] = status
+    return sent, failed
+
+
+class BaseSMSBackend:
+    def send(self, message, recipients):
+        """Deliver ``message`` to every phone number in ``recipients``."""
+        raise NotImplementedError
+
+
+class AfricasTalkingBackend(BaseSMSBackend):
+    """Africa's Talking messaging API over a pooled keep-alive session."""
+
+    def __init__(self, pool_size=10, timeout=10):
+        self.username = settings.AT_USERNAME
+        self.sender_id = getattr(settings, 'AT_SENDER_ID', None)
+        self.url = AT_SANDBOX_URL if self.username == 'sandbox' else AT_PRODUCTION_URL
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Accept': 'application/json',
+            'ApiKey': settings.AT_API_KEY,
+        })
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+
+    def send(self, message, recipients):
+        data = {
+            'username': self.username,
+            'to': ','.join(recipients),
+            'message': message,
+            'bulkSMSMode': 1,
+        }
+        if self.sender_id and self.username != 'sandbox':
+            data['from'] = self.sender_id
+        response = self.session.post(self.url, data=data, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+class LocMemSMSBackend(BaseSMSBackend):
+    """Fake gateway that records requests in ``outbox``.
+
+    ``latency`` (seconds) simulates the network round trip for benchmarks.
+    """
+
+    def __init__(self, latency=0):
+        self.latency = latency
+        self.outbox = []
+        self._lock = threading.Lock()
+
+    def send(self, message, recipients):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.outbox.append({'message': message, 'recipients': list(recipients)})
+        return {
+            'SMSMessageData': {
+                'Message': f'Sent to {len(recipients)}/{len(recipients)}',
+                'Recipients': [{'number': number, 'status': 'Success'} for number in recipients],
+            }
+        }
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing ``rate`` requests per second."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class SMSClient:
+    def __init__(self, backend, rate_limiter=None, max_recipients=100, concurrency=4):
+        self.backend = backend
+        self.rate_limiter = rate_limiter or RateLimiter(0)
+        self.max_recipients = max_recipients
+        self.concurrency = concurrency
+
+    def send(self, phone_number, message):
+        return self.send_to_many(message, [phone_number])[0]
+
+    def send_to_many(self, message, recipients):
+        """Send one text to many numbers, ``max_recipients`` per request."""
+        responses = []
+        for start in range(0, len(recipients), self.max_recipients):
+            self.rate_limiter.acquire()
+            responses.append(self.backend.send(message, recipients[start:start + self.max_recipients]))
+        return responses
+
+    def send_bulk(self, messages):
+        """Send ``(phone_number, message)`` pairs, coalescing identical texts.
+
+        The gateway takes one text per request, so only pairs sharing a text
+        can share a request. Requests are dispatched concurrently over the
+        pooled connections. Returns ``(message, sent, failed)`` per request,
+        as ``split_recipients`` reports them.
+        """
+        by_text = defaultdict(dict)
+        for phone_number, message in messages:
+            by_text[message][phone_number] = None
+        batches = []
+        for message, numbers in by_text.items():
+            recipients = list(numbers)
+            for start in range(0, len(recipients), self.max_recipients):
+                batches.append((message, recipients[start:start + self.max_recipients]))
+        if not batches:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as pool:
+            responses = list(pool.map(lambda batch: self._send_batch(*batch), batches))
+        results = []
+        for (message, recipients), response in zip(batches, responses):
+            sent, failed = split_recipients(response, recipients)
+            if failed:
+                logger.warning(
+                    'SMS not accepted for %d of %d recipients (%s)',
+                    len(failed), len(recipients), ', '.join(sorted(set(failed.values()))),
+                )
+            results.append((message, sent, failed))
+        return results
+
+    def _send_batch(self, message, recipients):
+        self.rate_limiter.acquire()
+        try:
+            return self.backend.send(message, recipients)
+        except Exception:
+            logger.exception('SMS request to %d recipients failed', len(recipients))
+            return None
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_sms_client():
+    """Return this process's client, building it on first use (and after fork)."""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            backend = import_string(settings.SMS_BACKEND)(**getattr(settings, 'SMS_BACKEND_OPTIONS', {}))
+            _client = SMSClient(
+                backend,
+                rate_limiter=RateLimiter(settings.SMS_RATE_LIMIT),
+                max_recipients=settings.SMS_MAX_RECIPIENTS,
+                concurrency=settings.SMS_CONCURRENCY,
+            )
+            _client_pid = os.getpid()
+        return _client
+
+
+def reset_sms_client():
+    global _client
+    with _client_lock:
+        _client = None
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting, **kwargs):
+    if setting.startswith('SMS_') or setting.startswith('AT_'):
+        reset_sms_client()
@@ -0,0 +1,157 @@
+# savannah_app/sparse.py
+"""Sparse fieldsets (``?fields=``) and embedded expansion (``?expand=``).
+
+``?fields=id,name,price`` limits a read response to the named fields, and
+dotted names reach into nested objects (``items.quantity``). ``?expand=``
+replaces a relation's primary key with the related object
+(``category``, ``items.product``). Both trim the serializer and the query
+behind it: deferred columns with ``only()``, joins for dotted sources and
+expanded relations, and a prefetch only for nested lists that were asked
+for, so payload size and database I/O follow what the client requested.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_paths(value):
+    """``'id,items.quantity'`` -> ``{'id': None, 'items': {'quantity': None}}``.
+
+    ``None`` stands for every field of that object.
+    """
+    tree = {}
+    for path in value.split(','):
+        names = [name.strip() for name in path.split('.')]
+        if not all(names):
+            continue
+        node = tree
+        for name in names[:-1]:
+            if node.get(name, {}) is None:
+                break  # the whole object was already requested
+            node = node.setdefault(name, {})
+        else:
+            node[names[-1]] = None
+    return tree
+
+
+class SparseSerializerMixin:
+    """Accept ``fields`` and ``expand`` trees from ``parse_paths``.
+
+    ``expandable_fields`` maps a relation field to the serializer class
+    that replaces its primary key when it is expanded.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None or expand:
+            self.sparse(fields, expand)
+
+    def sparse(self, fields, expand, path=''):
+        """Expand and drop ``self.fields`` in place, recursing into nested serializers."""
+        expand = expand or {}
+        for name in expand:
+            if name in self.expandable_fields:
+                self.fields[name] = self.expandable_fields[name](read_only=True)
+            elif not isinstance(getattr(self.fields.get(name), 'child', self.fields.get(name)), SparseSerializerMixin):
+                raise serializers.ValidationError({'expand': [f'Cannot expand "{path}{name}".']})
+        if fields is not None:
+            unknown = [name for name in fields if name not in self.fields]
+            if unknown:
+                raise serializers.ValidationError({'fields': [f'Unknown field "{path}{name}".' for name in unknown]})
+            for name in list(self.fields):
+                if name not in fields:
+                    self.fields.pop(name)
+        for name, field in self.fields.items():
+            child = getattr(field, 'child', field)
+            nested_fields = fields and fields.get(name)
+            if isinstance(child, SparseSerializerMixin):
+                child.sparse(nested_fields, expand.get(name), f'{path}{name}.')
+            elif nested_fields:
+                raise serializers.ValidationError({'fields': [f'"{path}{name}" has no fields to select.']})
+
+
+def trim_queryset(queryset, serializer):
+    """``queryset`` loading only what ``serializer`` outputs."""
+    try:
+        only, related, prefetches = load_plan(serializer, queryset.model)
+    except FieldDoesNotExist:
+        # A source that is not a model field (a property, say): load everything.
+        return queryset
+    queryset = queryset.select_related(None).prefetch_related(None).only(*only)
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.prefetch_related(*prefetches)
+
+
+def load_plan(serializer, model, prefix=''):
+    """``(only, select_related, prefetches)`` for ``serializer`` over ``model``."""
+    only, related, prefetches = [], [], []
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        attrs = field.source_attrs
+        # Each relation a dotted source crosses must be loaded and joined.
+        owner = model
+        for i, attr in enumerate(attrs[:-1], 1):
+            lookup = prefix + '__'.join(attrs[:i])
+            only.append(lookup)
+            related.append(lookup)
+            owner = owner._meta.get_field(attr).related_model
+        lookup = prefix + '__'.join(attrs)
+        model_field = owner._meta.get_field(attrs[-1])
+        if isinstance(field, serializers.ListSerializer):
+            reverse = model_field.remote_field.name
+            child_only, child_related, child_prefetches = load_plan(field.child, model_field.related_model)
+            items = model_field.related_model.objects.only(reverse, *child_only).order_by('pk')
+            if child_related:
+                items = items.select_related(*child_related)
+            prefetches.append(Prefetch(lookup, queryset=items.prefetch_related(*child_prefetches)))
+        elif isinstance(field, serializers.BaseSerializer):
+            only.append(lookup)
+            related.append(lookup)
+            nested = load_plan(field, model_field.related_model, lookup + '__')
+            only += nested[0]
+            related += nested[1]
+            prefetches += nested[2]
+        else:
+            only.append(lookup)
+    return only, related, prefetches
+
+
+class SparseFieldsMixin:
+    """``?fields=`` and ``?expand=`` for a viewset's read requests.
+
+    The serializer is trimmed through ``get_serializer`` and the queryset
+    through ``filter_queryset``, which both list and detail views apply;
+    write requests are left alone so no field is ever dropped from
+    validation.
+    """
+    _sparse = None
+
+    def get_sparse_fieldset(self):
+        """``{'fields': ..., 'expand': ...}`` for this request, or ``None``."""
+        if self._sparse is None:
+            params = self.request.query_params
+            self._sparse = {}
+            if self.request.method in SAFE_METHODS and ('fields' in params or 'expand' in params):
+                self._sparse = {
+                    'fields': parse_paths(params['fields']) if 'fields' in params else None,
+                    'expand': parse_paths(params.get('expand', '')),
+                }
+        return self._sparse or None
+
+    def get_sparse_serializer(self):
+        """The trimmed serializer, or ``None`` when every field is wanted."""
+        return self.get_serializer() if self.get_sparse_fieldset() else None
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(self.get_sparse_fieldset() or {})
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.get_sparse_fieldset():
+            queryset = trim_queryset(queryset, self.get_serializer())
+        return queryset
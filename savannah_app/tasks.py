@@ -0,0 +1,165 @@
+# savannah_app/tasks.py
+from collections import defaultdict
+
+from celery import group, shared_task
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .models import NotificationDelivery
+from .notifications import flush_admin_email_digest, queue_admin_email
+from .sms import split_recipients
+from .utils import (
+    load_order_notification_context, load_order_notification_contexts, render_bulk_sms, render_order_messages,
+    send_bulk_sms, send_sms,
+)
+
+
+class NotificationFailed(Exception):
+    pass
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(NotificationFailed,),
+    retry_backoff=True,
+    retry_backoff_max=600,
+    max_retries=5,
+)
+def deliver_order_notification(self, order_id, kind, status, transition=''):
+    """Send the SMS and admin email for one order event.
+
+    Each channel is recorded under an idempotency key of
+    ``kind:order:status:transition:channel`` once delivered, so retries and
+    duplicate enqueues only resend what hasn't gone out yet, while an order
+    that returns to a status later is notified again.
+    """
+    context = load_order_notification_context(order_id, status)
+    if context is None:
+        return 'missing'
+    # The context describes the status the event was raised for, even if
+    # the order has moved on since it was queued.
+    sms_message, subject, message_content = render_order_messages(kind, context)
+    senders = {
+        'sms': lambda: bool(split_recipients(send_sms(context['phone'], sms_message), [context['phone']])[0]),
+        'email': lambda: queue_admin_email(subject, message_content, status=status),
+    }
+
+    keys = {channel: f'{kind}:{order_id}:{status}:{transition}:{channel}' for channel in senders}
+    delivered = set(NotificationDelivery.objects.filter(key__in=keys.values()).values_list('key', flat=True))
+
+    failed = []
+    for channel, send in senders.items():
+        key = keys[channel]
+        if key in delivered:
+            continue
+        if not send():
+            failed.append(channel)
+            continue
+        try:
+            NotificationDelivery.objects.create(key=key, order_id=order_id, channel=channel)
+        except IntegrityError:
+            pass
+    if failed:
+        raise NotificationFailed(f"Order {order_id} {kind} not delivered via {', '.join(failed)}")
+    return 'sent'
+
+
+@shared_task
+def flush_admin_email_digest_task():
+    """Periodic flush of the admin email digest buffer (see CELERY_BEAT_SCHEDULE)."""
+    return flush_admin_email_digest()
+
+
+def transition_id(changed_at):
+    """Tell apart status changes of one order by when they were saved."""
+    return changed_at.strftime('%Y%m%d%H%M%S%f')
+
+
+def queue_order_confirmation(order):
+    """Queue the new-order notifications once the current transaction commits."""
+    status, transition = order.status, transition_id(order.updated_at)
+    transaction.on_commit(
+        lambda: deliver_order_notification.delay(order.pk, 'confirmation', status, transition)
+    )
+
+
+def queue_order_notification(order):
+    """Queue the status-update notifications once the current transaction commits."""
+    status, transition = order.status, transition_id(order.updated_at)
+    transaction.on_commit(
+        lambda: deliver_order_notification.delay(order.pk, 'status', status, transition)
+    )
+
+
+def queue_order_notifications(order_ids, status, changed_at):
+    """Queue status-update notifications for many orders as one message after commit."""
+    order_ids, transition = list(order_ids), transition_id(changed_at)
+    transaction.on_commit(
+        lambda: fan_out_order_notifications.delay(order_ids, 'status', status, transition)
+    )
+
+
+@shared_task
+def fan_out_order_notifications(order_ids, kind, status, transition=''):
+    """Split a batched event into chunks of orders, each delivered and retried on its own."""
+    size = settings.ORDER_NOTIFICATION_CHUNK_SIZE
+    group(
+        deliver_order_notifications.s(order_ids[start:start + size], kind, status, transition)
+        for start in range(0, len(order_ids), size)
+    ).apply_async()
+    return len(order_ids)
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(NotificationFailed,),
+    retry_backoff=True,
+    retry_backoff_max=600,
+    max_retries=5,
+)
+def deliver_order_notifications(self, order_ids, kind, status, transition=''):
+    """Send the SMS and admin emails for a chunk of orders sharing one event.
+
+    Each customer gets one text from the batched template counting their
+    orders in the chunk, so the whole chunk goes out in a few
+    multi-recipient gateway requests. Deliveries are recorded
+    under the same per-order keys as ``deliver_order_notification``, so a
+    retry only resends to the orders that were missed.
+    """
+    contexts = load_order_notification_contexts(order_ids, status)
+    keys = {
+        (order_id, channel): f'{kind}:{order_id}:{status}:{transition}:{channel}'
+        for order_id in contexts for channel in ('sms', 'email')
+    }
+    delivered = set(NotificationDelivery.objects.filter(key__in=keys.values()).values_list('key', flat=True))
+    pending = {target for target, key in keys.items() if key not in delivered}
+
+    by_phone = defaultdict(list)
+    for order_id, context in contexts.items():
+        if (order_id, 'sms') in pending:
+            by_phone[context['phone']].append(order_id)
+    sms = {
+        phone: render_bulk_sms(kind, contexts[ids[0]], order_count=len(ids))
+        for phone, ids in by_phone.items()
+    }
+    results = send_bulk_sms(list(sms.items())) if sms else []
+    sent = {(phone, message) for message, numbers, _ in results or () for phone in numbers}
+    done = [
+        (order_id, 'sms')
+        for phone, ids in by_phone.items() if (phone, sms[phone]) in sent for order_id in ids
+    ]
+
+    for order_id, context in contexts.items():
+        if (order_id, 'email') in pending:
+            _, subject, message_content = render_order_messages(kind, context)
+            if queue_admin_email(subject, message_content, status=status):
+                done.append((order_id, 'email'))
+
+    NotificationDelivery.objects.bulk_create([
+        NotificationDelivery(key=keys[order_id, channel], order_id=order_id, channel=channel)
+        for order_id, channel in done
+    ], ignore_conflicts=True)
+    failed = len(pending) - len(done)
+    if failed:
+        raise NotificationFailed(f'{failed} of {len(pending)} {kind} notifications not delivered')
+    return len(done)
@@ -0,0 +1,52 @@
+# savannah_app/tests/conftest.py
+"""Catalogue and order builders shared by the app's tests."""
+from decimal import Decimal
+
+from savannah_app.models import Order, OrderItem, Product
+from savannah_app.serializers import OrderSerializer
+
+SHIPPING = {'shipping_address': 'a', 'shipping_city': 'b', 'shipping_country': 'c', 'shipping_postal_code': 'd'}
+
+
+def make_product(category, slug, price='5.00', stock=100, **fields):
+    fields.setdefault('name', slug)
+    fields.setdefault('description', '')
+    return Product.objects.create(slug=slug, price=Decimal(price), category=category, stock=stock, **fields)
+
+
+def make_products(category, prices, stock=100):
+    """One product per price, slugged ``<category>-<price>``."""
+    return [
+        make_product(category, f'{category.slug}-{price}', price, stock, name=f'{category.slug} {price}')
+        for price in prices
+    ]
+
+
+def order_payload(customer, lines, **extra):
+    """OrderSerializer data for ``(product, quantity)`` lines; prices come from the catalogue."""
+    return {
+        'customer': customer.id, **SHIPPING,
+        'items': [{'product': product.id, 'quantity': quantity} for product, quantity in lines],
+        **extra,
+    }
+
+
+def place_order(customer, lines):
+    """Check out through OrderSerializer, reserving stock and pricing the lines."""
+    serializer = OrderSerializer(data=order_payload(customer, lines))
+    serializer.is_valid(raise_exception=True)
+    return serializer.save()
+
+
+def make_order(customer, product, status='pending', quantities=(1,), created_at=None):
+    """Write an order and its lines directly, bypassing checkout."""
+    order = Order.objects.create(customer=customer, status=status, total_amount='5.00', **SHIPPING)
+    for quantity in quantities:
+        OrderItem.objects.create(order=order, product=product, quantity=quantity, price='5.00')
+    if created_at is not None:
+        Order.objects.filter(pk=order.pk).update(created_at=created_at)
+    return order
+
+
+def stock(product):
+    return Product.objects.values_list('stock', flat=True).get(pk=product.pk)
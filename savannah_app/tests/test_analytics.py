@@ -0,0 +1,178 @@
+# savannah_app/tests/test_analytics.py
+import pytest
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from unittest.mock import patch
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from savannah_app.analytics import rebuild_summaries
+from savannah_app.models import Category, DailySalesSummary, Order, Product
+from savannah_app.order_status import transition_orders
+from savannah_app.serializers import OrderSerializer
+from savannah_app.tests.conftest import make_product, place_order, stock
+
+
+def summaries():
+    return {
+        (row.day, row.category_id, row.status): (row.order_count, row.item_count, row.revenue)
+        for row in DailySalesSummary.objects.all()
+        if row.order_count or row.item_count or row.revenue
+    }
+
+
+@pytest.fixture
+def catalogue(category):
+    other = Category.objects.create(name='Other', slug='other')
+    return make_product(category, 'a', '10.00'), make_product(other, 'b', '2.50')
+
+
+@pytest.fixture
+def mock_fan_out():
+    with patch('savannah_app.tasks.fan_out_order_notifications.delay') as delay:
+        yield delay
+
+
+# Summary deltas are applied on commit, which a test transaction never reaches.
+@pytest.mark.django_db(transaction=True)
+class TestIncrementalSummaries:
+    def test_order_writes_keep_summaries_in_step(self, authenticated_client, customer, catalogue, mock_fan_out):
+        a, b = catalogue
+        first = place_order(customer, [(a, 2), (b, 4)])
+        second = place_order(customer, [(a, 1)])
+        today = first.created_at.date()
+        assert summaries() == {
+            (today, a.category_id, 'pending'): (2, 3, Decimal('30.00')),
+            (today, b.category_id, 'pending'): (1, 4, Decimal('10.00')),
+            (today, None, 'pending'): (2, 7, Decimal('40.00')),
+        }
+
+        transition_orders({first.pk: 'processing'})
+        serializer = OrderSerializer(second, data={'items': [{'product': b.id, 'quantity': 2}]}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        url = reverse('order-update-status', kwargs={'pk': second.pk})
+        assert authenticated_client.post(url, {'status': 'cancelled'}).status_code == status.HTTP_200_OK
+
+        incremental = summaries()
+        rebuild_summaries()
+        assert incremental == summaries()
+        assert incremental[today, None, 'cancelled'] == (1, 2, Decimal('5.00'))
+
+        Order.objects.all().delete()
+        assert summaries() == {}
+
+    def test_recategorised_products_keep_their_sales_category(self, customer, catalogue, mock_fan_out):
+        a, b = catalogue
+        order = place_order(customer, [(a, 2)])
+        today = order.created_at.date()
+        original = a.category_id
+        Product.objects.filter(pk=a.pk).update(category=b.category_id)
+
+        transition_orders({order.pk: 'cancelled'})
+        assert summaries() == {
+            (today, original, 'cancelled'): (1, 2, Decimal('20.00')),
+            (today, None, 'cancelled'): (1, 2, Decimal('20.00')),
+        }
+        assert not DailySalesSummary.objects.filter(order_count__lt=0).exists()
+        incremental = summaries()
+        rebuild_summaries()
+        assert incremental == summaries()
+
+    def test_admin_edits_keep_summaries_and_stock_in_step(self, client, user, customer, catalogue):
+        a, b = catalogue
+        order = place_order(customer, [(a, 2)])
+        line = order.items.get()
+        client.force_login(user)
+        fields = {
+            field: getattr(order, field) for field in (
+                'order_number', 'total_amount', 'shipping_address', 'shipping_city',
+                'shipping_country', 'shipping_postal_code', 'notes',
+            )
+        }
+        response = client.post(reverse('admin:savannah_app_order_change', args=[order.pk]), {
+            **fields, 'customer': customer.pk, 'status': 'processing',
+            'items-TOTAL_FORMS': 2, 'items-INITIAL_FORMS': 1,
+            'items-0-id': line.pk, 'items-0-order': order.pk, 'items-0-product': a.pk,
+            'items-0-quantity': 3, 'items-0-price': '10.00',
+            'items-1-order': order.pk, 'items-1-product': b.pk, 'items-1-quantity': 4, 'items-1-price': '2.50',
+        })
+        assert response.status_code == 302
+        assert (stock(a), stock(b)) == (97, 96)
+        incremental = summaries()
+        rebuild_summaries()
+        assert incremental == summaries()
+        assert incremental[order.created_at.date(), None, 'processing'][:2] == (1, 7)
+
+        client.post(reverse('admin:savannah_app_order_delete', args=[order.pk]), {'post': 'yes'})
+        assert (stock(a), stock(b)) == (100, 100)
+        assert summaries() == {}
+
+    def test_summaries_change_after_the_checkout_commits(self, customer, catalogue):
+        a, _ = catalogue
+        with transaction.atomic():
+            place_order(customer, [(a, 1)])
+            assert not DailySalesSummary.objects.exists()
+        assert len(summaries()) == 2
+
+
+@pytest.mark.django_db
+class TestSalesEndpoint:
+    url = reverse('sales-analytics-list')
+
+    @pytest.fixture
+    def history(self, customer, catalogue):
+        a, b = catalogue
+        days = [datetime(2026, 3, d, 12, tzinfo=timezone.utc) for d in (2, 3, 3, 10, 31)]
+        for when in days:
+            order = place_order(customer, [(a, 1), (b, 2)])
+            Order.objects.filter(pk=order.pk).update(created_at=when)
+        Order.objects.filter(created_at__day=31).update(status='shipped')
+        call_command('backfill_sales_summaries')
+        return a, b
+
+    def test_sums_day_buckets_over_a_range(self, authenticated_client, history):
+        response = authenticated_client.get(self.url, {'start': '2026-03-01', 'end': '2026-03-09'})
+        assert response.status_code == status.HTTP_200_OK
+        assert [(r['period'], r['orders'], r['revenue']) for r in response.data['results']] == [
+            (date(2026, 3, 2), 1, '15.00'), (date(2026, 3, 3), 2, '30.00'),
+        ]
+        assert response.data['totals'] == {'orders': 3, 'items': 9, 'revenue': '45.00'}
+
+    def test_month_buckets_grouped_by_status(self, authenticated_client, history):
+        response = authenticated_client.get(self.url, {
+            'start': '2026-01-01', 'end': '2026-12-31', 'bucket': 'month', 'group_by': 'status',
+        })
+        assert [(r['period'], r['status'], r['orders']) for r in response.data['results']] == [
+            (date(2026, 3, 1), 'pending', 4), (date(2026, 3, 1), 'shipped', 1),
+        ]
+
+    def test_category_subtree_and_status_filters(self, authenticated_client, history):
+        a, _ = history
+        response = authenticated_client.get(self.url, {
+            'start': '2026-03-01', 'end': '2026-03-31', 'bucket': 'month',
+            'category': a.category_id, 'status': 'pending',
+        })
+        assert response.data['totals'] == {'orders': 4, 'items': 4, 'revenue': '40.00'}
+
+    def test_query_count_does_not_grow_with_orders(self, authenticated_client, customer, history):
+        a, _ = history
+        params = {'start': '2026-03-01', 'end': '2026-03-31', 'group_by': ['category', 'status']}
+        counts = []
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as ctx:
+                assert authenticated_client.get(self.url, params).status_code == status.HTTP_200_OK
+            counts.append(len(ctx.captured_queries))
+            for _ in range(5):
+                place_order(customer, [(a, 1)])
+        assert counts[0] == counts[1]
+
+    def test_validates_parameters_and_requires_staff(self, authenticated_client, user, history):
+        response = authenticated_client.get(self.url, {'start': '2026-03-10', 'end': '2026-03-01'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        user.is_staff = False
+        user.save()
+        response = authenticated_client.get(self.url, {'start': '2026-03-01', 'end': '2026-03-31'})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,154 @@
+# savannah_app/tests/test_async_views.py
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connections
+from django.http import HttpResponse
+from django.test import AsyncClient, Client, RequestFactory, override_settings
+from django.urls import resolve
+from rest_framework import status
+from savannah_app import health_views, replicas
+from savannah_app.models import Order, OrderItem, Product
+from savannah_app.replicas import PIN_COOKIE, ReplicaPinningMiddleware
+
+ASYNC_URLS = 'savannah_app.async_urls'
+
+
+@pytest.fixture
+def clients(user):
+    sync, aio = Client(), AsyncClient()
+    sync.force_login(user)
+    aio.force_login(user)
+    return sync, aio
+
+
+@pytest.fixture
+def orders(customer, product):
+    for status_ in ('pending', 'delivered', 'pending'):
+        order = Order.objects.create(
+            customer=customer, status=status_, total_amount='2.00', shipping_address='a',
+            shipping_city='b', shipping_country='c', shipping_postal_code='d',
+        )
+        OrderItem.objects.create(order=order, product=product, quantity=2, price='1.00')
+
+
+def aget(client, url, data=None, headers=None):
+    async def get():
+        return await client.get(url, data or {}, headers=headers)
+    return async_to_sync(get)()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url, params', [
+    ('/products/', {}),
+    ('/products/', {'fields': 'id,name,category.name', 'expand': 'category', 'ordering': '-price'}),
+    ('/products/', {'min_price': '50', 'page_size': '1'}),
+    ('/categories/', {}),
+    ('/categories/', {'fields': 'id,slug'}),
+    ('/orders/history/', {}),
+    ('/orders/history/', {'status': 'pending', 'fields': 'order_number,items.quantity'}),
+])
+def test_async_views_match_the_viewsets(clients, orders, url, params, settings):
+    settings.CATALOGUE_CACHE_ENABLED = False
+    sync_client, async_client = clients
+    expected = sync_client.get(url, params)
+    assert expected.status_code == status.HTTP_200_OK, expected.content
+    with override_settings(ROOT_URLCONF=ASYNC_URLS):
+        assert asyncio.iscoroutinefunction(resolve(url).func)
+        response = aget(async_client, url, params)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == expected.content
+    assert response['ETag'] == expected['ETag']
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(ASYNC_URLS)
+class TestAsyncViews:
+    def test_not_modified_and_unauthenticated(self, clients, product):
+        _, async_client = clients
+        etag = aget(async_client, '/products/')['ETag']
+        response = aget(async_client, '/products/', headers={'If-None-Match': etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED and response['ETag'] == etag
+
+        response = aget(AsyncClient(), '/orders/history/')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED and 'WWW-Authenticate' in response
+        assert response.json() == {'detail': 'Authentication credentials were not provided.'}
+
+    def test_invalid_parameters_are_rejected(self, clients, product):
+        _, async_client = clients
+        response = aget(async_client, '/products/', {'fields': 'colour'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {'fields': ['Unknown field "colour".']}
+        assert aget(async_client, '/products/', {'page': 9}).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_cache_is_shared_with_the_sync_views(self, clients, product):
+        sync_client, async_client = clients
+        assert aget(async_client, '/products/')['X-Cache'] == 'MISS'
+        assert aget(async_client, '/products/')['X-Cache'] == 'HIT'
+        with override_settings(ROOT_URLCONF='savannah_app.urls'):
+            assert sync_client.get('/products/')['X-Cache'] == 'HIT'
+
+    def test_writes_go_to_the_viewset(self, clients, category):
+        _, async_client = clients
+
+        async def post():
+            return await async_client.post('/products/', {
+                'name': 'New', 'slug': 'new', 'description': 'd', 'price': '1.00', 'category': category.pk,
+            })
+        response = async_to_sync(post)()
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Product.objects.filter(slug='new').exists()
+
+
+@pytest.mark.django_db
+def test_health_check_reports_replicas(monkeypatch, settings):
+    response = Client().get('/health/')
+    assert response.status_code == 200
+    assert response.json() == {'status': 'healthy', 'database': 'healthy'}
+
+    settings.DATABASE_REPLICAS = ['replica_1', 'replica_2']
+    settings.DATABASE_REPLICA_MAX_LAG = 5
+    monkeypatch.setattr(replicas, 'replica_lag', {'replica_1': 9.0, 'replica_2': None}.get)
+    response = aget(AsyncClient(), '/health/')
+    assert response.status_code == 200
+    assert response.json()['replicas'] == {'replica_1': 'lagging', 'replica_2': 'unreachable'}
+
+
+@pytest.mark.django_db
+def test_health_check_connects_with_its_own_timeouts(monkeypatch):
+    probe = health_views.check_connection()
+    key = 'timeout' if probe.vendor == 'sqlite' else 'connect_timeout'
+    assert probe is not connections['default']
+    assert probe.settings_dict['OPTIONS'][key] == health_views.HEALTH_CHECK_TIMEOUT
+    assert key not in connections['default'].settings_dict['OPTIONS']
+
+    check_connection = health_views.check_connection
+
+    def unreachable(alias='default'):
+        probe = check_connection(alias)
+        probe.settings_dict.update(
+            {'NAME': '/nonexistent/db.sqlite3'} if probe.vendor == 'sqlite' else {'HOST': '127.0.0.1', 'PORT': 1}
+        )
+        return probe
+    monkeypatch.setattr(health_views, 'check_connection', unreachable)
+    response = Client().get('/health/')
+    assert response.status_code == 503
+    assert response.json() == {'status': 'unhealthy', 'database': 'unhealthy'}
+
+
+@pytest.mark.django_db
+def test_pinning_middleware_runs_async(settings):
+    settings.DATABASE_REPLICAS = ['replica_1']
+    seen = {}
+
+    async def get_response(request):
+        seen['reads'] = replicas._replica_reads.get()
+        return HttpResponse()
+
+    middleware = ReplicaPinningMiddleware(get_response)
+    assert asyncio.iscoroutinefunction(middleware)
+    response = async_to_sync(middleware)(RequestFactory().get('/'))
+    assert seen['reads'] and PIN_COOKIE not in response.cookies
+    response = async_to_sync(middleware)(RequestFactory().post('/'))
+    assert not seen['reads'] and PIN_COOKIE in response.cookies
@@ -0,0 +1,144 @@
+# savannah_app/tests/test_caching.py
+import time
+
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from savannah_app import caching
+from savannah_app.ingestion import import_products
+from savannah_app.models import Category, Product
+
+
+def get(client, url, **params):
+    response = client.get(url, params)
+    assert response.status_code == 200
+    return response
+
+
+@pytest.mark.django_db
+class TestCatalogueCache:
+    def test_repeat_request_is_served_from_cache(self, authenticated_client, product):
+        url = reverse('product-list')
+        first = get(authenticated_client, url)
+        with CaptureQueriesContext(connection) as ctx:
+            second = get(authenticated_client, url)
+        assert first['X-Cache'] == 'MISS'
+        assert second['X-Cache'] == 'HIT'
+        assert second.data == first.data
+        # Only the session/auth lookups remain; no catalogue queries.
+        assert not any('savannah_app_product' in q['sql'] for q in ctx.captured_queries)
+
+    def test_query_params_are_part_of_the_key(self, authenticated_client, product):
+        url = reverse('product-list')
+        get(authenticated_client, url)
+        assert get(authenticated_client, url, page=1)['X-Cache'] == 'MISS'
+
+    def test_product_write_retires_only_dependent_responses(self, authenticated_client, category, product):
+        other = Product.objects.create(
+            name='Other', slug='other', description='', price=Decimal('5.00'), category=category, stock=1
+        )
+        urls = {
+            'detail': reverse('product-detail', kwargs={'pk': product.pk}),
+            'other': reverse('product-detail', kwargs={'pk': other.pk}),
+            'list': reverse('product-list'),
+        }
+        by_category = reverse('product-by-category')
+        for url in urls.values():
+            get(authenticated_client, url)
+        get(authenticated_client, by_category, category_id=category.pk)
+
+        product.price = Decimal('49.99')
+        product.save()
+
+        assert get(authenticated_client, urls['detail']).data['price'] == '49.99'
+        assert get(authenticated_client, urls['list'])['X-Cache'] == 'MISS'
+        assert get(authenticated_client, by_category, category_id=category.pk)['X-Cache'] == 'MISS'
+        assert get(authenticated_client, urls['other'])['X-Cache'] == 'HIT'
+
+    def test_product_write_retires_ancestor_subtree_listings(self, authenticated_client, category, product):
+        child = Category.objects.create(name='Child', slug='child', parent=category)
+        sibling = Category.objects.create(name='Sibling', slug='sibling')
+        nested = Product.objects.create(
+            name='Nested', slug='nested', description='', price=Decimal('5.00'), category=child, stock=1
+        )
+        url = reverse('product-by-category')
+        for pk in (category.pk, sibling.pk):
+            get(authenticated_client, url, category_id=pk)
+
+        nested.price = Decimal('6.00')
+        nested.save()
+
+        assert get(authenticated_client, url, category_id=category.pk)['X-Cache'] == 'MISS'
+        assert get(authenticated_client, url, category_id=sibling.pk)['X-Cache'] == 'HIT'
+
+    def test_category_move_retires_category_and_product_responses(self, authenticated_client, category, product):
+        new_parent = Category.objects.create(name='Parent', slug='parent')
+        category_url = reverse('category-detail', kwargs={'pk': category.pk})
+        product_url = reverse('product-detail', kwargs={'pk': product.pk})
+        get(authenticated_client, category_url)
+        get(authenticated_client, product_url)
+
+        category.refresh_from_db()
+        category.move_to(new_parent)
+
+        assert get(authenticated_client, category_url).data['parent'] == new_parent.pk
+        assert get(authenticated_client, product_url)['X-Cache'] == 'MISS'
+
+    def test_import_retires_updated_products(self, authenticated_client, product):
+        url = reverse('product-detail', kwargs={'pk': product.pk})
+        get(authenticated_client, url)
+        upload = SimpleUploadedFile('p.csv', (
+            'name,slug,description,price,category,stock\n'
+            f'Test Product,test-product,,12.50,{product.category.slug},3\n'
+        ).encode())
+        import_products(upload, 'csv')
+
+        assert get(authenticated_client, url).data['price'] == '12.50'
+
+    def test_import_retires_each_chunk_as_it_lands(self, product):
+        upload = SimpleUploadedFile('p.csv', (
+            'name,slug,description,price,category,stock\n'
+            f'Test Product,test-product,,12.50,{product.category.slug},3\n'
+            f'New Product,new-product,,1.00,{product.category.slug},3\n'
+        ).encode())
+        with patch('savannah_app.ingestion.caching.invalidate_products') as invalidate:
+            import_products(upload, 'csv', chunk_size=1)
+        assert [call.args for call in invalidate.call_args_list] == [
+            ({product.pk}, {product.category_id}), (set(), {product.category_id}),
+        ]
+
+
+@pytest.mark.django_db
+class TestGetOrCompute:
+    def test_stale_entry_is_served_while_another_request_recomputes(self):
+        cache = caching.get_cache()
+        cache.set('k', (time.time() - 1, 'old'))
+        cache.add('k:lock', 1)
+        try:
+            value, state = caching.get_or_compute('k', lambda: pytest.fail('should not recompute'))
+        finally:
+            cache.delete_many(['k', 'k:lock'])
+        assert (value, state) == ('old', 'STALE')
+
+    def test_expired_entry_is_recomputed_by_lock_holder(self):
+        cache = caching.get_cache()
+        cache.set('k', (time.time() - 1, 'old'))
+        try:
+            assert caching.get_or_compute('k', lambda: ('new', True)) == ('new', 'MISS')
+            assert caching.get_or_compute('k', lambda: pytest.fail('should hit')) == ('new', 'HIT')
+            assert not cache.get('k:lock')
+        finally:
+            cache.delete('k')
+
+    def test_cold_miss_waits_for_lock_holder(self, settings):
+        settings.CATALOGUE_CACHE_LOCK_WAIT = 0.05
+        cache = caching.get_cache()
+        cache.add('k:lock', 1)
+        try:
+            assert caching.get_or_compute('k', lambda: ('computed', False)) == ('computed', 'MISS')
+        finally:
+            cache.delete('k:lock')
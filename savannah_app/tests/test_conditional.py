@@ -0,0 +1,100 @@
+# savannah_app/tests/test_conditional.py
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from savannah_app.models import Category, Customer, Order, Product
+
+
+@pytest.mark.django_db
+class TestConditionalRequests:
+    def test_detail_not_modified(self, authenticated_client, product):
+        url = reverse('product-detail', kwargs={'pk': product.pk})
+        response = authenticated_client.get(url)
+        assert response.has_header('Last-Modified')
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert len(ctx.captured_queries) == 1
+
+    def test_detail_etag_follows_embedded_category(self, authenticated_client, category, product):
+        url = reverse('product-detail', kwargs={'pk': product.pk})
+        etag = authenticated_client.get(url)['ETag']
+        Category.objects.filter(pk=category.pk).update(name='Renamed', updated_at=category.updated_at.replace(year=2100))
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_list_not_modified_until_a_row_changes(self, authenticated_client, category):
+        url = reverse('category-list')
+        etag = authenticated_client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        # The ETag comes from the cache scope tokens, not the table.
+        assert not any('savannah_app_category' in q['sql'] for q in ctx.captured_queries)
+        assert authenticated_client.get(url, {'page': 1}, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+        Category.objects.create(name='Another', slug='another')
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+    def test_polling_customer_orders_costs_one_query(self, authenticated_client, user, order, product):
+        user.is_staff = user.is_superuser = False
+        user.save()
+        url = reverse('order-list')
+        etag = authenticated_client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert len(ctx.captured_queries) == 1
+
+        product.name = 'Renamed'
+        product.save()
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        etag = response['ETag']
+        Order.objects.filter(pk=order.pk).update(status='shipped', updated_at=order.updated_at.replace(year=2100))
+        assert authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+    def test_order_detail_etag_follows_embedded_rows(self, authenticated_client, customer, order, product):
+        url = reverse('order-detail', kwargs={'pk': order.pk})
+        etag = authenticated_client.get(url)['ETag']
+        Product.objects.filter(pk=product.pk).update(name='Renamed', updated_at=product.updated_at.replace(year=2100))
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+        etag = response['ETag']
+        assert authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+        Customer.objects.filter(pk=customer.pk).update(phone='1', updated_at=customer.updated_at.replace(year=2200))
+        assert authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+    def test_staff_order_list_hashes_the_page(self, authenticated_client, order):
+        url = reverse('order-list')
+        etag = authenticated_client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag and not response.content
+        assert not any('COUNT(' in q['sql'] or 'MAX(' in q['sql'] for q in ctx.captured_queries)
+
+        Order.objects.filter(pk=order.pk).update(status='shipped')
+        assert authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+    def test_if_match_guards_writes(self, authenticated_client, category):
+        url = reverse('category-detail', kwargs={'pk': category.pk})
+        etag = authenticated_client.get(url)['ETag']
+
+        response = authenticated_client.patch(url, {'description': 'First'}, format='json', HTTP_IF_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+        response = authenticated_client.patch(url, {'description': 'Second'}, format='json', HTTP_IF_MATCH=etag)
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+        category.refresh_from_db()
+        assert category.description == 'First'
+
+        response = authenticated_client.delete(url, HTTP_IF_MATCH=etag)
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
@@ -0,0 +1,102 @@
+# savannah_app/tests/test_exports.py
+import csv
+import gzip
+import io
+import json
+import pytest
+import tracemalloc
+from datetime import datetime, timezone
+from decimal import Decimal
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from savannah_app.models import Product
+from savannah_app.tests.conftest import make_order
+
+
+def body(response):
+    return b''.join(response.streaming_content)
+
+
+@pytest.mark.django_db
+class TestExports:
+    def test_products_stream_as_importable_csv(self, authenticated_client, product):
+        response = authenticated_client.get(reverse('product-export'))
+        assert response.status_code == status.HTTP_200_OK
+        assert isinstance(response, StreamingHttpResponse)
+        assert response['Content-Disposition'] == 'attachment; filename="products.csv"'
+        rows = list(csv.DictReader(io.StringIO(body(response).decode())))
+        assert [(r['slug'], r['price'], r['category']) for r in rows] == [('test-product', '99.99', 'test-category')]
+
+    def test_orders_as_gzipped_ndjson_with_filters(self, authenticated_client, customer, product):
+        march = datetime(2026, 3, 5, tzinfo=timezone.utc)
+        kept = make_order(customer, product, status='shipped', created_at=march, quantities=(1, 2))
+        make_order(customer, product, status='pending', created_at=march)
+        make_order(customer, product, status='shipped', created_at=datetime(2026, 4, 1, tzinfo=timezone.utc))
+
+        response = authenticated_client.get(reverse('order-export'), {
+            'file_format': 'ndjson', 'compress': 'true', 'start': '2026-03-01', 'end': '2026-03-31',
+            'status': ['shipped', 'delivered'],
+        })
+        assert response['Content-Type'] == 'application/gzip'
+        lines = gzip.decompress(body(response)).decode().splitlines()
+        orders = [json.loads(line) for line in lines]
+        assert [order['id'] for order in orders] == [kept.pk]
+        assert [item['quantity'] for item in orders[0]['items']] == [1, 2]
+        assert orders[0]['customer'] == 'testuser'
+
+    def test_orders_are_read_in_keyset_slices(self, authenticated_client, customer, product, settings):
+        settings.EXPORT_CHUNK_SIZE = 2
+        march, april = (datetime(2026, m, 1, tzinfo=timezone.utc) for m in (3, 4))
+        # Ties on created_at straddle the slice boundaries.
+        orders = [
+            (when, make_order(customer, product, created_at=when).pk) for when in (april, march, march, march, april)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            lines = body(authenticated_client.get(reverse('order-export'), {'file_format': 'ndjson'})).splitlines()
+        assert [json.loads(line)['id'] for line in lines] == [pk for _, pk in sorted(orders)]
+        # Three slices of orders, each with its item prefetch.
+        assert sum('savannah_app_orderitem' in query['sql'] for query in queries) == 3
+
+    def test_order_csv_has_a_line_per_item(self, authenticated_client, customer, product):
+        make_order(customer, product, quantities=(1, 3))
+        make_order(customer, product, quantities=())
+        rows = list(csv.DictReader(io.StringIO(body(authenticated_client.get(reverse('order-export'))).decode())))
+        assert [r['item_quantity'] for r in rows] == ['1', '3', '']
+
+    def test_admin_only(self, authenticated_client, user):
+        user.is_staff = False
+        user.save()
+        assert authenticated_client.get(reverse('order-export')).status_code == status.HTTP_403_FORBIDDEN
+        assert authenticated_client.get(reverse('product-export')).status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_export_memory_does_not_grow_with_row_count(authenticated_client, category, settings):
+    settings.EXPORT_CHUNK_SIZE = 200
+
+    def peak_while_exporting(total):
+        existing = Product.objects.count()
+        Product.objects.bulk_create([
+            Product(name=f'Product {i}', slug=f'p-{i}', description='x' * 200, price=Decimal('1.00'),
+                    category=category)
+            for i in range(existing, total)
+        ])
+        response = authenticated_client.get(reverse('product-export'), {'file_format': 'ndjson'})
+        tracemalloc.start()
+        try:
+            lines = sum(chunk.count(b'\n') for chunk in response.streaming_content)
+            return lines, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    small_lines, small_peak = peak_while_exporting(1000)
+    large_lines, large_peak = peak_while_exporting(10000)
+    # Skip the per-row delete signals of the shared cleanup fixture.
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {Product._meta.db_table}')
+    assert (small_lines, large_lines) == (1000, 10000)
+    # Ten times the rows, but the same chunk and buffer sizes in memory.
+    assert large_peak < small_peak * 1.5
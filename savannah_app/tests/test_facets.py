@@ -0,0 +1,69 @@
+# savannah_app/tests/test_facets.py
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from savannah_app.models import Category
+from savannah_app.tests.conftest import make_products
+
+
+@pytest.fixture
+def catalogue():
+    outdoor = Category.objects.create(name='Outdoor', slug='outdoor')
+    shoes = Category.objects.create(name='Shoes', slug='shoes', parent=outdoor)
+    tents = Category.objects.create(name='Tents', slug='tents', parent=outdoor)
+    kitchen = Category.objects.create(name='Kitchen', slug='kitchen')
+    make_products(shoes, ['20.00', '60.00', '75.00'], stock=5)
+    make_products(tents, ['300.00'], stock=0)
+    make_products(kitchen, ['10.00', '1500.00'], stock=5)
+    outdoor.refresh_from_db()
+    return outdoor, shoes, tents, kitchen
+
+
+def counts(facet):
+    return {row['slug']: row['count'] for row in facet}
+
+
+@pytest.mark.django_db
+class TestProductFacets:
+    url = reverse('product-facets')
+
+    def test_counts_roll_up_through_the_tree(self, authenticated_client, catalogue):
+        response = authenticated_client.get(self.url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 6
+        facets = response.data['facets']
+        assert counts(facets['category']) == {'outdoor': 4, 'shoes': 3, 'tents': 1, 'kitchen': 2}
+        assert [bucket['count'] for bucket in facets['price']] == [2, 0, 2, 0, 1, 0, 1]
+        assert facets['availability'] == {'in_stock': 5, 'out_of_stock': 1}
+
+    def test_facets_ignore_their_own_filter(self, authenticated_client, catalogue):
+        outdoor, shoes, tents, kitchen = catalogue
+        response = authenticated_client.get(self.url, {'category': shoes.pk, 'min_price': 50})
+        assert [row['slug'] for row in response.data['results']] == ['shoes-75.00', 'shoes-60.00']
+        facets = response.data['facets']
+        # Category counts keep the price filter but not the category one.
+        assert counts(facets['category']) == {'outdoor': 3, 'shoes': 2, 'tents': 1, 'kitchen': 1}
+        # Price counts keep the category filter but not the price one.
+        assert [bucket['count'] for bucket in facets['price']] == [1, 0, 2, 0, 0, 0, 0]
+        assert facets['availability'] == {'in_stock': 2, 'out_of_stock': 0}
+
+    def test_query_count_is_bounded(self, authenticated_client, catalogue):
+        outdoor, shoes, tents, kitchen = catalogue
+        with CaptureQueriesContext(connection) as small:
+            authenticated_client.get(self.url, {'in_stock': 'true'})
+        make_products(tents, ['5.00', '55.00', '555.00'], stock=5)
+        with CaptureQueriesContext(connection) as large:
+            response = authenticated_client.get(self.url, {'in_stock': 'true'})
+        assert response.data['facets']['availability'] == {'in_stock': 8, 'out_of_stock': 1}
+        assert len(small.captured_queries) == len(large.captured_queries)
+
+    def test_cached_per_filter_combination(self, authenticated_client, catalogue):
+        assert authenticated_client.get(self.url, {'max_price': 100})['X-Cache'] == 'MISS'
+        assert authenticated_client.get(self.url, {'max_price': 100})['X-Cache'] == 'HIT'
+        assert authenticated_client.get(self.url, {'max_price': 200})['X-Cache'] == 'MISS'
+
+    def test_invalid_filter(self, authenticated_client, catalogue):
+        response = authenticated_client.get(self.url, {'category': 999999})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,108 @@
+# savannah_app/tests/test_inventory.py
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connection, connections
+from django.urls import reverse
+from rest_framework import serializers, status
+from savannah_app.models import CategoryRollup, Order, Product
+from savannah_app.serializers import OrderSerializer
+from savannah_app.tests.conftest import make_product, place_order, stock
+
+
+@pytest.mark.django_db
+class TestStockReservation:
+    def test_order_decrements_stock_and_rollups(self, customer, category):
+        a, b = make_product(category, 'a', stock=10), make_product(category, 'b', stock=5)
+        place_order(customer, [(a, 3), (b, 5), (a, 2)])
+        assert (stock(a), stock(b)) == (5, 0)
+        assert CategoryRollup.objects.get(category=category).stock_total == 5
+
+    def test_shortage_rejects_the_whole_order(self, customer, category):
+        a, b = make_product(category, 'a', stock=10), make_product(category, 'b', stock=1)
+        with pytest.raises(serializers.ValidationError) as exc:
+            place_order(customer, [(a, 3), (b, 2)])
+        assert 'only 1 in stock' in str(exc.value.detail['items'][0])
+        assert (stock(a), stock(b)) == (10, 1)
+        assert not Order.objects.exists()
+
+    def test_unavailable_products_cannot_be_reserved(self, customer, category):
+        a = make_product(category, 'a', stock=10)
+        Product.objects.filter(pk=a.pk).update(is_available=False)
+        with pytest.raises(serializers.ValidationError):
+            place_order(customer, [(a, 1)])
+
+    def test_update_rebalances_reservation(self, customer, category):
+        a, b = make_product(category, 'a', stock=10), make_product(category, 'b', stock=10)
+        order = place_order(customer, [(a, 4)])
+        serializer = OrderSerializer(order, data={'items': [
+            {'product': a.id, 'quantity': 1, 'price': '5.00'},
+            {'product': b.id, 'quantity': 2, 'price': '5.00'},
+        ]}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        assert (stock(a), stock(b)) == (9, 8)
+
+    def test_cancel_releases_once_and_reopening_reserves_again(self, authenticated_client, customer, category):
+        a = make_product(category, 'a', stock=5)
+        order = place_order(customer, [(a, 4)])
+        url = reverse('order-update-status', kwargs={'pk': order.pk})
+
+        for _ in range(2):
+            response = authenticated_client.post(url, {'status': 'cancelled'})
+            assert response.status_code == status.HTTP_200_OK
+            assert stock(a) == 5
+
+        place_order(customer, [(a, 3)])
+        response = authenticated_client.post(url, {'status': 'pending'})
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert Order.objects.get(pk=order.pk).status == 'cancelled'
+        assert stock(a) == 2
+
+    def test_patched_status_follows_the_state_machine(self, authenticated_client, customer, category):
+        a = make_product(category, 'a', stock=5)
+        order = place_order(customer, [(a, 4)])
+        url = reverse('order-detail', kwargs={'pk': order.pk})
+
+        response = authenticated_client.patch(url, {'status': 'delivered'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data == {'status': ['Cannot move an order from pending to delivered.']}
+        assert Order.objects.get(pk=order.pk).status == 'pending'
+
+        response = authenticated_client.patch(url, {'status': 'cancelled'}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert stock(a) == 5
+
+    def test_deleting_an_order_returns_its_stock_once(self, authenticated_client, customer, category):
+        a = make_product(category, 'a', stock=5)
+        held, cancelled = place_order(customer, [(a, 2)]), place_order(customer, [(a, 1)])
+        Order.objects.filter(pk=cancelled.pk).update(status='cancelled')
+        assert stock(a) == 2
+
+        for order in (held, cancelled):
+            response = authenticated_client.delete(reverse('order-detail', kwargs={'pk': order.pk}))
+            assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert stock(a) == 4
+        assert not Order.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_buyers_never_oversell(customer, category):
+    if connection.vendor != 'postgresql':
+        pytest.skip('Concurrent writers need a server database')
+    products = [make_product(category, f'flash-{i}', stock=25) for i in range(3)]
+
+    def buy(i):
+        # Buyers take the same products in different orders to provoke deadlocks.
+        lines = [(products[(i + k) % 3], 1) for k in range(3)]
+        try:
+            place_order(customer, lines)
+            return True
+        except serializers.ValidationError:
+            return False
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        results = list(pool.map(buy, range(60)))
+    assert sum(results) == 25
+    assert [stock(product) for product in products] == [0, 0, 0]
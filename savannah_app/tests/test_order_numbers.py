@@ -0,0 +1,124 @@
+# savannah_app/tests/test_order_numbers.py
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from importlib import import_module
+from unittest.mock import patch
+from django.apps import apps
+from django.db import connection, connections
+from django.utils import timezone
+from savannah_app import analytics
+from savannah_app.models import Order, OrderNumberCounter
+from savannah_app.order_numbers import BlockAllocator, DailyCounterAllocator, reserve
+from savannah_app.serializers import OrderSerializer
+
+
+@pytest.mark.django_db
+class TestOrderNumbers:
+    def test_reserve_is_sequential_per_day(self):
+        day = date(2026, 1, 1)
+        assert reserve(day) == 1
+        assert reserve(day, 10) == 2
+        assert reserve(day) == 12
+        assert reserve(date(2026, 1, 2)) == 1
+        assert OrderNumberCounter.objects.get(day=day).last_value == 12
+
+    def test_migration_seeds_past_todays_highest_number(self, customer):
+        today = timezone.now().date()
+        for number in (f'ORD-{today:%Y%m%d}-0012', f'ORD-{today:%Y%m%d}-0003', 'ORD-20200101-0099'):
+            Order.objects.create(
+                customer=customer, order_number=number, total_amount='1.00', shipping_address='a',
+                shipping_city='b', shipping_country='c', shipping_postal_code='d'
+            )
+        OrderNumberCounter.objects.all().delete()
+        import_module('savannah_app.migrations.0003_order_number_counter').seed_todays_counter(apps, None)
+        assert OrderNumberCounter.objects.get(day=today).last_value == 12
+
+    def test_order_save_uses_allocator(self, customer):
+        orders = [
+            Order.objects.create(
+                customer=customer, total_amount='1.00', shipping_address='a',
+                shipping_city='b', shipping_country='c', shipping_postal_code='d'
+            )
+            for _ in range(3)
+        ]
+        sequences = [int(order.order_number.rsplit('-', 1)[1]) for order in orders]
+        assert sequences == [sequences[0], sequences[0] + 1, sequences[0] + 2]
+
+    def test_block_allocator_hands_out_unique_numbers_across_threads(self):
+        issued = iter(range(1, 10**6, 50))
+        allocator = BlockAllocator(block_size=50)
+        with patch('savannah_app.order_numbers.reserve', side_effect=lambda day, count: next(issued)):
+            with ThreadPoolExecutor(max_workers=16) as pool:
+                numbers = list(pool.map(lambda _: allocator.allocate(), range(5000)))
+        assert len(set(numbers)) == 5000
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('allocator_class', [DailyCounterAllocator, BlockAllocator])
+def test_concurrent_orders_never_collide(allocator_class, customer):
+    if connection.vendor != 'postgresql':
+        pytest.skip('Concurrent writers need a server database')
+    allocator = allocator_class()
+
+    def place_orders(_):
+        try:
+            return [
+                Order.objects.create(
+                    customer=customer, order_number=allocator.allocate(), total_amount='1.00',
+                    shipping_address='a', shipping_city='b', shipping_country='c',
+                    shipping_postal_code='d'
+                ).order_number
+                for _ in range(100)
+            ]
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        numbers = [n for chunk in pool.map(place_orders, range(20)) for n in chunk]
+    assert len(numbers) == len(set(numbers)) == 2000
+
+
+@pytest.mark.django_db(transaction=True)
+def test_checkout_does_not_hold_the_counter_lock(customer, product):
+    if connection.vendor != 'postgresql':
+        pytest.skip('Concurrent writers need a server database')
+    inside, release = threading.Event(), threading.Event()
+    record_change = analytics.record_change
+
+    def hold(*args):
+        # Still inside the checkout transaction, after the number was taken.
+        inside.set()
+        release.wait(10)
+        return record_change(*args)
+
+    def checkout():
+        try:
+            serializer = OrderSerializer(data={
+                'customer': customer.pk, 'shipping_address': 'a', 'shipping_city': 'b',
+                'shipping_country': 'c', 'shipping_postal_code': 'd',
+                'items': [{'product': product.pk, 'quantity': 1}],
+            })
+            serializer.is_valid(raise_exception=True)
+            return serializer.save(customer=customer).order_number
+        finally:
+            connections.close_all()
+
+    def allocate():
+        try:
+            return reserve(timezone.now().date())
+        finally:
+            connections.close_all()
+
+    with patch('savannah_app.serializers.analytics.record_change', side_effect=hold):
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            placed = pool.submit(checkout)
+            assert inside.wait(10)
+            try:
+                # Blocks until the checkout commits if it still holds the row.
+                other = pool.submit(allocate).result(timeout=5)
+            finally:
+                release.set()
+            number = placed.result()
+    assert other == int(number.rsplit('-', 1)[1]) + 1
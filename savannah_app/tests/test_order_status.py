@@ -0,0 +1,169 @@
+# savannah_app/tests/test_order_status.py
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from django.contrib.auth.models import User
+from savannah_app.models import Customer, NotificationDelivery, Order, Product
+from savannah_app.order_status import can_transition, transition_orders
+from savannah_app.sms import get_sms_client, reset_sms_client
+from savannah_app.tests.conftest import make_order, stock
+from savannah_app.tasks import NotificationFailed, deliver_order_notifications, fan_out_order_notifications
+
+
+def statuses(orders):
+    return dict(Order.objects.filter(pk__in=[o.pk for o in orders]).values_list('pk', 'status'))
+
+
+@pytest.fixture
+def other_customer():
+    return Customer.objects.create(user=User.objects.create(username='other'), phone='0722222222')
+
+
+@pytest.fixture
+def outbox():
+    reset_sms_client()
+    return get_sms_client().backend.outbox
+
+
+@pytest.fixture
+def mock_fan_out():
+    with patch('savannah_app.tasks.fan_out_order_notifications.delay') as delay:
+        yield delay
+
+
+@pytest.mark.django_db
+class TestBulkStatus:
+    url = reverse('order-bulk-update-status')
+
+    def post(self, client, changes):
+        return client.post(self.url, {'orders': [{'id': pk, 'status': s} for pk, s in changes]}, format='json')
+
+    def test_state_machine(self):
+        assert can_transition('pending', 'processing')
+        assert can_transition('shipped', 'shipped')
+        assert not can_transition('delivered', 'pending')
+        assert not can_transition('pending', 'delivered')
+
+    def test_one_update_per_target_status(self, authenticated_client, customer, product, mock_fan_out,
+                                          django_capture_on_commit_callbacks):
+        pending = [make_order(customer, product) for _ in range(5)]
+        processing = [make_order(customer, product, status='processing') for _ in range(5)]
+        changes = [(o.pk, 'processing') for o in pending] + [(o.pk, 'shipped') for o in processing]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.post(authenticated_client, changes)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['updated'] == 10
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "savannah_app_order"')]
+        assert len(updates) == 2
+        assert set(statuses(pending).values()) == {'processing'}
+        assert set(statuses(processing).values()) == {'shipped'}
+        # One queued message per target status, not one per order.
+        assert sorted(len(call.args[0]) for call in mock_fan_out.call_args_list) == [5, 5]
+
+    def test_per_order_results(self, authenticated_client, customer, product, mock_fan_out):
+        ok, done, same = (
+            make_order(customer, product), make_order(customer, product, status='delivered'),
+            make_order(customer, product, status='shipped'),
+        )
+        response = self.post(authenticated_client, [
+            (ok.pk, 'processing'), (done.pk, 'pending'), (same.pk, 'shipped'), (999999, 'shipped'),
+        ])
+        assert [r['result'] for r in response.data['results']] == [
+            'updated', 'invalid_transition', 'unchanged', 'not_found',
+        ]
+        assert statuses([ok, done]) == {ok.pk: 'processing', done.pk: 'delivered'}
+
+    def test_cancelling_releases_and_reopening_reserves_stock(self, authenticated_client, customer, category,
+                                                              mock_fan_out):
+        product = Product.objects.create(
+            name='p', slug='p', description='', price=Decimal('5.00'), category=category, stock=1
+        )
+        first, second = make_order(customer, product, quantities=(2,)), make_order(customer, product, quantities=(3,))
+        self.post(authenticated_client, [(first.pk, 'cancelled'), (second.pk, 'cancelled')])
+        assert stock(product) == 6
+
+        other = Product.objects.create(
+            name='q', slug='q', description='', price=Decimal('5.00'), category=category, stock=10
+        )
+        third = make_order(customer, other, status='cancelled', quantities=(4,))
+        Product.objects.filter(pk=product.pk).update(stock=4)
+        response = self.post(authenticated_client, [
+            (first.pk, 'pending'), (second.pk, 'pending'), (third.pk, 'pending'),
+        ])
+        results = {r['id']: r for r in response.data['results']}
+        assert {pk: r['result'] for pk, r in results.items()} == {
+            first.pk: 'insufficient_stock', second.pk: 'insufficient_stock', third.pk: 'updated',
+        }
+        assert results[first.pk]['shortages'] == {product.pk: 4}
+        assert (stock(product), stock(other)) == (4, 6)
+
+    def test_rejects_duplicates_and_non_staff(self, authenticated_client, user, customer, product):
+        order = make_order(customer, product)
+        response = self.post(authenticated_client, [(order.pk, 'processing'), (order.pk, 'cancelled')])
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        user.is_staff = False
+        user.save()
+        response = self.post(authenticated_client, [(order.pk, 'processing')])
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert statuses([order]) == {order.pk: 'pending'}
+
+    def test_single_update_follows_the_state_machine(self, authenticated_client, customer, product):
+        order = make_order(customer, product, status='delivered')
+        url = reverse('order-update-status', kwargs={'pk': order.pk})
+        response = authenticated_client.post(url, {'status': 'pending'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert statuses([order]) == {order.pk: 'delivered'}
+
+
+@pytest.mark.django_db
+@patch('savannah_app.tasks.queue_admin_email', return_value=True)
+def test_batched_notifications_go_out_per_chunk(mock_email, customer, product, settings, outbox):
+    settings.ORDER_NOTIFICATION_CHUNK_SIZE = 2
+    orders = [make_order(customer, product, status='shipped') for _ in range(3)]
+    assert fan_out_order_notifications.delay([o.pk for o in orders], 'status', 'shipped').get() == 3
+    # One text per customer and chunk, counting their orders in it.
+    assert [request['recipients'] for request in outbox] == [[customer.phone]] * 2
+    assert [request['message'] for request in outbox] == [
+        '2 of your Savannah orders have been shipped. Track them from your order history.',
+        'Your Savannah order has been shipped. Track it from your order history.',
+    ]
+    assert mock_email.call_count == 3
+    assert NotificationDelivery.objects.filter(order__in=orders).count() == 6
+
+
+@pytest.mark.django_db
+@patch('savannah_app.tasks.queue_admin_email', return_value=True)
+def test_chunk_retries_only_resend_missed_orders(mock_email, customer, product, other_customer, outbox):
+    mine, theirs = make_order(customer, product), make_order(other_customer, product)
+    with patch('savannah_app.tasks.send_bulk_sms', side_effect=lambda messages: [
+        (message, [], {phone: 'RequestFailed'}) if phone == other_customer.phone else (message, [phone], {})
+        for phone, message in messages
+    ]):
+        with pytest.raises(NotificationFailed):
+            deliver_order_notifications.run([mine.pk, theirs.pk], 'status', 'pending')
+    delivered = set(NotificationDelivery.objects.values_list('key', flat=True))
+    assert f'status:{theirs.pk}:pending::sms' not in delivered and len(delivered) == 3
+
+    assert deliver_order_notifications.run([mine.pk, theirs.pk], 'status', 'pending') == 1
+    assert [request['recipients'] for request in outbox] == [[other_customer.phone]]
+    assert mock_email.call_count == 2
+
+
+@pytest.mark.django_db
+@patch('savannah_app.tasks.queue_admin_email', return_value=True)
+def test_returning_to_a_status_notifies_again(mock_email, customer, product, outbox,
+                                             django_capture_on_commit_callbacks):
+    order = make_order(customer, product, status='cancelled')
+    for new_status in ('pending', 'cancelled'):
+        with django_capture_on_commit_callbacks(execute=True):
+            transition_orders({order.pk: new_status})
+    assert statuses([order]) == {order.pk: 'cancelled'}
+    assert [request['message'] for request in outbox][-1] == 'Your Savannah order has been cancelled.'
+    assert NotificationDelivery.objects.filter(order=order, channel='sms').count() == 2
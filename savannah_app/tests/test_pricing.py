@@ -0,0 +1,57 @@
+# savannah_app/tests/test_pricing.py
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from savannah_app.serializers import OrderSerializer
+from savannah_app.tests.conftest import make_product, order_payload
+
+
+@pytest.mark.django_db
+class TestOrderPricing:
+    def test_prices_and_total_come_from_the_catalogue(self, customer, category):
+        a, b = make_product(category, 'a', '19.99'), make_product(category, 'b', '0.35')
+        serializer = OrderSerializer(data=order_payload(customer, [(a, 3), (b, 7)]))
+        assert serializer.is_valid(), serializer.errors
+        order = serializer.save()
+        assert order.total_amount == Decimal('62.42')
+        assert sorted(order.items.values_list('price', flat=True)) == [Decimal('0.35'), Decimal('19.99')]
+
+    def test_mismatched_client_totals_are_rejected(self, customer, category):
+        a = make_product(category, 'a', '10.00')
+        data = order_payload(customer, [(a, 2)], total_amount='1.00')
+        data['items'][0]['price'] = '0.01'
+        serializer = OrderSerializer(data=data)
+        assert not serializer.is_valid()
+        assert serializer.errors['total_amount'] == ['Expected 20.00.']
+        assert 'costs 10.00' in serializer.errors['items'][0]
+
+    def test_matching_client_totals_are_accepted(self, customer, category):
+        a = make_product(category, 'a', '10.00')
+        data = order_payload(customer, [(a, 2)], total_amount='20.00')
+        data['items'][0]['price'] = '10.00'
+        assert OrderSerializer(data=data).is_valid()
+
+    def test_total_cannot_be_edited_without_items(self, customer, category):
+        a = make_product(category, 'a', '10.00')
+        serializer = OrderSerializer(data=order_payload(customer, [(a, 1)]))
+        serializer.is_valid(raise_exception=True)
+        order = serializer.save()
+        serializer = OrderSerializer(order, data={'total_amount': '0.00'}, partial=True)
+        assert not serializer.is_valid()
+        assert 'total_amount' in serializer.errors
+
+    @override_settings(ORDER_PRICING_RULES=[
+        ('savannah_app.pricing.QuantityDiscount', {'min_quantity': 10, 'percent': 10}),
+        ('savannah_app.pricing.PercentageTax', {'rate': '0.16', 'label': 'VAT'}),
+    ])
+    def test_rules_apply_to_the_whole_cart(self, customer, category):
+        a, b = make_product(category, 'a', '5.00'), make_product(category, 'b', '2.50')
+        serializer = OrderSerializer(data=order_payload(customer, [(a, 10), (b, 4)]))
+        with CaptureQueriesContext(connection) as ctx:
+            assert serializer.is_valid(), serializer.errors
+        # The products are fetched once, for every line and every rule.
+        assert len(ctx.captured_queries) == 2
+        # (50.00 + 10.00 - 5.00) * 1.16
+        assert serializer.validated_data['total_amount'] == Decimal('63.80')
@@ -0,0 +1,92 @@
+# savannah_app/tests/test_projections.py
+import datetime
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from savannah_app.models import Order, OrderItem, Product
+from savannah_app.projections import order_data, product_data, project_orders, project_products
+from savannah_app.renderers import FastJSONRenderer
+from savannah_app.serializers import OrderSerializer, ProductSerializer
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+@pytest.mark.django_db
+class TestProjections:
+    def test_product_payload_matches_serializer(self, category, product):
+        Product.objects.create(
+            name='Caf\u00e9 \u2028"line"', slug='cafe', description='', price='5.10', category=category, stock=0,
+        )
+        queryset = Product.objects.select_related('category')
+        expected = ProductSerializer(queryset, many=True).data
+        assert render(product_data(project_products(queryset))) == render(expected)
+
+    def test_order_payload_matches_serializer(self, order, product, customer):
+        OrderItem.objects.create(order=order, product=product, quantity=3, price='1.50')
+        empty = Order.objects.create(
+            customer=customer, total_amount='0.00', shipping_address='a', shipping_city='b',
+            shipping_country='c', shipping_postal_code='d', notes='no items',
+        )
+        queryset = Order.objects.order_by('id')
+        expected = OrderSerializer(queryset, many=True).data
+        actual = order_data(project_orders(queryset))
+        assert [row['id'] for row in actual] == [order.pk, empty.pk]
+        assert render(actual) == render(expected)
+
+    def test_datetimes_follow_the_active_timezone(self, product):
+        queryset = Product.objects.all()
+        with timezone.override('Africa/Nairobi'):
+            data = product_data(project_products(queryset))
+            assert data[0]['created_at'].endswith('+03:00')
+            assert data == ProductSerializer(queryset, many=True).data
+
+    def test_list_endpoints_match_serializer_bytes(self, authenticated_client, order):
+        response = authenticated_client.get(reverse('product-list'))
+        assert response.content == render({
+            'count': 1, 'next': None, 'previous': None,
+            'results': ProductSerializer(Product.objects.all(), many=True).data,
+        })
+        response = authenticated_client.get(reverse('order-list'))
+        assert response.content == render({
+            'next': None, 'previous': None,
+            'results': OrderSerializer(Order.objects.all(), many=True).data,
+        })
+
+    def test_order_list_reads_items_for_the_page_in_one_query(self, authenticated_client, customer, product):
+        for _ in range(5):
+            order = Order.objects.create(
+                customer=customer, total_amount='2.00', shipping_address='a', shipping_city='b',
+                shipping_country='c', shipping_postal_code='d',
+            )
+            OrderItem.objects.bulk_create([OrderItem(order=order, product=product, quantity=1, price='1.00')] * 2)
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(reverse('order-list'), {'page_size': 3})
+        assert len(response.data['results']) == 3
+        assert [len(order['items']) for order in response.data['results']] == [2, 2, 2]
+        # The page and its items.
+        assert len(queries) == 2
+
+
+@pytest.mark.django_db
+class TestFastJSONRenderer:
+    def test_matches_json_renderer(self):
+        data = {
+            'price': Decimal('12.50'), 'day': datetime.date(2026, 1, 2),
+            'when': datetime.datetime(2026, 1, 2, 3, 4, 5, 600, tzinfo=datetime.timezone.utc), 'text': 'caf\u00e9 \u2028\u2029"q" \n\x01', 7: [1, 2.5, None, True],
+            'lazy': gettext_lazy('Pending'), 'rows': ({'a': 1},),
+        }
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_indent_and_oversized_integers_fall_back(self):
+        data = {'big': 2 ** 70}
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+        indented = FastJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        assert indented == JSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        assert FastJSONRenderer().render(None) == b''
@@ -0,0 +1,146 @@
+# savannah_app/tests/test_replicas.py
+import asyncio
+import time
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from asgiref.sync import async_to_sync, sync_to_async
+from savannah_app import caching, replicas
+from savannah_app.models import Category, DailySalesSummary, Order, Product
+from savannah_app.replicas import PIN_COOKIE, ReplicaPinningMiddleware, replica_reads
+
+
+@pytest.fixture
+def lags(monkeypatch, settings):
+    """Two replicas whose lag a test can set; ``None`` means unreachable."""
+    settings.DATABASE_REPLICAS = ['replica_1', 'replica_2']
+    lags = {'replica_1': 0.0, 'replica_2': 0.0}
+    monkeypatch.setattr(replicas, 'replica_lag', lags.get)
+    return lags
+
+
+def serve(method='get', cookies=None, view=None):
+    """Run a request through the middleware; returns (response, read alias)."""
+    request = getattr(RequestFactory(), method)('/')
+    request.COOKIES.update(cookies or {})
+    seen = {}
+
+    def get_response(request):
+        if view is not None:
+            view()
+        seen['db'] = Product.objects.all().db
+        return HttpResponse()
+
+    return ReplicaPinningMiddleware(get_response)(request), seen['db']
+
+
+# Not wrapped in a test transaction, which would keep reads on the primary.
+@pytest.mark.django_db(transaction=True)
+class TestReplicaRouting:
+    def test_reads_use_replicas_only_inside_safe_requests(self, lags):
+        assert Product.objects.all().db == 'default'
+        with replica_reads():
+            assert Product.objects.all().db in lags
+            assert Order.objects.all().db in lags
+            assert DailySalesSummary.objects.all().db in lags
+            # Accounts are not routed; locking reads are writes.
+            assert User.objects.all().db == 'default'
+            assert Category.objects.select_for_update().db == 'default'
+
+    def test_transactions_and_writes_return_reads_to_the_primary(self, lags, category):
+        with replica_reads():
+            with transaction.atomic():
+                assert Product.objects.all().db == 'default'
+            assert Product.objects.all().db in lags
+            Category.objects.filter(pk=category.pk).update(description='new')
+            assert Product.objects.all().db == 'default'
+            assert replicas.wrote()
+
+    def test_lagging_and_unreachable_replicas_are_skipped(self, lags, settings):
+        settings.DATABASE_REPLICA_MAX_LAG = 5
+        lags.update(replica_1=12.0, replica_2=None)
+        with replica_reads():
+            assert Product.objects.all().db == 'default'
+            lags['replica_2'] = 1.5
+            assert {Product.objects.all().db for _ in range(20)} == {'replica_2'}
+
+    def test_middleware_pins_writers_to_the_primary(self, lags, settings, category):
+        settings.DATABASE_REPLICA_MAX_LAG = 2.5
+        response, db = serve()
+        assert db in lags and PIN_COOKIE not in response.cookies
+
+        response, _ = serve('post')
+        assert response.cookies[PIN_COOKIE]['max-age'] == 3
+
+        response, db = serve(cookies={PIN_COOKIE: '1'})
+        assert db == 'default'
+
+        # A GET that writes reads its own write and pins the client too.
+        response, db = serve(view=lambda: Category.objects.filter(pk=category.pk).update(description='x'))
+        assert db == 'default' and PIN_COOKIE in response.cookies
+
+    def test_async_requests_see_writes_made_in_child_tasks(self, lags, category):
+        seen = {}
+
+        async def get_response(request):
+            # Each gathered call runs in a task with its own copy of the context.
+            await asyncio.gather(
+                sync_to_async(Category.objects.filter(pk=category.pk).update)(description='x'),
+                sync_to_async(Category.objects.count)(),
+            )
+            seen['db'] = await sync_to_async(lambda: Product.objects.all().db)()
+            return HttpResponse()
+
+        response = async_to_sync(ReplicaPinningMiddleware(get_response))(RequestFactory().get('/'))
+        assert seen['db'] == 'default' and PIN_COOKIE in response.cookies
+
+    def test_without_replicas_nothing_is_routed_or_pinned(self, settings):
+        settings.DATABASE_REPLICAS = []
+        response, db = serve('post')
+        assert db == 'default' and PIN_COOKIE not in response.cookies
+
+    def test_lag_is_measured_and_cached(self, settings, monkeypatch):
+        settings.DATABASE_REPLICA_CHECK_INTERVAL = 60
+        assert replicas.measure_lag('default') == 0.0
+        calls = []
+        monkeypatch.setattr(replicas, 'measure_lag', lambda alias: calls.append(alias) or 0.5)
+        monkeypatch.setattr(replicas, '_lags', {})
+        assert [replicas.replica_lag('replica_1') for _ in range(3)] == [0.5] * 3
+        assert calls == ['replica_1']
+
+    def test_cache_fills_read_the_primary_only_after_writes(self, lags, settings):
+        # A replica inside the lag budget can still predate a recent write;
+        # what it returns must not be cached under the post-write tokens.
+        lags.update(replica_1=4.0, replica_2=4.0)
+        reads = []
+
+        def compute():
+            reads.append(Product.objects.all().db)
+            return 'payload', True
+
+        def fill(key):
+            assert caching.get_or_compute(key, compute) == ('payload', 'MISS')
+            assert async_to_sync(caching.aget_or_compute)(f'async-{key}', sync_to_async(compute)) == ('payload', 'MISS')
+
+        with replica_reads():
+            caching.invalidate('products')
+            fill('written')
+            assert reads == ['default', 'default']
+
+            window = settings.DATABASE_REPLICA_MAX_LAG + settings.DATABASE_REPLICA_CHECK_INTERVAL
+            caching.get_cache().set(caching.WRITTEN_KEY, time.time() - window - 1, timeout=None)
+            fill('settled')
+            assert len(reads) == 4 and set(reads[2:]) <= set(lags)
+
+
+@pytest.mark.django_db
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+def test_replicas_relate_to_primary_rows():
+    router = replicas.ReplicaRouter()
+    primary, replica = Category(), Product()
+    primary._state.db, replica._state.db = 'default', 'replica_1'
+    assert router.allow_relation(primary, replica) is True
+    assert router.allow_migrate('default', 'savannah_app') and not router.allow_migrate('replica_1', 'savannah_app')
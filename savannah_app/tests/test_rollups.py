@@ -0,0 +1,81 @@
+# savannah_app/tests/test_rollups.py
+import pytest
+from decimal import Decimal
+from django.core.management import call_command
+from django.db.models import Sum
+from savannah_app.models import Category, CategoryRollup, Product
+from savannah_app.tests.conftest import make_product
+
+
+def assert_rollup_matches(category):
+    category.refresh_from_db()
+    rollup = CategoryRollup.objects.get(category=category)
+    stats = Category.objects.subtree_price_stats(category)
+    stock = Product.objects.in_subtree(category).aggregate(stock=Sum('stock'))['stock'] or 0
+    assert rollup.product_count == stats['count']
+    assert rollup.price_sum == (stats['total'] or 0)
+    assert rollup.price_min == stats['minimum']
+    assert rollup.price_max == stats['maximum']
+    assert rollup.stock_total == stock
+
+
+@pytest.fixture
+def tree():
+    root = Category.objects.create(name='Grocery', slug='grocery')
+    bakery = Category.objects.create(name='Bakery', slug='bakery', parent=root)
+    produce = Category.objects.create(name='Produce', slug='produce', parent=root)
+    return root, bakery, produce
+
+
+@pytest.mark.django_db
+class TestCategoryRollup:
+    def test_product_writes_update_ancestors(self, tree):
+        root, bakery, produce = tree
+        bread = make_product(bakery, 'bread', '3.99', stock=100)
+        make_product(produce, 'apples', '1.99', stock=200)
+        for node in tree:
+            assert_rollup_matches(node)
+        assert CategoryRollup.objects.get(category=root).price_average == Decimal('2.99')
+
+        bread.price = Decimal('0.50')
+        bread.stock = 40
+        bread.save()
+        for node in tree:
+            assert_rollup_matches(node)
+
+        bread.category = produce
+        bread.save()
+        for node in tree:
+            assert_rollup_matches(node)
+
+        bread.delete()
+        for node in tree:
+            assert_rollup_matches(node)
+
+    def test_moving_subtree_refreshes_old_and_new_ancestors(self, tree):
+        root, bakery, produce = tree
+        pastries = Category.objects.create(name='Pastries', slug='pastries', parent=bakery)
+        make_product(pastries, 'croissant', '2.50', stock=5)
+        make_product(bakery, 'bread', '3.99', stock=7)
+
+        pastries.refresh_from_db()
+        pastries.parent = produce
+        pastries.save()
+        for node in (root, bakery, produce, pastries):
+            assert_rollup_matches(node)
+
+        pastries.refresh_from_db()
+        bakery.refresh_from_db()
+        pastries.move_to(bakery, 'last-child')
+        for node in (root, bakery, produce, pastries):
+            assert_rollup_matches(node)
+
+    def test_rebuild_command(self, tree):
+        root, bakery, produce = tree
+        make_product(bakery, 'bread', '3.99', stock=100)
+        make_product(produce, 'apples', '1.99', stock=200)
+        CategoryRollup.objects.all().delete()
+
+        call_command('rebuild_category_rollups')
+        for node in tree:
+            assert_rollup_matches(node)
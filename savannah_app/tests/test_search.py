@@ -0,0 +1,84 @@
+# savannah_app/tests/test_search.py
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from savannah_app.models import Category
+from savannah_app.search import search_products, suggest_products
+from savannah_app.tests.conftest import make_product
+
+
+@pytest.fixture
+def catalogue():
+    root = Category.objects.create(name='Outdoor', slug='outdoor')
+    shoes = Category.objects.create(name='Shoes', slug='shoes', parent=root)
+    other = Category.objects.create(name='Kitchen', slug='kitchen')
+    root.refresh_from_db()
+    products = {
+        'trail': make_product(shoes, 'trail', '80.00', name='Trail Running Shoe', description='Grippy sole'),
+        'road': make_product(
+            shoes, 'road', '60.00', name='Road Shoe', description='Light shoe for running on tarmac',
+        ),
+        'kettle': make_product(other, 'kettle', '25.00', name='Camping Kettle', description='Boils water fast'),
+        'sold_out': make_product(
+            shoes, 'sold-out', '10.00', name='Runner Sandal', description='For running', is_available=False,
+        ),
+    }
+    return root, products
+
+
+@pytest.mark.django_db
+class TestProductSearch:
+    def test_name_matches_rank_above_description_matches(self, catalogue):
+        root, products = catalogue
+        slugs = [product.slug for product in search_products('run')]
+        assert slugs[0] == 'trail'
+        assert set(slugs) == {'trail', 'road', 'sold-out'}
+
+    def test_filters(self, catalogue):
+        root, products = catalogue
+        assert not search_products('kettle', category=root).exists()
+        assert {p.slug for p in search_products('running', max_price=Decimal('70'))} == {'road', 'sold-out'}
+        assert [p.slug for p in search_products('running', min_price=Decimal('70'))] == ['trail']
+        assert {p.slug for p in search_products('running', available=True)} == {'trail', 'road'}
+
+    def test_suggest_matches_name_word_prefixes(self, catalogue):
+        assert {row['slug'] for row in suggest_products('ru')} == {'sold-out', 'trail'}
+        assert [row['slug'] for row in suggest_products('camp ket')] == ['kettle']
+        assert suggest_products('boil') == []
+
+    def test_index_follows_writes(self, catalogue):
+        root, products = catalogue
+        kettle = products['kettle']
+        kettle.name = 'Camping Stove'
+        kettle.save()
+        assert not search_products('kettle').exists()
+        assert [p.slug for p in search_products('stove')] == ['kettle']
+
+        kettle.delete()
+        assert not search_products('stove').exists()
+
+    def test_endpoint_pages_without_counting(self, authenticated_client, catalogue):
+        url = reverse('product-search')
+        with CaptureQueriesContext(connection) as ctx:
+            response = authenticated_client.get(url, {'q': 'running', 'page_size': 1})
+        assert response.status_code == status.HTTP_200_OK
+        assert [row['slug'] for row in response.data['results']] == ['trail']
+        assert response.data['next'] is not None
+        assert not any('COUNT(' in q['sql'] for q in ctx.captured_queries)
+
+        rest = [
+            authenticated_client.get(url, {'q': 'running', 'page_size': 1, 'page': page}).data
+            for page in (2, 3)
+        ]
+        assert {page['results'][0]['slug'] for page in rest} == {'road', 'sold-out'}
+        assert rest[1]['next'] is None
+
+        assert authenticated_client.get(url).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_suggest_endpoint(self, authenticated_client, catalogue):
+        response = authenticated_client.get(reverse('product-suggest'), {'q': 'tra'})
+        assert response.status_code == status.HTTP_200_OK
+        assert [row['slug'] for row in response.data] == ['trail']
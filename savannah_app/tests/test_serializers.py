@@ -0,0 +1,51 @@
+# savannah_app/tests/test_serializers.py
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from savannah_app.models import OrderItem
+from savannah_app.serializers import OrderSerializer
+from savannah_app.tests.conftest import make_products, order_payload
+
+
+@pytest.mark.django_db
+class TestOrderSerializerWrites:
+    def test_create_query_count_is_independent_of_line_count(self, customer, category):
+        products = make_products(category, [f'{i}.00' for i in range(1, 41)])
+        # The first order of the day creates its sales summary rows; later ones update them.
+        warm_up = OrderSerializer(data=order_payload(customer, [(products[0], 1)]))
+        assert warm_up.is_valid(), warm_up.errors
+        warm_up.save()
+        counts = []
+        for lines in (2, 40):
+            serializer = OrderSerializer(data=order_payload(customer, [(p, 1) for p in products[:lines]]))
+            with CaptureQueriesContext(connection) as ctx:
+                assert serializer.is_valid(), serializer.errors
+                order = serializer.save()
+            counts.append(len(ctx.captured_queries))
+            assert order.items.count() == lines
+        assert counts[0] == counts[1]
+
+    def test_unknown_product_is_rejected(self, customer, product):
+        payload = order_payload(customer, [(product, 1)])
+        payload['items'].append({'product': 999999, 'quantity': 1, 'price': '5.00'})
+        serializer = OrderSerializer(data=payload)
+        assert not serializer.is_valid()
+        assert 'items' in serializer.errors
+
+    def test_update_only_touches_changed_lines(self, customer, category):
+        keep, change, drop, add = make_products(category, ['1.00', '2.00', '3.00', '4.00'])
+        serializer = OrderSerializer(data=order_payload(customer, [(keep, 1), (change, 1), (drop, 1)]))
+        assert serializer.is_valid(), serializer.errors
+        order = serializer.save()
+        kept_item = order.items.get(product=keep)
+
+        payload = order_payload(customer, [(keep, 1), (change, 1), (add, 1)])
+        payload['items'][1]['quantity'] = 3
+        serializer = OrderSerializer(order, data=payload)
+        assert serializer.is_valid(), serializer.errors
+        serializer.save()
+
+        items = {item.product_id: item for item in OrderItem.objects.filter(order=order)}
+        assert set(items) == {keep.id, change.id, add.id}
+        assert items[keep.id].pk == kept_item.pk
+        assert items[change.id].quantity == 3
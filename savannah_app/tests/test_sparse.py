@@ -0,0 +1,117 @@
+# savannah_app/tests/test_sparse.py
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from savannah_app.models import Order, OrderItem, Product
+from savannah_app.sparse import parse_paths
+
+
+def fetch(client, url, params=None):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params or {})
+    assert response.status_code == status.HTTP_200_OK, response.content
+    return response, [query['sql'] for query in queries.captured_queries]
+
+
+def selected(sql):
+    """The SELECT list of a query."""
+    return sql[:sql.index(' FROM ')]
+
+
+@pytest.fixture
+def orders(customer, product):
+    result = []
+    for _ in range(3):
+        order = Order.objects.create(
+            customer=customer, total_amount='2.00', shipping_address='a', shipping_city='b',
+            shipping_country='c', shipping_postal_code='d',
+        )
+        OrderItem.objects.bulk_create([OrderItem(order=order, product=product, quantity=1, price='1.00')] * 2)
+        result.append(order)
+    return result
+
+
+@pytest.mark.django_db
+def test_parse_paths():
+    assert parse_paths('id, items.quantity,items.product,,name.') == {
+        'id': None, 'items': {'quantity': None, 'product': None},
+    }
+    assert parse_paths('items.quantity,items') == {'items': None}
+    assert parse_paths('items,items.quantity') == {'items': None}
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+    def test_product_list_selects_only_requested_columns(self, authenticated_client, product):
+        url = reverse('product-list')
+        full, _ = fetch(authenticated_client, url)
+        sparse, queries = fetch(authenticated_client, url, {'fields': 'id,name,price'})
+        assert sparse.data['results'] == [{'id': product.pk, 'name': 'Test Product', 'price': '99.99'}]
+        page = selected(queries[-1])
+        assert '"name"' in page and '"description"' not in page and 'category' not in page
+        assert len(sparse.content) < len(full.content) / 3
+
+    def test_expanded_category_is_joined(self, authenticated_client, product, category):
+        response, queries = fetch(
+            authenticated_client, reverse('product-detail', kwargs={'pk': product.pk}),
+            {'fields': 'id,category.name,category.slug', 'expand': 'category'},
+        )
+        assert response.data == {'id': product.pk, 'category': {'name': 'Test Category', 'slug': 'test-category'}}
+        # Validators, then the product with its category in one join.
+        assert len(queries) == 2
+        assert '"description"' not in selected(queries[1])
+
+    def test_order_list_without_items_skips_the_items_query(self, authenticated_client, orders):
+        url = reverse('order-list')
+        _, full = fetch(authenticated_client, url)
+        response, sparse = fetch(authenticated_client, url, {'fields': 'id,status'})
+        assert response.data['results'] == [{'id': order.pk, 'status': 'pending'} for order in reversed(orders)]
+        assert (len(full), len(sparse)) == (2, 1)
+        assert 'savannah_app_orderitem' not in ' '.join(sparse)
+
+    def test_order_items_can_be_trimmed_and_expanded(self, authenticated_client, orders, product):
+        response, queries = fetch(authenticated_client, reverse('order-list'), {
+            'fields': 'id,items.quantity,items.product.name,items.product.price', 'expand': 'items.product',
+        })
+        assert response.data['results'][0]['items'] == [
+            {'quantity': 1, 'product': {'name': 'Test Product', 'price': '99.99'}},
+        ] * 2
+        assert len(queries) == 2
+        assert '"description"' not in selected(queries[-1])
+
+    def test_order_detail_expands_customer(self, authenticated_client, orders, user):
+        response, queries = fetch(
+            authenticated_client, reverse('order-detail', kwargs={'pk': orders[0].pk}),
+            {'fields': 'id,customer.username', 'expand': 'customer'},
+        )
+        assert response.data == {'id': orders[0].pk, 'customer': {'username': 'testuser'}}
+        assert len(queries) == 2
+
+    def test_history_facets_and_category_lists_are_trimmed(self, authenticated_client, orders, category):
+        response, _ = fetch(authenticated_client, reverse('order-history'), {'fields': 'order_number'})
+        assert [set(order) for order in response.data['results']] == [{'order_number'}] * 3
+        response, _ = fetch(authenticated_client, reverse('product-facets'), {'fields': 'id'})
+        assert response.data['results'] == [{'id': orders[0].items.first().product_id}]
+        response, queries = fetch(authenticated_client, reverse('category-list'), {'fields': 'id,name'})
+        assert response.data['results'] == [{'id': category.pk, 'name': 'Test Category'}]
+        assert '"description"' not in selected(queries[-1])
+
+    def test_unknown_fields_are_rejected(self, authenticated_client, product):
+        url = reverse('product-list')
+        response = authenticated_client.get(url, {'fields': 'id,colour'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data == {'fields': ['Unknown field "colour".']}
+        response = authenticated_client.get(url, {'expand': 'stock'})
+        assert response.data == {'expand': ['Cannot expand "stock".']}
+        response = authenticated_client.get(url, {'fields': 'category.name'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_writes_ignore_fieldsets(self, authenticated_client, category):
+        response = authenticated_client.post(reverse('product-list') + '?fields=id', {
+            'name': 'New', 'slug': 'new', 'description': 'd', 'price': '1.00', 'category': category.pk,
+        })
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['description'] == 'd'
+        assert Product.objects.filter(slug='new').exists()
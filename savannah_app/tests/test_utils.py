@@ -1,22 +1,65 @@
 # savannah_app/tests/test_utils.py
 import pytest
+import time
+from datetime import timedelta
+from django.core.mail.backends.locmem import EmailBackend
+from django.utils import timezone
 from unittest.mock import patch
-from savannah_app.utils import send_sms, send_admin_email, send_order_notification
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from savannah_app.models import NotificationDelivery, OrderItem, PendingAdminEmail, Product
+from savannah_app.notifications import flush_admin_email_digest, queue_admin_email
+from savannah_app.tasks import deliver_order_notification, queue_order_confirmation, transition_id
+from savannah_app.sms import LocMemSMSBackend, RateLimiter, SMSClient, get_sms_client
+from savannah_app.utils import (
+    load_order_notification_context, order_notification_messages, render_order_messages,
+    send_bulk_sms, send_sms, send_admin_email, send_order_notification
+)
 
 @pytest.mark.django_db
 class TestNotifications:
-    @patch('savannah_app.utils.initialize_africastalking')
-    def test_send_sms(self, mock_at):
-        mock_sms = mock_at.return_value
-        mock_sms.send.return_value = {
-            'SMSMessageData': {
-                'Recipients': [{'status': 'Success'}]
-            }
-        }
-        
+    def test_send_sms(self):
         result = send_sms('1234567890', 'Test message')
         assert result is not None
-        mock_sms.send.assert_called_once()
+        assert get_sms_client().backend.outbox[-1] == {
+            'message': 'Test message', 'recipients': ['1234567890']
+        }
+        assert get_sms_client() is get_sms_client()
+
+    def test_send_bulk_sms_coalesces_identical_messages(self, settings):
+        settings.SMS_MAX_RECIPIENTS = 2
+        messages = [(f'+2547000000{i:02d}', 'Your order has shipped') for i in range(5)]
+        messages.append(('+254711111111', 'Different text'))
+        send_bulk_sms(messages)
+        outbox = get_sms_client().backend.outbox
+        assert sorted(len(request['recipients']) for request in outbox) == [1, 1, 2, 2]
+
+    def test_send_bulk_reports_each_recipient(self):
+        class FlakyBackend(LocMemSMSBackend):
+            def send(self, message, recipients):
+                if message == 'fails':
+                    raise ConnectionError(message)
+                response = super().send(message, recipients)
+                # The gateway answers in international form and rejects some numbers.
+                response['SMSMessageData']['Recipients'] = [
+                    {'number': '+254722000001', 'status': 'Success', 'statusCode': 101},
+                    {'number': '+254722000002', 'status': 'InvalidPhoneNumber', 'statusCode': 403},
+                ]
+                return response
+
+        client = SMSClient(FlakyBackend(), max_recipients=10)
+        messages = [('0722000001', 'ok'), ('0722000002', 'ok'), ('0722000001', 'ok'), ('0722000003', 'ok'), ('3', 'fails')]
+        assert sorted(client.send_bulk(messages)) == [
+            ('fails', [], {'3': 'RequestFailed'}),
+            ('ok', ['0722000001'], {'0722000002': 'InvalidPhoneNumber', '0722000003': 'Missing'}),
+        ]
+
+    def test_rate_limiter_throttles_bursts(self):
+        limiter = RateLimiter(rate=50, burst=1)
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+        assert time.monotonic() - start >= 0.09
     
     @patch('savannah_app.utils.send_mail')
     def test_send_admin_email(self, mock_send_mail):
@@ -31,4 +74,118 @@ class TestNotifications:
         send_order_notification(order)
         assert mock_sms.called
         assert mock_email.called
-  
\ No newline at end of file
+  
+# The gateway's answer for the order fixture's customer.
+ACCEPTED = {'SMSMessageData': {'Recipients': [{'number': '+1234567890', 'status': 'Success', 'statusCode': 101}]}}
+
+
+@pytest.mark.django_db
+class TestNotificationTasks:
+    @patch('savannah_app.tasks.send_sms', return_value=ACCEPTED)
+    @patch('savannah_app.tasks.queue_admin_email', return_value=True)
+    def test_queued_on_commit_and_idempotent(self, mock_email, mock_sms, order, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            queue_order_confirmation(order)
+        assert not mock_sms.called
+
+        for callback in callbacks:
+            callback()
+        deliver_order_notification.delay(order.pk, 'confirmation', order.status, transition_id(order.updated_at))
+
+        assert mock_sms.call_count == 1
+        assert mock_email.call_count == 1
+        assert NotificationDelivery.objects.filter(order=order).count() == 2
+
+    @patch('savannah_app.tasks.send_sms', side_effect=[None, ACCEPTED])
+    @patch('savannah_app.tasks.queue_admin_email', return_value=True)
+    def test_retry_only_resends_failed_channel(self, mock_email, mock_sms, order):
+        order.status = 'shipped'
+        order.save()
+        result = deliver_order_notification.delay(order.pk, 'status', 'shipped')
+
+        assert result.get() == 'sent'
+
+        assert mock_sms.call_count == 2
+        assert mock_email.call_count == 1
+        assert 'has been shipped' in mock_sms.call_args[0][1]
+
+@pytest.mark.django_db
+class TestAdminEmailDigest:
+    def test_events_are_buffered_until_digest_is_full(self, settings, mailoutbox):
+        settings.ADMIN_EMAIL_DIGEST_SIZE = 3
+        queue_admin_email('Order #1 - Shipped', 'one', status='shipped')
+        with CaptureQueriesContext(connection) as queries:
+            queue_admin_email('Order #2 - Shipped', 'two', status='shipped')
+        assert len(queries) == 1
+        assert len(mailoutbox) == 0
+
+        queue_admin_email('Order #3 - Shipped', 'three', status='shipped')
+        assert len(mailoutbox) == 1
+        assert mailoutbox[0].subject == 'Order activity digest: 3 events'
+        assert 'Order #2 - Shipped' in mailoutbox[0].body
+        assert not PendingAdminEmail.objects.exists()
+
+    def test_urgent_status_is_sent_immediately(self, mailoutbox):
+        queue_admin_email('Order #1 - Cancelled', 'cancelled', status='cancelled')
+        assert [m.subject for m in mailoutbox] == ['Order #1 - Cancelled']
+        assert not PendingAdminEmail.objects.exists()
+
+    def test_failed_digest_keeps_only_its_events(self, settings, mailoutbox):
+        settings.ADMIN_EMAIL_DIGEST_SIZE = 2
+        for i in range(3):
+            PendingAdminEmail.objects.create(subject=f'Order #{i} - Shipped', body=str(i))
+        send = EmailBackend.send_messages
+
+        def flaky(backend, messages):
+            if mailoutbox:
+                raise ConnectionError('SMTP went away')
+            return send(backend, messages)
+
+        with patch.object(EmailBackend, 'send_messages', autospec=True, side_effect=flaky):
+            assert flush_admin_email_digest(force=True) == 2
+        assert [m.subject for m in mailoutbox] == ['Order activity digest: 2 events']
+        assert list(PendingAdminEmail.objects.values_list('subject', flat=True)) == ['Order #2 - Shipped']
+
+        assert flush_admin_email_digest(force=True) == 1
+        assert len(mailoutbox) == 2
+
+    def test_flush_sends_once_window_has_passed(self, settings, mailoutbox):
+        queue_admin_email('Order #1 - Processing', 'one', status='processing')
+        assert flush_admin_email_digest() == 0
+
+        PendingAdminEmail.objects.update(
+            created_at=timezone.now() - timedelta(seconds=settings.ADMIN_EMAIL_DIGEST_WINDOW + 1)
+        )
+        assert flush_admin_email_digest() == 1
+        assert len(mailoutbox) == 1
+
+@pytest.mark.django_db
+class TestNotificationContext:
+    def test_query_count_is_constant_in_item_count(self, order, category):
+        def render_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                context = load_order_notification_context(order.pk)
+                render_order_messages('status', context)
+                render_order_messages('confirmation', context)
+            return len(ctx.captured_queries), context
+
+        single, _ = render_queries()
+        for i in range(20):
+            product = Product.objects.create(
+                name=f'Extra {i}', slug=f'extra-{i}', description='', price='1.00', category=category
+            )
+            OrderItem.objects.create(order=order, product=product, quantity=1, price='1.00')
+        many, context = render_queries()
+
+        assert single == many == 2
+        assert len(context['items']) == 21
+
+    def test_rendered_messages(self, order):
+        order.status = 'shipped'
+        sms_message, subject, body = order_notification_messages(order)
+        assert sms_message == (
+            f'Order #{order.order_number} has been shipped. '
+            f'Track your order with number: {order.order_number}'
+        )
+        assert subject == f'Order #{order.order_number} - Shipped'
+        assert '- 1x Test Product @ $99.99 each\n' in body
@@ -1,8 +1,13 @@
+import json
 import pytest
 from rest_framework.test import APIClient
 from rest_framework import status
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from savannah_app.models import Category, Order, OrderItem, Product
 from savannah_app.tests.test_settings import mock_africastalking
 
 @pytest.mark.django_db
@@ -30,6 +35,61 @@ class TestCategoryViewSet:
         assert response.status_code == status.HTTP_200_OK
         assert Decimal(str(response.data['average_price'])) == Decimal('99.99')
 
+    def test_average_price_weights_whole_subtree(self, authenticated_client, category, product):
+        child = Category.objects.create(name='Child', slug='child', parent=category)
+        for i, price in enumerate(['10.00', '20.00']):
+            Product.objects.create(
+                name=f'Child Product {i}', slug=f'child-product-{i}', description='',
+                price=price, category=child
+            )
+        category.refresh_from_db()
+
+        stats = Category.objects.subtree_price_stats(category)
+        assert stats['count'] == 3
+        assert stats['total'] == Decimal('129.99')
+        assert stats['minimum'] == Decimal('10.00')
+        assert stats['maximum'] == Decimal('99.99')
+
+        url = reverse('category-average-price', kwargs={'pk': category.pk})
+        response = authenticated_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert Decimal(str(response.data['average_price'])) == Decimal('43.33')
+        assert response.data['product_count'] == 3
+
+    def test_tree_nests_hierarchy_with_counts(self, authenticated_client, category, product):
+        child = Category.objects.create(name='Child', slug='child', parent=category)
+        Category.objects.create(name='Grandchild', slug='grandchild', parent=child)
+        url = reverse('category-tree')
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = authenticated_client.get(url, {'product_counts': 1})
+        assert response.status_code == status.HTTP_200_OK
+        assert sum('savannah_app_category' in q['sql'] for q in ctx.captured_queries) == 1
+        (root,) = json.loads(response.content)
+        assert root['name'] == 'Test Category'
+        assert root['product_count'] == 1
+        assert root['children'][0]['slug'] == 'child'
+        assert root['children'][0]['children'][0]['slug'] == 'grandchild'
+
+        response = authenticated_client.get(url, {'root': child.pk})
+        (subtree,) = json.loads(response.content)
+        assert subtree['slug'] == 'child' and 'product_count' not in subtree
+
+        response = authenticated_client.get(url, {'root': 999999})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_tree_conditional_get(self, authenticated_client, category):
+        url = reverse('category-tree')
+        etag = authenticated_client.get(url)['ETag']
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        Category.objects.create(name='Child', slug='child', parent=category)
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+        assert json.loads(response.content)[0]['children'][0]['slug'] == 'child'
+
 @pytest.mark.django_db
 class TestProductViewSet:
     def test_list_products(self, authenticated_client, product):
@@ -53,6 +113,93 @@ class TestProductViewSet:
         assert response.status_code == status.HTTP_201_CREATED
         assert response.data['name'] == 'New Product'
 
+    def test_bulk_upload_csv_upserts_and_reports_row_errors(self, authenticated_client, category, product):
+        upload = SimpleUploadedFile('products.csv', (
+            'name,slug,description,price,category,stock\n'
+            f'Renamed,{product.slug},,19.99,{category.slug},3\n'
+            f'Fresh,fresh,Brand new,5.00,{category.slug},\n'
+            'Orphan,orphan,,1.00,no-such-category,1\n'
+            f'Bad price,bad-price,,abc,{category.slug},1\n'
+        ).encode(), content_type='text/csv')
+        url = reverse('product-bulk-upload')
+        response = authenticated_client.post(url, {'file': upload}, format='multipart')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['processed'] == 4
+        assert response.data['created'] == 1
+        assert response.data['updated'] == 1
+        assert [error['row'] for error in response.data['errors']] == [3, 4]
+
+        product.refresh_from_db()
+        assert product.name == 'Renamed'
+        assert product.price == Decimal('19.99')
+        assert Product.objects.get(slug='fresh').stock == 0
+
+    def test_bulk_upload_ndjson(self, authenticated_client, category):
+        upload = SimpleUploadedFile('products.ndjson', (
+            f'{{"name": "A", "slug": "a", "price": "1.50", "category": "{category.slug}"}}\n'
+            'not json\n'
+            f'{{"name": "B", "slug": "b", "price": "2.50", "category": "{category.slug}", "stock": 4}}\n'
+        ).encode())
+        url = reverse('product-bulk-upload')
+        response = authenticated_client.post(url, {'file': upload}, format='multipart')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['created'] == 2
+        assert response.data['errors'][0]['row'] == 2
+        assert set(Product.objects.values_list('slug', flat=True)) == {'a', 'b'}
+
+
+    def _grocery(self):
+        grocery = Category.objects.create(name='Grocery', slug='grocery')
+        bakery = Category.objects.create(name='Bakery', slug='bakery', parent=grocery)
+        produce = Category.objects.create(name='Produce', slug='produce', parent=grocery)
+        toys = Category.objects.create(name='Toys', slug='toys')
+        for i, category in enumerate([grocery, bakery, produce, bakery, produce, toys]):
+            Product.objects.create(
+                name=f'P{i}', slug=f'p{i}', description='', price=Decimal('1.00'), category=category
+            )
+        grocery.refresh_from_db()
+        return grocery, bakery
+
+    def test_by_category_includes_the_whole_subtree(self, authenticated_client):
+        grocery, bakery = self._grocery()
+        url = reverse('product-by-category')
+        response = authenticated_client.get(url, {'category_id': grocery.pk})
+        assert response.status_code == status.HTTP_200_OK
+        assert [p['slug'] for p in response.data['results']] == ['p4', 'p3', 'p2', 'p1', 'p0']
+
+        response = authenticated_client.get(url, {'category_id': bakery.pk})
+        assert [p['slug'] for p in response.data['results']] == ['p3', 'p1']
+
+    def test_by_category_pages_by_keyset(self, authenticated_client):
+        grocery, _ = self._grocery()
+        url = reverse('product-by-category')
+        response = authenticated_client.get(url, {'category_id': grocery.pk, 'page_size': 2})
+        slugs = []
+        while True:
+            slugs += [p['slug'] for p in response.data['results']]
+            assert 'count' not in response.data
+            if not response.data['next']:
+                break
+            response = authenticated_client.get(response.data['next'])
+        assert slugs == ['p4', 'p3', 'p2', 'p1', 'p0']
+
+    def test_by_category_query_count_does_not_depend_on_subtree_size(self, authenticated_client, settings):
+        settings.CATALOGUE_CACHE_ENABLED = False
+        grocery, bakery = self._grocery()
+        url = reverse('product-by-category')
+        counts = []
+        for category in (bakery, grocery):
+            with CaptureQueriesContext(connection) as ctx:
+                authenticated_client.get(url, {'category_id': category.pk})
+            counts.append(len(ctx.captured_queries))
+        assert counts[0] == counts[1]
+        assert not any(' IN (' in q['sql'] for q in ctx.captured_queries)
+
+    def test_by_category_rejects_missing_and_unknown_categories(self, authenticated_client):
+        url = reverse('product-by-category')
+        assert authenticated_client.get(url).status_code == status.HTTP_400_BAD_REQUEST
+        response = authenticated_client.get(url, {'category_id': 999999})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
 
 @pytest.mark.django_db
 class TestOrderViewSet:
@@ -100,4 +247,38 @@ class TestOrderViewSet:
             print(f"Confirmation call args: {args}")
             print(f"Confirmation call kwargs: {kwargs}")
             
-    
\ No newline at end of file
+    
+    def _make_orders(self, customer, product, count):
+        for i in range(count):
+            order = Order.objects.create(
+                customer=customer, total_amount='10.00', shipping_address='a',
+                shipping_city='b', shipping_country='c', shipping_postal_code='d'
+            )
+            OrderItem.objects.create(order=order, product=product, quantity=1, price='10.00')
+            OrderItem.objects.create(order=order, product=product, quantity=2, price='10.00')
+
+    def test_list_query_count_is_constant(self, authenticated_client, customer, product):
+        url = reverse('order-list')
+        self._make_orders(customer, product, 2)
+        with CaptureQueriesContext(connection) as small:
+            response = authenticated_client.get(url)
+        assert len(response.data['results']) == 2
+
+        self._make_orders(customer, product, 8)
+        with CaptureQueriesContext(connection) as large:
+            response = authenticated_client.get(url)
+        assert len(response.data['results']) == 10
+        assert len(small.captured_queries) == len(large.captured_queries)
+        assert not any('COUNT(' in q['sql'] for q in large.captured_queries)
+
+    def test_history_uses_cursor_pagination(self, authenticated_client, customer, product):
+        self._make_orders(customer, product, 12)
+        url = reverse('order-history')
+        first = authenticated_client.get(url)
+        assert 'count' not in first.data
+        assert 'cursor=' in first.data['next']
+
+        second = authenticated_client.get(first.data['next'])
+        ids = [o['id'] for o in first.data['results']] + [o['id'] for o in second.data['results']]
+        assert len(ids) == len(set(ids)) == 12
+        assert ids == sorted(ids, reverse=True)
@@ -5,7 +5,8 @@ from .views import (
     CategoryViewSet,
     ProductViewSet,
     OrderViewSet,
-    CustomerViewSet
+    CustomerViewSet,
+    SalesAnalyticsViewSet
 )
 
 router = DefaultRouter()
@@ -13,6 +14,7 @@ router.register(r'categories', CategoryViewSet)
 router.register(r'products', ProductViewSet)
 router.register(r'orders', OrderViewSet, basename='order')
 router.register(r'customers', CustomerViewSet, basename='customer')
+router.register(r'analytics/sales', SalesAnalyticsViewSet, basename='sales-analytics')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,24 +1,31 @@
+import logging
 from django.conf import settings
 from django.core.mail import send_mail
-from django.template.loader import render_to_string
-import africastalking
-
-def initialize_africastalking():
-    """Initialize Africa's Talking SMS gateway."""
-    africastalking.initialize(
-        username=settings.AT_USERNAME,
-        api_key=settings.AT_API_KEY
-    )
-    return africastalking.SMS
+from django.template.loader import get_template
+from functools import lru_cache
+from .models import Order, OrderItem
+from .sms import get_sms_client
+
+logger = logging.getLogger(__name__)
 
 def send_sms(phone_number, message):
     """Send SMS using Africa's Talking gateway."""
-    sms = initialize_africastalking()
     try:
-        response = sms.send(message=message, recipients=[phone_number])
-        return response
-    except Exception as e:
-        print(f"SMS sending failed: {str(e)}")
+        return get_sms_client().send(phone_number, message)
+    except Exception:
+        logger.exception('SMS sending failed')
+        return None
+
+def send_bulk_sms(messages):
+    """Send many (phone_number, message) pairs, batching identical texts.
+
+    Returns ``SMSClient.send_bulk``'s ``(message, sent, failed)`` per
+    request, or ``None``.
+    """
+    try:
+        return get_sms_client().send_bulk(messages)
+    except Exception:
+        logger.exception('Bulk SMS sending failed')
         return None
 
 def send_admin_email(subject, message_content):
@@ -36,78 +43,124 @@ def send_admin_email(subject, message_content):
         print(f"Email sending failed: {str(e)}")
         return False
 
+STATUS_MESSAGES = {
+    'pending': 'is pending confirmation',
+    'processing': 'is being processed',
+    'shipped': 'has been shipped',
+    'delivered': 'has been delivered',
+    'cancelled': 'has been cancelled'
+}
+
+STATUS_MESSAGES_PLURAL = {
+    'pending': 'are pending confirmation',
+    'processing': 'are being processed',
+    'shipped': 'have been shipped',
+    'delivered': 'have been delivered',
+    'cancelled': 'have been cancelled'
+}
+
+NOTIFICATION_TEMPLATES = {
+    'confirmation': (
+        'savannah_app/notifications/order_confirmation_sms.txt',
+        'savannah_app/notifications/order_confirmation_email.txt',
+    ),
+    'status': (
+        'savannah_app/notifications/order_status_sms.txt',
+        'savannah_app/notifications/order_status_email.txt',
+    ),
+}
+
+# SMS templates for notifications sent to many orders at once. Each customer
+# gets one text saying how many of their orders the event covers, without
+# order numbers, so the texts coalesce into multi-recipient requests.
+BULK_SMS_TEMPLATES = {
+    'status': 'savannah_app/notifications/order_status_bulk_sms.txt',
+}
+
+@lru_cache(maxsize=None)
+def _compiled_template(name):
+    """Parse each notification template once per process."""
+    return get_template(name)
+
+def _render(name, context):
+    text = _compiled_template(name).render(context)
+    return text[:-1] if text.endswith('\n') else text
+
+def load_order_notification_context(order_id, status=None):
+    """Everything the notification templates need, in two queries.
+
+    One query joins the order with its customer and user, the other reads
+    every line with its product name. Returns ``None`` if the order is gone.
+    """
+    return load_order_notification_contexts([order_id], status).get(order_id)
+
+def load_order_notification_contexts(order_ids, status=None):
+    """``load_order_notification_context`` for many orders, still in two queries.
+
+    Returns ``{order_id: context}``; orders that are gone are left out.
+    """
+    orders = Order.objects.filter(pk__in=order_ids).values(
+        'pk', 'order_number', 'status', 'total_amount', 'shipping_address', 'created_at',
+        'customer__phone', 'customer__user__username',
+    )
+    contexts = {}
+    for order in orders:
+        order_status = status or order['status']
+        contexts[order['pk']] = {
+            'order_number': order['order_number'],
+            'status': order_status,
+            'status_title': order_status.title(),
+            'status_message': STATUS_MESSAGES.get(order_status, 'status has been updated'),
+            'username': order['customer__user__username'],
+            'phone': order['customer__phone'],
+            'total_amount': str(order['total_amount']),
+            'shipping_address': order['shipping_address'],
+            'created_at': str(order['created_at']),
+            'items': [],
+        }
+    if contexts:
+        items = OrderItem.objects.filter(order_id__in=list(contexts)).order_by('id').values_list(
+            'order_id', 'quantity', 'product__name', 'price'
+        )
+        for order_id, quantity, name, price in items:
+            contexts[order_id]['items'].append({'quantity': quantity, 'product_name': name, 'price': str(price)})
+    return contexts
+
+def render_order_messages(kind, context):
+    """Render the (SMS, email subject, email body) for a notification ``kind``."""
+    sms_template, email_template = NOTIFICATION_TEMPLATES[kind]
+    if kind == 'confirmation':
+        subject = f"New Order #{context['order_number']} Received"
+    else:
+        subject = f"Order #{context['order_number']} - {context['status_title']}"
+    return _render(sms_template, context), subject, _render(email_template, context)
+
+def render_bulk_sms(kind, context, order_count=1):
+    """Render the batched SMS for a notification ``kind`` covering ``order_count`` of a customer's orders."""
+    return _render(BULK_SMS_TEMPLATES[kind], {
+        **context,
+        'order_count': order_count,
+        'status_message_plural': STATUS_MESSAGES_PLURAL.get(context['status'], 'statuses have been updated'),
+    })
+
+def order_notification_messages(order):
+    """Build the (SMS, email subject, email body) for an order status update."""
+    context = load_order_notification_context(order.pk, order.status)
+    return render_order_messages('status', context)
+
+def order_confirmation_messages(order):
+    """Build the (SMS, email subject, email body) for a new order."""
+    context = load_order_notification_context(order.pk, order.status)
+    return render_order_messages('confirmation', context)
+
 def send_order_notification(order):
     """Send notifications for new orders and status updates."""
-    # SMS notification to customer
-    status_messages = {
-        'pending': 'is pending confirmation',
-        'processing': 'is being processed',
-        'shipped': 'has been shipped',
-        'delivered': 'has been delivered',
-        'cancelled': 'has been cancelled'
-    }
-    
-    status_msg = status_messages.get(order.status, 'status has been updated')
-    sms_message = f"Order #{order.order_number} {status_msg}. "
-    
-    if order.status == 'shipped':
-        sms_message += f"Track your order with number: {order.order_number}"
-    elif order.status == 'delivered':
-        sms_message += "Thank you for shopping with us!"
-    
+    sms_message, subject, message_content = order_notification_messages(order)
     send_sms(order.customer.phone, sms_message)
-    
-    # Email notification to admin
-    subject = f'Order #{order.order_number} - {order.status.title()}'
-    
-    # Detailed order information for admin
-    message_content = f"""
-Order Details:
--------------
-Order Number: {order.order_number}
-Status: {order.status}
-Customer: {order.customer.user.username}
-Phone: {order.customer.phone}
-Total Amount: ${order.total_amount}
-Shipping Address: {order.shipping_address}
-Date: {order.created_at}
-
-Items:
-------
-"""
-    for item in order.items.all():
-        message_content += f"- {item.quantity}x {item.product.name} @ ${item.price} each\n"
-    
     send_admin_email(subject, message_content)
 
 def send_order_confirmation(order):
     """Send initial order confirmation notifications."""
-    # SMS to customer
-    sms_message = (
-        f"Thank you for your order #{order.order_number}! "
-        f"Total amount: ${order.total_amount}. "
-        "We'll notify you when your order is processed."
-    )
+    sms_message, subject, message_content = order_confirmation_messages(order)
     send_sms(order.customer.phone, sms_message)
-    
-    # Email to admin
-    subject = f'New Order #{order.order_number} Received'
-    message_content = f"""
-New Order Received!
-------------------
-Order Number: {order.order_number}
-Customer: {order.customer.user.username}
-Phone: {order.customer.phone}
-Total Amount: ${order.total_amount}
-Shipping Address: {order.shipping_address}
-Date: {order.created_at}
-
-Items:
-------
-"""
-    for item in order.items.all():
-        message_content += f"- {item.quantity}x {item.product.name} @ ${item.price} each\n"
-    
-    message_content += "\nPlease process this order as soon as possible."
-    
-    send_admin_email(subject, message_content)
\ No newline at end of file
+    send_admin_email(subject, message_content)
@@ -1,54 +1,175 @@
-import africastalking
+from decimal import Decimal
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.db.models import Avg
-from .models import Category, Product, Customer, Order
-from .serializers import CategorySerializer, ProductSerializer, CustomerSerializer, OrderSerializer
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from .models import Category, CategoryRollup, Product, Customer, Order, OrderItem
+from .serializers import (
+    BulkOrderStatusSerializer, CategorySerializer, ProductSerializer, ProductSearchSerializer, CustomerSerializer,
+    OrderExportSerializer, OrderSerializer, ProductExportSerializer, SalesReportSerializer,
+)
 from .permissions import IsAdminUser, IsCustomer
-from .utils import send_order_notification, send_order_confirmation
+from . import analytics
+from .caching import cache_response
+from .conditional import ConditionalMixin
+from .category_tree import cached_tree, content_etag, render_tree, tree_etag
+from .exports import export_orders, export_products, filter_orders, filter_products
+from .facets import product_facets
+from .filters import ProductFilter
+from .ingestion import detect_format, import_products
+from .inventory import InsufficientStock, held_quantities, rebalance, release
+from .order_status import can_transition, transition_orders
+from .pagination import OrderCursorPagination, ProductCursorPagination, UncountedPageNumberPagination
+from .pricing import money
+from .projections import order_data, product_data, project_orders, project_products
+from .search import search_products, suggest_products
+from .sparse import SparseFieldsMixin
+from .tasks import queue_order_confirmation, queue_order_notification
 
-class CategoryViewSet(viewsets.ModelViewSet):
+def category_scopes(view, request, *args, **kwargs):
+    return ['categories']
+
+
+def product_list_scopes(view, request, *args, **kwargs):
+    return ['products']
+
+
+def product_detail_scopes(view, request, *args, pk=None, **kwargs):
+    return ['categories', f'product:{pk}']
+
+
+def customer_order_scopes(view, request, *args, **kwargs):
+    # Product names in a customer's orders follow the product token; staff
+    # lists have no order validator to go with it.
+    return None if request.user.is_staff else ['products']
+
+
+def products_by_category_scopes(view, request, *args, **kwargs):
+    category_id = request.query_params.get('category_id')
+    return category_id and ['categories', f'category:{category_id}']
+
+
+class CategoryViewSet(SparseFieldsMixin, ConditionalMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticated]
+    conditional_list_scopes = staticmethod(category_scopes)
+
+    @cache_response(category_scopes)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response(category_scopes)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        """Nested category hierarchy in one response.
+
+        ``?root=<id>`` limits it to one subtree and ``?product_counts=1``
+        adds each node's subtree product count. Supports ``If-None-Match``.
+        """
+        root_id = request.query_params.get('root')
+        if root_id is not None and not root_id.isdigit():
+            return Response({"error": "root must be a category id"}, status=status.HTTP_400_BAD_REQUEST)
+        root_id = root_id and int(root_id)
+        with_counts = request.query_params.get('product_counts') in ('1', 'true')
+
+        etag = tree_etag(root_id, with_counts)
+        content = None
+        if etag is None:
+            content = render_tree(root_id, with_counts)
+            etag = content and content_etag(content)
+        if etag is None:
+            return Response({"error": "Category not found"}, status=status.HTTP_404_NOT_FOUND)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        if content is None:
+            content = cached_tree(etag, root_id, with_counts)
+        if content is None:
+            return Response({"error": "Category not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        return response
 
     @action(detail=True, methods=['get'])
     def average_price(self, request, pk=None):
-        """Get average product price for a category."""
+        """Get price statistics for a category and all of its descendants."""
         category = self.get_object()
-        average = category.products.aggregate(avg_price=Avg('price'))['avg_price']
-        
-        # Include child categories in calculation
-        for child in category.get_descendants():
-            child_avg = child.products.aggregate(avg_price=Avg('price'))['avg_price']
-            if child_avg is not None:
-                if average is None:
-                    average = child_avg
-                else:
-                    average = (average + child_avg) / 2
+        rollup = CategoryRollup.objects.filter(category=category).first()
+        if rollup is None:
+            rollup = CategoryRollup(category=category)
+            stats = Category.objects.subtree_price_stats(category)
+            rollup.product_count = stats['count']
+            rollup.price_sum = stats['total'] or 0
+            rollup.price_min = stats['minimum']
+            rollup.price_max = stats['maximum']
 
         return Response({
             'category': category.name,
-            'average_price': average if average is not None else 0
+            'average_price': rollup.price_average or 0,
+            'product_count': rollup.product_count,
+            'total_price': rollup.price_sum,
+            'min_price': rollup.price_min,
+            'max_price': rollup.price_max,
         })
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(SparseFieldsMixin, ConditionalMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
     parser_classes = (MultiPartParser, FormParser)
+    filterset_class = ProductFilter
+    # Product payloads embed the category name.
+    conditional_timestamp_fields = ('updated_at', 'category__updated_at')
+    conditional_list_scopes = staticmethod(product_list_scopes)
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'bulk_upload', 'export']:
             return [IsAdminUser()]
         return [IsAuthenticated()]
+
+    @cache_response(product_list_scopes)
+    def list(self, request, *args, **kwargs):
+        # Plain rows instead of model instances through ProductSerializer.
+        serializer = self.get_sparse_serializer()
+        rows = project_products(self.filter_queryset(self.get_queryset()), serializer)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(product_data(page, serializer))
+        return Response(product_data(rows, serializer))
+
+    @cache_response(product_detail_scopes)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
     
     @action(detail=False, methods=['post'])
     def bulk_upload(self, request):
-        """Upload multiple products at once."""
+        """Upload multiple products at once.
+
+        A CSV or NDJSON ``file`` upload is streamed and upserted by slug in
+        chunks, with per-row errors reported; otherwise the request body is
+        validated as a list of products.
+        """
+        upload = request.FILES.get('file')
+        if upload is not None:
+            file_format = detect_format(upload, request.data.get('file_format'))
+            if file_format is None:
+                return Response(
+                    {"error": "Upload must be a .csv or .ndjson file"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            report = import_products(upload, file_format)
+            return Response(report, status=status.HTTP_200_OK)
+
         serializer = ProductSerializer(data=request.data, many=True)
         if serializer.is_valid():
             serializer.save()
@@ -56,23 +177,96 @@ class ProductViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream every matching product as CSV or NDJSON (admin only).
+
+        Takes ``file_format``, ``compress``, an ``updated_at`` range in
+        ``start``/``end``, and ``available`` and ``category`` filters.
+        """
+        params = ProductExportSerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        query = params.validated_data
+        products = filter_products(
+            Product.objects.all(), start=query.get('start'), end=query.get('end'),
+            available=query['available'], category=query.get('category'),
+        )
+        return export_products(products, query['file_format'], query['compress'])
+
+    @action(detail=False, methods=['get'])
+    @cache_response(product_list_scopes)
+    def search(self, request):
+        """Full-text product search, best match first.
+
+        Takes ``q`` plus optional ``category`` (whole subtree),
+        ``min_price``, ``max_price`` and ``available`` filters.
+        """
+        params = ProductSearchSerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        filters = dict(params.validated_data)
+        products = search_products(
+            filters.pop('q'), queryset=self.queryset.select_related('category'), **filters
+        )
+        paginator = UncountedPageNumberPagination()
+        page = paginator.paginate_queryset(products, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    @cache_response(product_list_scopes)
+    def suggest(self, request):
+        """Typeahead: up to ten products whose name has words starting with ``q``."""
+        params = ProductSearchSerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        filters = dict(params.validated_data)
+        return Response(suggest_products(filters.pop('q'), **filters))
+
+    @action(detail=False, methods=['get'])
+    @cache_response(product_list_scopes)
+    def facets(self, request):
+        """A page of filtered products plus category, price and stock facet counts.
+
+        Takes the same filters as the product list.
+        """
+        queryset = self.get_queryset()
+        products = self.filter_queryset(queryset.select_related('category'))
+        page = self.paginate_queryset(products)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        response.data['facets'] = product_facets(self.filterset_class, request.query_params, queryset, request)
+        return response
+
+    @action(detail=False, methods=['get'])
+    @cache_response(products_by_category_scopes)
     def by_category(self, request):
-        """Get products filtered by category."""
+        """Products in a category and all of its descendants, newest first.
+
+        The subtree is matched with one join on the category's MPTT
+        interval, and pages are keyset cursors over ``(created_at, id)``.
+        """
         category_id = request.query_params.get('category_id')
-        if category_id:
-            products = self.queryset.filter(category_id=category_id)
-            page = self.paginate_queryset(products)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
-            serializer = self.get_serializer(products, many=True)
-            return Response(serializer.data)
-        return Response(
-            {"error": "Category ID is required"}, 
-            status=status.HTTP_400_BAD_REQUEST
-        )
+        if not category_id:
+            return Response(
+                {"error": "Category ID is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            category = Category.objects.only('tree_id', 'lft', 'rght').filter(pk=category_id).first()
+        except (TypeError, ValueError):
+            category = None
+        if category is None:
+            return Response({"error": "Category not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        products = self.queryset.select_related('category').in_subtree(category)
+        paginator = ProductCursorPagination()
+        # No view: the keyset order is fixed, so ?ordering= must not apply.
+        page = paginator.paginate_queryset(products, request)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
-class CustomerViewSet(viewsets.ModelViewSet):
+class CustomerViewSet(SparseFieldsMixin, ConditionalMixin, viewsets.ModelViewSet):
     serializer_class = CustomerSerializer
     permission_classes = [IsAuthenticated]
     
@@ -84,25 +278,69 @@ class CustomerViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(SparseFieldsMixin, ConditionalMixin, viewsets.ModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated, IsCustomer]
+    pagination_class = OrderCursorPagination
+    conditional_list_actions = ('list', 'history')
+    # Order payloads embed the customer's and the products' names.
+    conditional_timestamp_fields = ('updated_at', 'customer__updated_at', 'items__product__updated_at')
+    conditional_list_timestamp_fields = ('updated_at', 'customer__updated_at')
+    conditional_list_scopes = staticmethod(customer_order_scopes)
+    ordering = OrderCursorPagination.ordering
+    ordering_fields = ['created_at', 'id']
 
     def get_queryset(self):
+        # Load everything OrderSerializer touches up front: one query for
+        # orders, customers and users, one for all items with their products.
+        queryset = Order.objects.select_related('customer__user').prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.select_related('product').order_by('id'))
+        )
         if self.request.user.is_staff:
-            return Order.objects.all()
-        return Order.objects.filter(customer__user=self.request.user)
+            return queryset
+        return queryset.filter(customer__user=self.request.user)
+
+    def get_conditional_list_queryset(self, request):
+        # A customer's orders: count and max(updated_at) straight from the
+        # (customer, updated_at) index. Staff lists span every order.
+        if request.user.is_staff:
+            return None
+        return Order.objects.filter(customer__user=request.user)
+
+    def get_history_queryset(self):
+        orders = self.get_queryset()
+        # Add filtering options
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            orders = orders.filter(status=status_filter)
+        return orders
+
+    def list(self, request, *args, **kwargs):
+        # Plain rows instead of model instances through OrderSerializer.
+        serializer = self.get_sparse_serializer()
+        rows = project_orders(self.filter_queryset(self.get_queryset()), serializer)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(order_data(page, serializer))
+        return Response(order_data(rows, serializer))
 
     def perform_create(self, serializer):
         """Create order and send notification."""
         try:
             customer = Customer.objects.get(user=self.request.user)
             order = serializer.save(customer=customer)
-            # Send initial order confirmation
-            send_order_confirmation(order)
+            # Queue initial order confirmation
+            queue_order_confirmation(order)
         except Customer.DoesNotExist:
             raise serializer.ValidationError("Customer profile not found")
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        # Give back whatever the order still holds before its lines go.
+        instance.status = Order.objects.select_for_update().values_list('status', flat=True).get(pk=instance.pk)
+        release(held_quantities(instance))
+        instance.delete()
+
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
         """Update order status (admin only)."""
@@ -120,12 +358,29 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
             
-        old_status = order.status
-        order.status = new_status
-        order.save()
+        try:
+            with transaction.atomic():
+                # Lock the order so two concurrent cancellations release stock once.
+                order.status = Order.objects.select_for_update().values_list('status', flat=True).get(pk=order.pk)
+                old_status = order.status
+                if not can_transition(old_status, new_status):
+                    return Response(
+                        {"error": f"Cannot move an order from {old_status} to {new_status}"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                held = held_quantities(order)
+                with analytics.tracking([order.pk]):
+                    order.status = new_status
+                    order.save()
+                rebalance(order, held)
+        except InsufficientStock as exc:
+            return Response(
+                {"error": "Insufficient stock", "shortages": exc.shortages},
+                status=status.HTTP_409_CONFLICT
+            )
         
-        # Send status update notification
-        send_order_notification(order)
+        # Queue status update notification
+        queue_order_notification(order)
         
         return Response({
             "status": "updated",
@@ -134,18 +389,90 @@ class OrderViewSet(viewsets.ModelViewSet):
             "order_number": order.order_number
         })
 
+    @action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_update_status(self, request):
+        """Move many orders to new statuses at once (admin only)."""
+        if not request.user.is_staff:
+            return Response(
+                {"error": "Admin access required"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        serializer = BulkOrderStatusSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        changes = {change['id']: change['status'] for change in serializer.validated_data['orders']}
+        results = transition_orders(changes)
+
+        return Response({
+            "updated": sum(result['result'] == 'updated' for result in results.values()),
+            "results": [{"id": pk, **results[pk]} for pk in changes],
+        })
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream orders with their items as CSV or NDJSON (admin only).
+
+        Takes ``file_format``, ``compress``, a ``created_at`` range in
+        ``start``/``end``, and any number of ``status`` values.
+        """
+        if not request.user.is_staff:
+            return Response(
+                {"error": "Admin access required"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        params = OrderExportSerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        query = params.validated_data
+        orders = filter_orders(
+            Order.objects.all(), start=query.get('start'), end=query.get('end'), statuses=query['status'],
+        )
+        return export_orders(orders, query['file_format'], query['compress'])
+
     @action(detail=False, methods=['get'])
     def history(self, request):
         """Get order history for current user."""
-        orders = self.get_queryset().order_by('-created_at')
-        # Add filtering options
-        status_filter = request.query_params.get('status')
-        if status_filter:
-            orders = orders.filter(status=status_filter)
-            
-        page = self.paginate_queryset(orders)
+        serializer = self.get_sparse_serializer()
+        rows = project_orders(self.get_history_queryset(), serializer)
+        page = self.paginate_queryset(rows)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(orders, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+            return self.get_paginated_response(order_data(page, serializer))
+        return Response(order_data(rows, serializer))
+
+
+class SalesAnalyticsViewSet(viewsets.ViewSet):
+    """Revenue, orders and units per period, summed from daily summaries."""
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def list(self, request):
+        params = SalesReportSerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        query = params.validated_data
+        rows = analytics.sales_report(
+            query['start'], query['end'], bucket=query['bucket'], group_by=query['group_by'],
+            statuses=query['status'], category=query.get('category'),
+        )
+
+        results, totals = [], {'orders': 0, 'items': 0, 'revenue': Decimal('0')}
+        for row in rows:
+            result = {'period': row['period']}
+            if 'category' in query['group_by']:
+                result['category'] = row['category_id']
+            if 'status' in query['group_by']:
+                result['status'] = row['status']
+            for name in totals:
+                totals[name] += row[name]
+            result.update(orders=row['orders'], items=row['items'], revenue=str(money(row['revenue'])))
+            results.append(result)
+        totals['revenue'] = str(money(totals['revenue']))
+
+        return Response({
+            'start': query['start'],
+            'end': query['end'],
+            'bucket': query['bucket'],
+            'results': results,
+            'totals': totals,
+        })
@@ -12,5 +12,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'savannah_project.settings')
+os.environ.setdefault('SERVING_MODE', 'asgi')
 
 application = get_asgi_application()
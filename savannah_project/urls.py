@@ -1,4 +1,5 @@
 # savannah_project/urls.py
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from drf_yasg.views import get_schema_view
@@ -10,6 +11,9 @@ from rest_framework_simplejwt.views import (
 # Add this import for health check
 from savannah_app.health_views import health_check  # Add this line
 
+# Under ASGI the hot read endpoints are served by async views.
+app_urls = 'savannah_app.async_urls' if settings.SERVING_MODE == 'asgi' else 'savannah_app.urls'
+
 # Schema view configuration for API documentation
 schema_view = get_schema_view(
     openapi.Info(
@@ -41,6 +45,6 @@ urlpatterns = [
     path('api/auth/', include('rest_framework.urls')),
     
     # API endpoints
-    path('api/v1/', include('savannah_app.urls')),
-    path('', include('savannah_app.urls')),  # Default route
+    path('api/v1/', include(app_urls)),
+    path('', include(app_urls)),  # Default route
 ]
\ No newline at end of file
@@ -10,6 +10,9 @@ docker-compose up -d
 # Run migrations
 docker-compose exec web python manage.py migrate
 
+# Backfill denormalized category rollups
+docker-compose exec web python manage.py rebuild_category_rollups
+
 # Collect static files
 docker-compose exec web python manage.py collectstatic --no-input
 